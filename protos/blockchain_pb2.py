@@ -24,19 +24,57 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17protos/blockchain.proto\x12\nblockchain\"^\n\x0bTransaction\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x10\n\x08receiver\x18\x03 \x01(\t\x12\x0e\n\x06\x61mount\x18\x04 \x01(\x02\x12\x11\n\ttimestamp\x18\x05 \x01(\x01\"\xb2\x01\n\x05\x42lock\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x15\n\rprevious_hash\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x01\x12-\n\x0ctransactions\x18\x04 \x03(\x0b\x32\x17.blockchain.Transaction\x12\r\n\x05nonce\x18\x05 \x01(\x05\x12\x0c\n\x04hash\x18\x06 \x01(\t\x12\x10\n\x08miner_id\x18\x07 \x01(\t\x12\x12\n\ndifficulty\x18\x08 \x01(\x05\"\'\n\x03\x41\x63k\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2\xcd\x01\n\x0e\x42lockchainNode\x12?\n\x11SubmitTransaction\x12\x17.blockchain.Transaction\x1a\x0f.blockchain.Ack\"\x00\x12\x36\n\x0e\x42roadcastBlock\x12\x11.blockchain.Block\x1a\x0f.blockchain.Ack\"\x00\x12\x42\n\x14\x42roadcastTransaction\x12\x17.blockchain.Transaction\x1a\x0f.blockchain.Ack\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17protos/blockchain.proto\x12\nblockchain\"^\n\x0bTransaction\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x10\n\x08receiver\x18\x03 \x01(\t\x12\x0e\n\x06\x61mount\x18\x04 \x01(\x02\x12\x11\n\ttimestamp\x18\x05 \x01(\x01\"Q\n\x10TransactionBatch\x12-\n\x0ctransactions\x18\x01 \x03(\x0b\x32\x17.blockchain.Transaction\x12\x0e\n\x06origin\x18\x02 \x01(\t\"*\n\x0bTxInventory\x12\x0b\n\x03ids\x18\x01 \x03(\t\x12\x0e\n\x06origin\x18\x02 \x01(\t\"\xc7\x01\n\x05\x42lock\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x15\n\rprevious_hash\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x01\x12-\n\x0ctransactions\x18\x04 \x03(\x0b\x32\x17.blockchain.Transaction\x12\r\n\x05nonce\x18\x05 \x01(\x05\x12\x0c\n\x04hash\x18\x06 \x01(\t\x12\x10\n\x08miner_id\x18\x07 \x01(\t\x12\x12\n\ndifficulty\x18\x08 \x01(\x05\x12\x13\n\x0bmerkle_root\x18\t \x01(\t\"7\n\x12MerkleProofRequest\x12\x12\n\nblock_hash\x18\x01 \x01(\t\x12\r\n\x05tx_id\x18\x02 \x01(\t\"0\n\x0fMerkleProofStep\x12\x0c\n\x04hash\x18\x01 \x01(\t\x12\x0f\n\x07is_left\x18\x02 \x01(\x08\"\x83\x01\n\x0bMerkleProof\x12\r\n\x05\x66ound\x18\x01 \x01(\x08\x12\x13\n\x0b\x62lock_index\x18\x02 \x01(\x05\x12\x0f\n\x07tx_hash\x18\x03 \x01(\t\x12\x13\n\x0bmerkle_root\x18\x04 \x01(\t\x12*\n\x05steps\x18\x05 \x03(\x0b\x32\x1b.blockchain.MerkleProofStep\"\x0c\n\nTipRequest\"6\n\x03Tip\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x0c\n\x04hash\x18\x02 \x01(\t\x12\x12\n\ntotal_work\x18\x03 \x01(\t\"(\n\nBlockRange\x12\r\n\x05start\x18\x01 \x01(\x05\x12\x0b\n\x03\x65nd\x18\x02 \x01(\x05\"\x8c\x01\n\x0b\x42lockHeader\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x15\n\rprevious_hash\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x01\x12\x13\n\x0bmerkle_root\x18\x04 \x01(\t\x12\r\n\x05nonce\x18\x05 \x01(\x05\x12\x0c\n\x04hash\x18\x06 \x01(\t\x12\x12\n\ndifficulty\x18\x07 \x01(\x05\"\xc2\x01\n\x0c\x43ompactBlock\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x15\n\rprevious_hash\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x01\x12\r\n\x05nonce\x18\x04 \x01(\x05\x12\x0c\n\x04hash\x18\x05 \x01(\t\x12\x10\n\x08miner_id\x18\x06 \x01(\t\x12\x12\n\ndifficulty\x18\x07 \x01(\x05\x12\x13\n\x0bmerkle_root\x18\x08 \x01(\t\x12\x11\n\tshort_ids\x18\t \x03(\x0c\x12\x0e\n\x06origin\x18\n \x01(\t\"?\n\x18\x42lockTransactionsRequest\x12\x12\n\nblock_hash\x18\x01 \x01(\t\x12\x0f\n\x07indexes\x18\x02 \x03(\x05\"!\n\x0e\x42\x61lanceRequest\x12\x0f\n\x07\x61\x63\x63ount\x18\x01 \x01(\t\"^\n\x07\x42\x61lance\x12\x0f\n\x07\x61\x63\x63ount\x18\x01 \x01(\t\x12\x0f\n\x07\x62\x61lance\x18\x02 \x01(\x01\x12\x0f\n\x07pending\x18\x03 \x01(\x01\x12\x0e\n\x06height\x18\x04 \x01(\x05\x12\x10\n\x08tip_hash\x18\x05 \x01(\t\"\x1e\n\x0cStatsRequest\x12\x0e\n\x06prefix\x18\x01 \x01(\t\"\x8c\x01\n\nStatSample\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x32\n\x06labels\x18\x02 \x03(\x0b\x32\".blockchain.StatSample.LabelsEntry\x12\r\n\x05value\x18\x03 \x01(\x01\x1a-\n\x0bLabelsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"0\n\x05Stats\x12\'\n\x07samples\x18\x01 \x03(\x0b\x32\x16.blockchain.StatSample\"\'\n\x03\x41\x63k\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"d\n\x08\x42\x61tchAck\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x03 \x01(\x05\x12\x12\n\nduplicates\x18\x04 \x01(\x05\x12\x10\n\x08rejected\x18\x05 \x01(\x05\x32\xa6\x08\n\x0e\x42lockchainNode\x12?\n\x11SubmitTransaction\x12\x17.blockchain.Transaction\x1a\x0f.blockchain.Ack\"\x00\x12\x36\n\x0e\x42roadcastBlock\x12\x11.blockchain.Block\x1a\x0f.blockchain.Ack\"\x00\x12\x44\n\x15\x42roadcastCompactBlock\x12\x18.blockchain.CompactBlock\x1a\x0f.blockchain.Ack\"\x00\x12\\\n\x14GetBlockTransactions\x12$.blockchain.BlockTransactionsRequest\x1a\x1c.blockchain.TransactionBatch\"\x00\x12\x42\n\x14\x42roadcastTransaction\x12\x17.blockchain.Transaction\x1a\x0f.blockchain.Ack\"\x00\x12G\n\x12SubmitTransactions\x12\x17.blockchain.Transaction\x1a\x14.blockchain.BatchAck\"\x00(\x01\x12N\n\x16SubmitTransactionBatch\x12\x1c.blockchain.TransactionBatch\x1a\x14.blockchain.BatchAck\"\x00\x12Q\n\x19\x42roadcastTransactionBatch\x12\x1c.blockchain.TransactionBatch\x1a\x14.blockchain.BatchAck\"\x00\x12J\n\x14\x41nnounceTransactions\x12\x17.blockchain.TxInventory\x1a\x17.blockchain.TxInventory\"\x00\x12\x33\n\x06GetTip\x12\x16.blockchain.TipRequest\x1a\x0f.blockchain.Tip\"\x00\x12\x41\n\nGetHeaders\x12\x16.blockchain.BlockRange\x1a\x17.blockchain.BlockHeader\"\x00\x30\x01\x12:\n\tGetBlocks\x12\x16.blockchain.BlockRange\x1a\x11.blockchain.Block\"\x00\x30\x01\x12K\n\x0eGetMerkleProof\x12\x1e.blockchain.MerkleProofRequest\x1a\x17.blockchain.MerkleProof\"\x00\x12?\n\nGetBalance\x12\x1a.blockchain.BalanceRequest\x1a\x13.blockchain.Balance\"\x00\x12\x39\n\x08GetStats\x12\x18.blockchain.StatsRequest\x1a\x11.blockchain.Stats\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'protos.blockchain_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_STATSAMPLE_LABELSENTRY']._loaded_options = None
+  _globals['_STATSAMPLE_LABELSENTRY']._serialized_options = b'8\001'
   _globals['_TRANSACTION']._serialized_start=39
   _globals['_TRANSACTION']._serialized_end=133
-  _globals['_BLOCK']._serialized_start=136
-  _globals['_BLOCK']._serialized_end=314
-  _globals['_ACK']._serialized_start=316
-  _globals['_ACK']._serialized_end=355
-  _globals['_BLOCKCHAINNODE']._serialized_start=358
-  _globals['_BLOCKCHAINNODE']._serialized_end=563
+  _globals['_TRANSACTIONBATCH']._serialized_start=135
+  _globals['_TRANSACTIONBATCH']._serialized_end=216
+  _globals['_TXINVENTORY']._serialized_start=218
+  _globals['_TXINVENTORY']._serialized_end=260
+  _globals['_BLOCK']._serialized_start=263
+  _globals['_BLOCK']._serialized_end=462
+  _globals['_MERKLEPROOFREQUEST']._serialized_start=464
+  _globals['_MERKLEPROOFREQUEST']._serialized_end=519
+  _globals['_MERKLEPROOFSTEP']._serialized_start=521
+  _globals['_MERKLEPROOFSTEP']._serialized_end=569
+  _globals['_MERKLEPROOF']._serialized_start=572
+  _globals['_MERKLEPROOF']._serialized_end=703
+  _globals['_TIPREQUEST']._serialized_start=705
+  _globals['_TIPREQUEST']._serialized_end=717
+  _globals['_TIP']._serialized_start=719
+  _globals['_TIP']._serialized_end=773
+  _globals['_BLOCKRANGE']._serialized_start=775
+  _globals['_BLOCKRANGE']._serialized_end=815
+  _globals['_BLOCKHEADER']._serialized_start=818
+  _globals['_BLOCKHEADER']._serialized_end=958
+  _globals['_COMPACTBLOCK']._serialized_start=961
+  _globals['_COMPACTBLOCK']._serialized_end=1155
+  _globals['_BLOCKTRANSACTIONSREQUEST']._serialized_start=1157
+  _globals['_BLOCKTRANSACTIONSREQUEST']._serialized_end=1220
+  _globals['_BALANCEREQUEST']._serialized_start=1222
+  _globals['_BALANCEREQUEST']._serialized_end=1255
+  _globals['_BALANCE']._serialized_start=1257
+  _globals['_BALANCE']._serialized_end=1351
+  _globals['_STATSREQUEST']._serialized_start=1353
+  _globals['_STATSREQUEST']._serialized_end=1383
+  _globals['_STATSAMPLE']._serialized_start=1386
+  _globals['_STATSAMPLE']._serialized_end=1526
+  _globals['_STATSAMPLE_LABELSENTRY']._serialized_start=1481
+  _globals['_STATSAMPLE_LABELSENTRY']._serialized_end=1526
+  _globals['_STATS']._serialized_start=1528
+  _globals['_STATS']._serialized_end=1576
+  _globals['_ACK']._serialized_start=1578
+  _globals['_ACK']._serialized_end=1617
+  _globals['_BATCHACK']._serialized_start=1619
+  _globals['_BATCHACK']._serialized_end=1719
+  _globals['_BLOCKCHAINNODE']._serialized_start=1722
+  _globals['_BLOCKCHAINNODE']._serialized_end=2784
 # @@protoc_insertion_point(module_scope)
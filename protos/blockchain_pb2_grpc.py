@@ -44,11 +44,71 @@ class BlockchainNodeStub(object):
                 request_serializer=protos_dot_blockchain__pb2.Block.SerializeToString,
                 response_deserializer=protos_dot_blockchain__pb2.Ack.FromString,
                 _registered_method=True)
+        self.BroadcastCompactBlock = channel.unary_unary(
+                '/blockchain.BlockchainNode/BroadcastCompactBlock',
+                request_serializer=protos_dot_blockchain__pb2.CompactBlock.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.Ack.FromString,
+                _registered_method=True)
+        self.GetBlockTransactions = channel.unary_unary(
+                '/blockchain.BlockchainNode/GetBlockTransactions',
+                request_serializer=protos_dot_blockchain__pb2.BlockTransactionsRequest.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.TransactionBatch.FromString,
+                _registered_method=True)
         self.BroadcastTransaction = channel.unary_unary(
                 '/blockchain.BlockchainNode/BroadcastTransaction',
                 request_serializer=protos_dot_blockchain__pb2.Transaction.SerializeToString,
                 response_deserializer=protos_dot_blockchain__pb2.Ack.FromString,
                 _registered_method=True)
+        self.SubmitTransactions = channel.stream_unary(
+                '/blockchain.BlockchainNode/SubmitTransactions',
+                request_serializer=protos_dot_blockchain__pb2.Transaction.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.BatchAck.FromString,
+                _registered_method=True)
+        self.SubmitTransactionBatch = channel.unary_unary(
+                '/blockchain.BlockchainNode/SubmitTransactionBatch',
+                request_serializer=protos_dot_blockchain__pb2.TransactionBatch.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.BatchAck.FromString,
+                _registered_method=True)
+        self.BroadcastTransactionBatch = channel.unary_unary(
+                '/blockchain.BlockchainNode/BroadcastTransactionBatch',
+                request_serializer=protos_dot_blockchain__pb2.TransactionBatch.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.BatchAck.FromString,
+                _registered_method=True)
+        self.AnnounceTransactions = channel.unary_unary(
+                '/blockchain.BlockchainNode/AnnounceTransactions',
+                request_serializer=protos_dot_blockchain__pb2.TxInventory.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.TxInventory.FromString,
+                _registered_method=True)
+        self.GetTip = channel.unary_unary(
+                '/blockchain.BlockchainNode/GetTip',
+                request_serializer=protos_dot_blockchain__pb2.TipRequest.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.Tip.FromString,
+                _registered_method=True)
+        self.GetHeaders = channel.unary_stream(
+                '/blockchain.BlockchainNode/GetHeaders',
+                request_serializer=protos_dot_blockchain__pb2.BlockRange.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.BlockHeader.FromString,
+                _registered_method=True)
+        self.GetBlocks = channel.unary_stream(
+                '/blockchain.BlockchainNode/GetBlocks',
+                request_serializer=protos_dot_blockchain__pb2.BlockRange.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.Block.FromString,
+                _registered_method=True)
+        self.GetMerkleProof = channel.unary_unary(
+                '/blockchain.BlockchainNode/GetMerkleProof',
+                request_serializer=protos_dot_blockchain__pb2.MerkleProofRequest.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.MerkleProof.FromString,
+                _registered_method=True)
+        self.GetBalance = channel.unary_unary(
+                '/blockchain.BlockchainNode/GetBalance',
+                request_serializer=protos_dot_blockchain__pb2.BalanceRequest.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.Balance.FromString,
+                _registered_method=True)
+        self.GetStats = channel.unary_unary(
+                '/blockchain.BlockchainNode/GetStats',
+                request_serializer=protos_dot_blockchain__pb2.StatsRequest.SerializeToString,
+                response_deserializer=protos_dot_blockchain__pb2.Stats.FromString,
+                _registered_method=True)
 
 
 class BlockchainNodeServicer(object):
@@ -68,6 +128,20 @@ class BlockchainNodeServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BroadcastCompactBlock(self, request, context):
+        """Node broadcasts a new block as its header plus short tx ids
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBlockTransactions(self, request, context):
+        """Node fetches the transactions of a block it could not rebuild from its mempool
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def BroadcastTransaction(self, request, context):
         """Node broadcasts a pending transaction to other nodes
         """
@@ -75,6 +149,74 @@ class BlockchainNodeServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SubmitTransactions(self, request_iterator, context):
+        """Client streams transactions; acknowledged once the stream ends
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SubmitTransactionBatch(self, request, context):
+        """Client submits many transactions in a single message
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BroadcastTransactionBatch(self, request, context):
+        """Node re-gossips a batch of pending transactions to other nodes
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AnnounceTransactions(self, request, context):
+        """Node announces tx ids it is about to relay; the reply lists the ones still wanted
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetTip(self, request, context):
+        """Chain sync: a peer's tip, then headers and full blocks for a height range (inclusive)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetHeaders(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBlocks(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetMerkleProof(self, request, context):
+        """Light client asks for a Merkle inclusion proof of a transaction in a block
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBalance(self, request, context):
+        """Confirmed balance of an account at the node's tip
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetStats(self, request, context):
+        """Node metrics (counters, gauges, histogram buckets), optionally filtered by name prefix
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_BlockchainNodeServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -88,11 +230,71 @@ def add_BlockchainNodeServicer_to_server(servicer, server):
                     request_deserializer=protos_dot_blockchain__pb2.Block.FromString,
                     response_serializer=protos_dot_blockchain__pb2.Ack.SerializeToString,
             ),
+            'BroadcastCompactBlock': grpc.unary_unary_rpc_method_handler(
+                    servicer.BroadcastCompactBlock,
+                    request_deserializer=protos_dot_blockchain__pb2.CompactBlock.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.Ack.SerializeToString,
+            ),
+            'GetBlockTransactions': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetBlockTransactions,
+                    request_deserializer=protos_dot_blockchain__pb2.BlockTransactionsRequest.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.TransactionBatch.SerializeToString,
+            ),
             'BroadcastTransaction': grpc.unary_unary_rpc_method_handler(
                     servicer.BroadcastTransaction,
                     request_deserializer=protos_dot_blockchain__pb2.Transaction.FromString,
                     response_serializer=protos_dot_blockchain__pb2.Ack.SerializeToString,
             ),
+            'SubmitTransactions': grpc.stream_unary_rpc_method_handler(
+                    servicer.SubmitTransactions,
+                    request_deserializer=protos_dot_blockchain__pb2.Transaction.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.BatchAck.SerializeToString,
+            ),
+            'SubmitTransactionBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.SubmitTransactionBatch,
+                    request_deserializer=protos_dot_blockchain__pb2.TransactionBatch.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.BatchAck.SerializeToString,
+            ),
+            'BroadcastTransactionBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.BroadcastTransactionBatch,
+                    request_deserializer=protos_dot_blockchain__pb2.TransactionBatch.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.BatchAck.SerializeToString,
+            ),
+            'AnnounceTransactions': grpc.unary_unary_rpc_method_handler(
+                    servicer.AnnounceTransactions,
+                    request_deserializer=protos_dot_blockchain__pb2.TxInventory.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.TxInventory.SerializeToString,
+            ),
+            'GetTip': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetTip,
+                    request_deserializer=protos_dot_blockchain__pb2.TipRequest.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.Tip.SerializeToString,
+            ),
+            'GetHeaders': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetHeaders,
+                    request_deserializer=protos_dot_blockchain__pb2.BlockRange.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.BlockHeader.SerializeToString,
+            ),
+            'GetBlocks': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetBlocks,
+                    request_deserializer=protos_dot_blockchain__pb2.BlockRange.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.Block.SerializeToString,
+            ),
+            'GetMerkleProof': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMerkleProof,
+                    request_deserializer=protos_dot_blockchain__pb2.MerkleProofRequest.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.MerkleProof.SerializeToString,
+            ),
+            'GetBalance': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetBalance,
+                    request_deserializer=protos_dot_blockchain__pb2.BalanceRequest.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.Balance.SerializeToString,
+            ),
+            'GetStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetStats,
+                    request_deserializer=protos_dot_blockchain__pb2.StatsRequest.FromString,
+                    response_serializer=protos_dot_blockchain__pb2.Stats.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'blockchain.BlockchainNode', rpc_method_handlers)
@@ -158,6 +360,60 @@ class BlockchainNode(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BroadcastCompactBlock(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/BroadcastCompactBlock',
+            protos_dot_blockchain__pb2.CompactBlock.SerializeToString,
+            protos_dot_blockchain__pb2.Ack.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetBlockTransactions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/GetBlockTransactions',
+            protos_dot_blockchain__pb2.BlockTransactionsRequest.SerializeToString,
+            protos_dot_blockchain__pb2.TransactionBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def BroadcastTransaction(request,
             target,
@@ -184,3 +440,273 @@ class BlockchainNode(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def SubmitTransactions(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/blockchain.BlockchainNode/SubmitTransactions',
+            protos_dot_blockchain__pb2.Transaction.SerializeToString,
+            protos_dot_blockchain__pb2.BatchAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SubmitTransactionBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/SubmitTransactionBatch',
+            protos_dot_blockchain__pb2.TransactionBatch.SerializeToString,
+            protos_dot_blockchain__pb2.BatchAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BroadcastTransactionBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/BroadcastTransactionBatch',
+            protos_dot_blockchain__pb2.TransactionBatch.SerializeToString,
+            protos_dot_blockchain__pb2.BatchAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AnnounceTransactions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/AnnounceTransactions',
+            protos_dot_blockchain__pb2.TxInventory.SerializeToString,
+            protos_dot_blockchain__pb2.TxInventory.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetTip(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/GetTip',
+            protos_dot_blockchain__pb2.TipRequest.SerializeToString,
+            protos_dot_blockchain__pb2.Tip.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetHeaders(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/blockchain.BlockchainNode/GetHeaders',
+            protos_dot_blockchain__pb2.BlockRange.SerializeToString,
+            protos_dot_blockchain__pb2.BlockHeader.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetBlocks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/blockchain.BlockchainNode/GetBlocks',
+            protos_dot_blockchain__pb2.BlockRange.SerializeToString,
+            protos_dot_blockchain__pb2.Block.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetMerkleProof(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/GetMerkleProof',
+            protos_dot_blockchain__pb2.MerkleProofRequest.SerializeToString,
+            protos_dot_blockchain__pb2.MerkleProof.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetBalance(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/GetBalance',
+            protos_dot_blockchain__pb2.BalanceRequest.SerializeToString,
+            protos_dot_blockchain__pb2.Balance.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/blockchain.BlockchainNode/GetStats',
+            protos_dot_blockchain__pb2.StatsRequest.SerializeToString,
+            protos_dot_blockchain__pb2.Stats.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from concurrent import futures
+
+import grpc
+import protos.blockchain_pb2_grpc as pb2_grpc
+
+# Lock-free reads, run on the event loop itself
+INLINE_METHODS = ('GetStats',)
+# Everything that takes the node lock, run on the state pool
+OFFLOADED_METHODS = (
+    'SubmitTransaction', 'BroadcastTransaction', 'SubmitTransactionBatch', 'BroadcastTransactionBatch',
+    'AnnounceTransactions', 'GetTip', 'GetBlockTransactions', 'GetMerkleProof', 'GetBalance',
+    'BroadcastBlock', 'BroadcastCompactBlock',
+)
+# Server-streaming reads, collected on the state pool
+STREAMING_METHODS = ('GetHeaders', 'GetBlocks')
+
+
+class AioNodeServicer(pb2_grpc.BlockchainNodeServicer):
+    """grpc.aio transport in front of the same threaded BlockchainNode.
+
+    Only the transport moves onto the event loop: calls are accepted and
+    answered there, so callers waiting on the node hold no thread and are
+    not capped by the pool size. Node state is not owned by the loop. The
+    handlers are the thread server's, run on the state pool behind the node
+    lock, and broadcasts, gossip, sync and block validation keep their own
+    threads, exactly as in thread mode.
+    """
+
+    def __init__(self, node, offload, stream_chunk_size=500):
+        self.node = node
+        self.offload = offload
+        self.stream_chunk_size = stream_chunk_size
+
+    async def SubmitTransactions(self, request_iterator, context):
+        # The stream is read on the loop; each full chunk is added on the state pool
+        loop = asyncio.get_running_loop()
+        intake = self.node.stream_intake(context, self.stream_chunk_size)
+        async for tx_proto in request_iterator:
+            if intake.add(tx_proto):
+                await loop.run_in_executor(self.offload, intake.flush)
+        return await loop.run_in_executor(self.offload, intake.ack)
+
+
+def _inline(name):
+    async def handler(self, request, context):
+        return getattr(self.node, name)(request, context)
+    return handler
+
+
+def _offloaded(name):
+    async def handler(self, request, context):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.offload, getattr(self.node, name), request, context)
+    return handler
+
+
+def _streaming(name):
+    async def handler(self, request, context):
+        loop = asyncio.get_running_loop()
+        responses = await loop.run_in_executor(
+            self.offload, lambda: list(getattr(self.node, name)(request, context)))
+        for response in responses:
+            yield response
+    return handler
+
+
+for _name in INLINE_METHODS:
+    setattr(AioNodeServicer, _name, _inline(_name))
+for _name in OFFLOADED_METHODS:
+    setattr(AioNodeServicer, _name, _offloaded(_name))
+for _name in STREAMING_METHODS:
+    setattr(AioNodeServicer, _name, _streaming(_name))
+
+
+def _build_template(node):
+    with node.lock:
+        return node.build_template()
+
+
+async def mine(node, executor, state):
+    """The mining loop as a coroutine, driven by futures from the two pools.
+
+    The nonce search runs on executor; building templates and committing a
+    found block take the node lock, so they run on the state pool. The
+    miner polls node.refresh_template() from its search thread, as in the
+    thread server.
+    """
+    loop = asyncio.get_running_loop()
+    logging.info(f"Mining started with {node.miner.workers} worker(s) (aio)...")
+    while not node.stop_event.is_set():
+        node.mining_event.clear()
+        template = await loop.run_in_executor(state, _build_template, node)
+        result = await loop.run_in_executor(executor, node.miner.search, template.mining_template(),
+                                            node.stop_event, node.refresh_template)
+        if result is not None:
+            await loop.run_in_executor(state, node.block_found, result)
+
+
+async def serve_aio(node, port, stream_chunk_size=500, state_workers=10):
+    offload = futures.ThreadPoolExecutor(max_workers=state_workers, thread_name_prefix="rpc-state")
+    search = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="mine")
+    server = grpc.aio.server()
+    pb2_grpc.add_BlockchainNodeServicer_to_server(AioNodeServicer(node, offload, stream_chunk_size), server)
+    server.add_insecure_port(f'[::]:{port}')
+    await server.start()
+
+    # Catch up with peers (e.g. after a restart), then keep checking their tips
+    node.sync.start()
+    mining = asyncio.ensure_future(mine(node, search, offload))
+    try:
+        await server.wait_for_termination()
+    finally:
+        node.stop_event.set()
+        node.mining_event.set()
+        # Let the current search and any block commit finish before the pools go away
+        await asyncio.shield(mining)
+        await server.stop(0)
+        offload.shutdown(wait=False)
+        search.shutdown(wait=False)
+        node.close()
@@ -0,0 +1,159 @@
+class MemoryChain:
+    """Active chain held entirely in memory, as a list plus a hash -> height map."""
+
+    def __init__(self):
+        self.blocks = []
+        self.heights = {}
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __getitem__(self, height):
+        return self.blocks[height]
+
+    def hash_at(self, height):
+        return self.blocks[height].hash
+
+    def height_of(self, hash_val):
+        return self.heights.get(hash_val)
+
+    def append(self, block):
+        self.heights[block.hash] = len(self.blocks)
+        self.blocks.append(block)
+
+    def truncate(self, height):
+        removed = self.blocks[height:]
+        del self.blocks[height:]
+        for block in removed:
+            del self.heights[block.hash]
+        return removed
+
+    def range(self, start, end):
+        return self.blocks[max(start, 0):max(end + 1, 0)]
+
+    def header_range(self, start, end):
+        return self.range(start, end)
+
+    def close(self):
+        pass
+
+
+class BlockIndex:
+    """Every known block keyed by hash, plus the active chain indexed by height.
+
+    Blocks on side branches stay in the index with their parent link and
+    cumulative chain work, so a competing block at an existing height is kept
+    instead of dropped. Lookups by hash (get) and by height (indexing the
+    active chain) are both O(1). reorg_to() switches the active chain to the
+    branch ending at a block by rolling back to the fork point and applying
+    the new branch. The active chain is a MemoryChain unless a store-backed
+    one is passed in.
+
+    Side blocks are only kept while they could still matter: prune() drops
+    those more than keep_depth below the tip, then the lightest branches
+    while more than max_side remain (0 turns a limit off). add() never
+    prunes, since a synced branch sits in the side index until it is
+    activated; callers prune once the block or branch has been handled.
+    """
+
+    def __init__(self, genesis, block_work, active=None, keep_depth=0, max_side=0):
+        self.block_work = block_work  # block -> work it adds to its branch
+        self.active = active if active is not None else MemoryChain()
+        self.side = {}  # hash -> block, for blocks off the active chain
+        self.keep_depth = keep_depth
+        self.max_side = max_side
+        if not len(self.active):
+            genesis.chain_work = 0
+            self.active.append(genesis)
+
+    # The active chain reads like the plain list it replaces
+    def __len__(self):
+        return len(self.active)
+
+    def __getitem__(self, height):
+        return self.active[height]
+
+    def __contains__(self, hash_val):
+        return hash_val in self.side or self.active.height_of(hash_val) is not None
+
+    @property
+    def tip(self):
+        return self.active[-1]
+
+    def get(self, hash_val):
+        block = self.side.get(hash_val)
+        if block is not None:
+            return block
+        height = self.active.height_of(hash_val)
+        return self.active[height] if height is not None else None
+
+    def hash_at(self, height):
+        return self.active.hash_at(height)
+
+    def range(self, start, end):
+        return self.active.range(start, end)
+
+    def header_range(self, start, end):
+        """Active-chain blocks or bare headers (a store-backed chain skips the bodies)."""
+        return self.active.header_range(start, end)
+
+    def is_active(self, block):
+        return block.index < len(self.active) and self.active.hash_at(block.index) == block.hash
+
+    def add(self, block):
+        """Indexes a block whose parent is known; returns False for an unknown parent."""
+        parent = self.get(block.previous_hash)
+        if parent is None or block.index != parent.index + 1:
+            return False
+        block.chain_work = parent.chain_work + self.block_work(block)
+        self.side[block.hash] = block
+        return True
+
+    def fork_path(self, block):
+        """(disconnected, connected) blocks, oldest first, that reorg_to(block) would swap."""
+        connected = []
+        cursor = block
+        while not self.is_active(cursor):
+            connected.append(cursor)
+            cursor = self.get(cursor.previous_hash)
+        connected.reverse()
+        return self.active.range(cursor.index + 1, len(self.active) - 1), connected
+
+    def reorg_to(self, block):
+        """Makes block the active tip; returns (disconnected, connected) blocks, oldest first."""
+        disconnected, connected = self.fork_path(block)
+        self.active.truncate(len(self.active) - len(disconnected))
+        for b in disconnected:
+            self.side[b.hash] = b
+        for b in connected:
+            self.side.pop(b.hash, None)
+            self.active.append(b)
+        return disconnected, connected
+
+    def discard(self, block):
+        """Drops an off-chain block and every side block built on it."""
+        dropped = {block.hash}
+        self.side.pop(block.hash, None)
+        for b in sorted(self.side.values(), key=lambda b: b.index):
+            if b.previous_hash in dropped:
+                dropped.add(b.hash)
+                del self.side[b.hash]
+        return len(dropped)
+
+    def prune(self):
+        """Drops stale side blocks and everything built on them; returns how many went."""
+        before = len(self.side)
+        if self.keep_depth and self.side:
+            cutoff = len(self.active) - 1 - self.keep_depth
+            dropped = set()
+            for b in sorted(self.side.values(), key=lambda b: b.index):
+                if b.index < cutoff or b.previous_hash in dropped:
+                    dropped.add(b.hash)
+                    del self.side[b.hash]
+        while self.max_side and len(self.side) > self.max_side:
+            # Descendants carry more work than their base, so this drops whole branches from the root
+            self.discard(min(self.side.values(), key=lambda b: b.chain_work))
+        return before - len(self.side)
+
+    def close(self):
+        self.active.close()
@@ -0,0 +1,343 @@
+import os
+import mmap
+import time
+import struct
+import logging
+from collections import OrderedDict
+
+# One fixed-size index record per active-chain height:
+# offset, length, difficulty, cumulative chain work, hash, previous hash
+RECORD = struct.Struct('>QIi16s32s32s')
+LENGTH = struct.Struct('>I')
+# Hash index: capacity, used slots, heights covered; then slots of hash suffix, height + 1 (0 = empty)
+HASH_HEADER = struct.Struct('>QQQ')
+HASH_SLOT = struct.Struct('>8sI')
+DURABILITY_LEVELS = ('none', 'batch', 'always')
+MAP_STEP = 1 << 20  # Unmapped bytes past a FileView's map before it is remapped
+
+
+class HashIndex:
+    """On-disk open-addressing table from block hash to active-chain height.
+
+    Keyed by the last 8 bytes of the hash, since PoW hashes start with zero
+    bytes. Entries are only candidates: heights removed by a truncate are
+    left in place and two hashes may share a key, so callers check the
+    candidate against the hash stored for that height. When the table gets
+    half full it is rebuilt at twice the size from the store's hashes, which
+    also drops stale entries. Heights appended after the last flush are
+    re-added on open.
+    """
+
+    def __init__(self, path, store, capacity=1 << 16):
+        self.store = store
+        self.file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        self.map = None
+        size = os.fstat(self.file.fileno()).st_size
+        if size >= HASH_HEADER.size:
+            self.capacity, self.used, self.covered = HASH_HEADER.unpack(self.file.read(HASH_HEADER.size))
+        if size < HASH_HEADER.size or size != HASH_HEADER.size + self.capacity * HASH_SLOT.size:
+            self._rebuild(capacity, len(store))
+            return
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        # Catch up with heights appended after the last flush
+        self.covered = min(self.covered, len(store))
+        for height, hash_val in enumerate(store.hashes(len(store), self.covered), self.covered):
+            self.add(hash_val, height)
+
+    def _rebuild(self, capacity, count):
+        while capacity < count * 4:
+            capacity *= 2  # Room to grow before the next rebuild
+        if self.map is not None:
+            self.map.close()
+        self.file.truncate(0)
+        self.file.truncate(HASH_HEADER.size + capacity * HASH_SLOT.size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.capacity, self.used, self.covered = capacity, 0, count
+        for height, hash_val in enumerate(self.store.hashes(count)):
+            self._put(hash_val, height)
+        self._write_header()
+
+    def _write_header(self):
+        HASH_HEADER.pack_into(self.map, 0, self.capacity, self.used, self.covered)
+
+    def _slots(self, key):
+        slot = int.from_bytes(key, 'big') % self.capacity
+        while True:
+            offset = HASH_HEADER.size + slot * HASH_SLOT.size
+            stored_key, stored = HASH_SLOT.unpack_from(self.map, offset)
+            yield offset, stored_key, stored
+            slot = (slot + 1) % self.capacity
+
+    def _put(self, hash_val, height):
+        key = hash_val[-8:]
+        for offset, stored_key, stored in self._slots(key):
+            if not stored:
+                HASH_SLOT.pack_into(self.map, offset, key, height + 1)
+                self.used += 1
+                return
+            if stored_key == key and stored == height + 1:
+                return
+
+    def add(self, hash_val, height):
+        """Indexes the block just appended at height."""
+        if (self.used + 1) * 2 > self.capacity:
+            self._rebuild(self.capacity * 2, height + 1)
+            return
+        self._put(hash_val, height)
+        self.covered = height + 1
+        self._write_header()
+
+    def truncate(self, height):
+        self.covered = min(self.covered, height)
+        self._write_header()
+
+    def candidates(self, hash_val):
+        """Heights that may hold hash_val."""
+        key = hash_val[-8:]
+        for _, stored_key, stored in self._slots(key):
+            if not stored:
+                return
+            if stored_key == key:
+                yield stored - 1
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+
+class FileView:
+    """Reads from a file that keeps growing: a memory map of its head, pread past it.
+
+    The map is only redone once the unmapped tail reaches MAP_STEP bytes or
+    half the mapped size, so a read right after each append does not remap.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.map = None
+
+    def read(self, start, size, file_size):
+        """size bytes at start, of the file_size bytes written so far."""
+        mapped = len(self.map) if self.map is not None else 0
+        end = start + size
+        if end > mapped and file_size - mapped >= max(MAP_STEP, mapped // 2):
+            self.reset()
+            self.file.flush()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            mapped = len(self.map)
+        if end <= mapped:
+            return self.map[start:end]
+        self.file.flush()
+        return os.pread(self.file.fileno(), size, start)
+
+    def reset(self):
+        # Before a truncate: the map must not outlive the bytes it covers
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class BlockStore:
+    """Append-only segment of length-prefixed serialized blocks plus an offset index.
+
+    blocks.dat only ever grows; blocks.idx holds one RECORD per height of the
+    active chain and is truncated on reorgs; blocks.hix maps hashes back to
+    heights. Reads go through FileViews of the files. Durability decides
+    when appends are fsynced: 'none' leaves it to the OS, 'batch' syncs
+    every fsync_every blocks or fsync_interval seconds, 'always' syncs every
+    block.
+    """
+
+    def __init__(self, path, durability='batch', fsync_every=100, fsync_interval=1.0):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability {durability!r}, expected one of {DURABILITY_LEVELS}")
+        os.makedirs(path, exist_ok=True)
+        self.durability = durability
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.dat = open(os.path.join(path, 'blocks.dat'), 'a+b')
+        idx_path = os.path.join(path, 'blocks.idx')
+        self.idx = open(idx_path, 'r+b' if os.path.exists(idx_path) else 'w+b')
+        self.dat_size = os.fstat(self.dat.fileno()).st_size
+        self.count = 0
+        self.dat_view = FileView(self.dat)
+        self.idx_view = FileView(self.idx)
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self._recover()
+        self.hash_index = HashIndex(os.path.join(path, 'blocks.hix'), self)
+
+    def _recover(self):
+        # Drop a torn trailing record, and records whose body never reached blocks.dat
+        idx_size = os.fstat(self.idx.fileno()).st_size
+        count = idx_size // RECORD.size
+        while count:
+            self.idx.seek((count - 1) * RECORD.size)
+            offset, length = RECORD.unpack(self.idx.read(RECORD.size))[:2]
+            if offset + LENGTH.size + length <= self.dat_size:
+                break
+            count -= 1
+        if count * RECORD.size != idx_size:
+            logging.warning(f"Block index truncated to {count} records after an unclean shutdown")
+            self.idx.truncate(count * RECORD.size)
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def _index(self, height):
+        return RECORD.unpack(self.idx_view.read(height * RECORD.size, RECORD.size, self.count * RECORD.size))
+
+    def record(self, height):
+        """(offset, length, difficulty, chain_work, hash, previous_hash)."""
+        offset, length, difficulty, work, hash_val, prev = self._index(height)
+        return offset, length, difficulty, int.from_bytes(work, 'big'), hash_val, prev
+
+    def hash_at(self, height):
+        return self.idx_view.read(height * RECORD.size + 32, 32, self.count * RECORD.size)
+
+    def height_of(self, hash_val):
+        for height in self.hash_index.candidates(hash_val):
+            if height < self.count and self.hash_at(height) == hash_val:
+                return height
+        return None
+
+    def read(self, height):
+        offset, length = self._index(height)[:2]
+        return self.dat_view.read(offset + LENGTH.size, length, self.dat_size)
+
+    def read_prefix(self, height, size):
+        """The first size bytes of the payload at height, e.g. a block header."""
+        offset, length = self._index(height)[:2]
+        return self.dat_view.read(offset + LENGTH.size, min(size, length), self.dat_size)
+
+    def append(self, payload, difficulty, chain_work, hash_val, previous_hash):
+        offset = self.dat_size
+        self.dat.write(LENGTH.pack(len(payload)) + payload)
+        self.dat_size += LENGTH.size + len(payload)
+        # Body first, then the record pointing at it
+        self.dat.flush()
+        self.idx.seek(self.count * RECORD.size)
+        self.idx.write(RECORD.pack(offset, len(payload), difficulty, chain_work.to_bytes(16, 'big'),
+                                   hash_val, previous_hash))
+        self.idx.flush()
+        self.count += 1
+        self.hash_index.add(hash_val, self.count - 1)
+        self.unsynced += 1
+        if self.durability == 'always' or (
+                self.durability == 'batch' and (self.unsynced >= self.fsync_every or
+                                                time.monotonic() - self.last_sync >= self.fsync_interval)):
+            self.sync()
+
+    def truncate(self, height):
+        self.idx_view.reset()
+        self.idx.truncate(height * RECORD.size)
+        self.count = height
+        self.hash_index.truncate(height)
+
+    def hashes(self, count, start=0):
+        """Hashes of records start..count-1, read in chunks without the shared map."""
+        with open(self.idx.name, 'rb') as f:
+            f.seek(start * RECORD.size)
+            for first in range(start, count, 4096):
+                data = f.read((min(first + 4096, count) - first) * RECORD.size)
+                for i in range(0, len(data), RECORD.size):
+                    yield data[i + 32:i + 64]
+
+    def sync(self):
+        os.fsync(self.dat.fileno())
+        os.fsync(self.idx.fileno())
+        self.hash_index.flush()
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        self.dat.flush()
+        self.idx.flush()
+        if self.durability != 'none':
+            self.sync()
+        self.dat_view.reset()
+        self.idx_view.reset()
+        self.hash_index.close()
+        self.dat.close()
+        self.idx.close()
+
+
+class StoredChain:
+    """Active chain kept in a BlockStore with only a bounded body cache in memory.
+
+    Height lookups read the index record directly and hash lookups go
+    through the store's on-disk hash index, so memory does not grow with the
+    chain and opening a long chain only touches the tip. decode turns a
+    stored payload back into a block, and encode does the opposite.
+    decode_header(prefix, hash) builds a header from the first header_size
+    bytes of a payload, so header reads skip the block bodies.
+    """
+
+    def __init__(self, store, encode, decode, cache_size=1000, decode_header=None, header_size=0):
+        self.store = store
+        self.encode = encode
+        self.decode = decode
+        self.decode_header = decode_header
+        self.header_size = header_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # hash -> block, most recently used last
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, height):
+        if height < 0:
+            height += len(self.store)
+        if not 0 <= height < len(self.store):
+            raise IndexError(height)
+        hash_val = self.store.hash_at(height)
+        block = self.cache.get(hash_val)
+        if block is None:
+            block = self.decode(self.store.read(height))
+            block.chain_work = self.store.record(height)[3]
+            self._cache(block)
+        else:
+            self.cache.move_to_end(hash_val)
+        return block
+
+    def _cache(self, block):
+        self.cache[block.hash] = block
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def hash_at(self, height):
+        return self.store.hash_at(height)
+
+    def height_of(self, hash_val):
+        return self.store.height_of(hash_val)
+
+    def append(self, block):
+        self.store.append(self.encode(block), block.difficulty, block.chain_work, block.hash, block.previous_hash)
+        self._cache(block)
+
+    def truncate(self, height):
+        removed = [self[h] for h in range(height, len(self.store))]
+        self.store.truncate(height)
+        return removed
+
+    def range(self, start, end):
+        return [self[h] for h in range(max(start, 0), min(end + 1, len(self.store)))]
+
+    def header_range(self, start, end):
+        if self.decode_header is None:
+            return self.range(start, end)
+        headers = []
+        for height in range(max(start, 0), min(end + 1, len(self.store))):
+            hash_val = self.store.hash_at(height)
+            block = self.cache.get(hash_val)
+            headers.append(block if block is not None else
+                           self.decode_header(self.store.read_prefix(height, self.header_size), hash_val))
+        return headers
+
+    def close(self):
+        self.store.close()
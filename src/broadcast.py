@@ -0,0 +1,115 @@
+import logging
+from collections import deque
+
+from src.metrics import REGISTRY
+
+ERRORS = REGISTRY.counter('broadcast_errors_total', 'Queued messages whose send raised instead of failing cleanly')
+
+
+class PeerQueue:
+    """Bounded outbound queue for one peer, blocks ahead of transactions.
+
+    A full transaction lane drops the incoming message; a full block lane
+    drops its oldest block, since a newer block supersedes it for relay.
+    """
+
+    def __init__(self, peer, size, clock):
+        self.peer = peer
+        self.size = size
+        self.blocks = deque()
+        self.txs = deque()
+        self.cond = clock.condition()
+        self.closed = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.skipped = 0
+
+    def put(self, method, request, priority):
+        with self.cond:
+            lane = self.blocks if priority else self.txs
+            if len(lane) >= self.size:
+                self.dropped += 1
+                if not priority:
+                    return False
+                lane.popleft()
+            lane.append((method, request))
+            self.enqueued += 1
+            self.cond.notify()
+            return True
+
+    def get(self):
+        with self.cond:
+            while not (self.blocks or self.txs or self.closed):
+                self.cond.wait()
+            if self.closed:
+                return None
+            return (self.blocks or self.txs).popleft()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {
+                'address': self.peer.address, 'queued_blocks': len(self.blocks),
+                'queued_txs': len(self.txs), 'enqueued': self.enqueued,
+                'dropped': self.dropped, 'skipped': self.skipped,
+            }
+
+
+class Broadcaster:
+    """Fans messages out to every peer in parallel through per-peer queues.
+
+    Each peer has one sender thread draining its own queue over the shared
+    PeerPool channel, so a slow peer only delays itself and the thread count
+    is fixed at one per peer whatever the submission rate. Messages for a
+    peer in backoff are skipped at enqueue time and counted. Threads and
+    queue waits come from the pool's clock.
+    """
+
+    def __init__(self, peer_pool, queue_size=1000):
+        self.peer_pool = peer_pool
+        clock = peer_pool.clock
+        self.queues = [PeerQueue(p, queue_size, clock) for p in peer_pool]
+        self.threads = [clock.thread(self._run, q, name=f"broadcast-{q.peer.address}") for q in self.queues]
+
+    def publish(self, method, request, priority=False):
+        available = set(self.peer_pool.available())
+        for q in self.queues:
+            if q.peer not in available:
+                with q.cond:
+                    q.skipped += 1
+                continue
+            q.put(method, request, priority)
+
+    def publish_task(self, task, priority=False):
+        # task(peer) runs on each peer's sender thread, for exchanges that
+        # need more than one call or a request built per peer
+        self.publish(task, None, priority)
+
+    def _run(self, queue):
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            method, request = item
+            try:
+                if callable(method):
+                    method(queue.peer)
+                else:
+                    self.peer_pool.call(queue.peer, method, request)
+            except Exception as e:
+                # Never let one bad message kill the peer's sender thread
+                ERRORS.inc()
+                logging.error(f"Broadcast to {queue.peer.address} failed: {e}")
+
+    def stats(self):
+        return [q.stats() for q in self.queues]
+
+    def close(self):
+        for q in self.queues:
+            q.close()
+        for t in self.threads:
+            t.join(timeout=1.0)
@@ -11,31 +11,61 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import protos.blockchain_pb2 as pb2
 import protos.blockchain_pb2_grpc as pb2_grpc
 
+def make_tx():
+    return pb2.Transaction(
+        id=str(uuid.uuid4()),
+        sender=f"Client",
+        receiver=f"Recipient_{random.randint(1,100)}",
+        amount=random.uniform(1, 100),
+        timestamp=time.time()
+    )
+
+def send_unary(stub, num_tx):
+    for i in range(num_tx):
+        try:
+            response = stub.SubmitTransaction(make_tx())
+            print(f"Sent Tx {i+1}/{num_tx}: {response.message}")
+        except grpc.RpcError as e:
+            print(f"RPC failed: {e}")
+        
+        time.sleep(0.1) # Throttle slightly
+
+def send_batches(stub, num_tx, batch_size):
+    sent = 0
+    while sent < num_tx:
+        count = min(batch_size, num_tx - sent)
+        batch = pb2.TransactionBatch(transactions=[make_tx() for _ in range(count)])
+        try:
+            response = stub.SubmitTransactionBatch(batch)
+            print(f"Sent batch {sent+1}-{sent+count}/{num_tx}: {response.accepted} accepted, {response.rejected} rejected")
+        except grpc.RpcError as e:
+            print(f"RPC failed: {e}")
+        sent += count
+
+def send_stream(stub, num_tx):
+    try:
+        response = stub.SubmitTransactions(make_tx() for _ in range(num_tx))
+        print(f"Streamed {num_tx} Tx: {response.accepted} accepted, {response.duplicates} duplicates, {response.rejected} rejected")
+    except grpc.RpcError as e:
+        print(f"RPC failed: {e}")
+
 def run():
     target_node = os.environ.get('TARGET_NODE', 'localhost:50051')
     num_tx = int(os.environ.get('NUM_TX', '10'))
+    mode = os.environ.get('CLIENT_MODE', 'unary')  # unary | batch | stream
+    batch_size = int(os.environ.get('BATCH_SIZE', '100'))
     
-    print(f"Client connecting to {target_node}, sending {num_tx} transactions...")
+    print(f"Client connecting to {target_node}, sending {num_tx} transactions ({mode})...")
     
     with grpc.insecure_channel(target_node) as channel:
         stub = pb2_grpc.BlockchainNodeStub(channel)
         
-        for i in range(num_tx):
-            tx_id = str(uuid.uuid4())
-            tx = pb2.Transaction(
-                id=tx_id,
-                sender=f"Client",
-                receiver=f"Recipient_{random.randint(1,100)}",
-                amount=random.uniform(1, 100),
-                timestamp=time.time()
-            )
-            try:
-                response = stub.SubmitTransaction(tx)
-                print(f"Sent Tx {i+1}/{num_tx}: {response.message}")
-            except grpc.RpcError as e:
-                print(f"RPC failed: {e}")
-            
-            time.sleep(0.1) # Throttle slightly
+        if mode == 'batch':
+            send_batches(stub, num_tx, batch_size)
+        elif mode == 'stream':
+            send_stream(stub, num_tx)
+        else:
+            send_unary(stub, num_tx)
 
 if __name__ == '__main__':
     run()
@@ -0,0 +1,38 @@
+import time
+import threading
+from concurrent import futures
+
+
+class Clock:
+    """Time, background threads and waits for a node, backed by the OS.
+
+    Node components take these from a clock instead of calling the time and
+    threading modules, so src.simnet.SimClock can run a whole network on
+    one simulated timeline.
+    """
+
+    def now(self):
+        """Seconds on a monotonic clock, for timers and deadlines."""
+        return time.monotonic()
+
+    def time(self):
+        """Wall clock seconds since the epoch, for timestamps."""
+        return time.time()
+
+    def thread(self, target, *args, name=None):
+        """Starts target(*args) on a daemon thread and returns the thread."""
+        t = threading.Thread(target=target, args=args, daemon=True, name=name)
+        t.start()
+        return t
+
+    def event(self):
+        return threading.Event()
+
+    def condition(self):
+        return threading.Condition()
+
+    def executor(self, workers, name):
+        return futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+
+SYSTEM_CLOCK = Clock()
@@ -0,0 +1,73 @@
+MAX_BITS = 0x207fffff  # Easiest target the compact form can hold in a positive int32
+RETARGET_CLAMP = 4  # A window may at most quarter or quadruple the target
+
+
+def bits_to_target(bits):
+    """Expands compact bits (8-bit byte length, 23-bit mantissa) to the full 256-bit target."""
+    size, mantissa = bits >> 24, bits & 0x7fffff
+    if bits & 0x800000 or size > 32:
+        raise ValueError(f"Invalid compact target {bits:#x}")
+    if size <= 3:
+        return mantissa >> 8 * (3 - size)
+    return mantissa << 8 * (size - 3)
+
+
+def target_to_bits(target):
+    """Compact form of a target, rounded down to its top 23 bits."""
+    size = (target.bit_length() + 7) // 8
+    if size <= 3:
+        mantissa = target << 8 * (3 - size)
+    else:
+        mantissa = target >> 8 * (size - 3)
+    if mantissa & 0x800000:
+        # The top bit would read as a sign, shift it into the next byte
+        mantissa >>= 8
+        size += 1
+    return size << 24 | mantissa
+
+
+MAX_TARGET = bits_to_target(MAX_BITS)
+
+
+def leading_zeros_bits(zeros):
+    """Compact target equivalent to zeros leading hex zeros, the old DIFFICULTY meaning."""
+    return target_to_bits((1 << (256 - 4 * zeros)) - 1)
+
+
+def valid_bits(bits):
+    try:
+        target = bits_to_target(bits)
+    except ValueError:
+        return False
+    return 0 < target <= MAX_TARGET
+
+
+def meets_target(hash_val, bits):
+    # The hash read as a big-endian integer must not exceed the target
+    return int.from_bytes(hash_val, 'big') <= bits_to_target(bits)
+
+
+def block_work(bits):
+    # Expected number of hashes to find a block at this target
+    return (1 << 256) // (bits_to_target(bits) + 1)
+
+
+def next_bits(parent, ancestor_at, window, interval):
+    """Compact target required of the block that follows parent.
+
+    The target changes only at heights divisible by window. It then scales by
+    how long the last window of blocks took compared to window * interval
+    seconds, clamped to RETARGET_CLAMP either way. ancestor_at(height) returns
+    the block (or header) at that height on parent's branch. Every input comes
+    from block headers, so all nodes agree on the result. The genesis
+    timestamp is local to each node and is never used.
+    """
+    height = parent.index + 1
+    if not window or height % window or height <= window:
+        return parent.difficulty
+    first = ancestor_at(height - window)
+    expected_ms = (parent.index - first.index) * round(interval * 1000)
+    actual_ms = round((parent.timestamp - first.timestamp) * 1000)
+    actual_ms = min(max(actual_ms, expected_ms // RETARGET_CLAMP), expected_ms * RETARGET_CLAMP)
+    target = bits_to_target(parent.difficulty) * actual_ms // expected_ms
+    return target_to_bits(min(max(target, 1), MAX_TARGET))
@@ -0,0 +1,107 @@
+import json
+import time
+import logging
+import threading
+from collections import deque
+
+# Details column of the legacy simulation_data.csv, rebuilt from each event's typed fields
+LEGACY_DETAILS = {
+    "Node Started": "Node {node} started on port {port} at block {height}",
+    "Block Received": "Block {block} Hash {hash:.8} Relay {relay} Missing {missing} Bytes {bytes}",
+    "Transaction Received": "Tx {tx} from {sender}",
+    "Chain Reorg": "Fork {fork} Disconnected {disconnected} Connected {connected} Tip {tip} Hash {hash:.8}",
+    "Chain Synced": "Fork {fork} Blocks {blocks} Tip {tip} Hash {hash:.8}",
+    "Block Mined": "Block {block} Hash {hash:.8}",
+}
+
+
+def legacy_details(record):
+    template = LEGACY_DETAILS.get(record['event'])
+    if template is None:
+        return ""
+    try:
+        return template.format(**record)
+    except (KeyError, ValueError):
+        return ""
+
+
+class EventLogger:
+    """Structured per-node event log written by a background thread.
+
+    log() only appends a tuple to an in-memory deque (atomic under the GIL,
+    no lock taken), so it is cheap enough to call with the chain lock held.
+    The writer thread drains the deque every flush_interval seconds, or as
+    soon as batch_size events are waiting, and writes each batch as JSON
+    lines with a single write. Every record carries the wall clock and the
+    monotonic clock (nanoseconds) at the moment it was logged, plus typed
+    fields instead of a free-text details string. When queue_size events are
+    already waiting, new ones are dropped and counted.
+    """
+
+    def __init__(self, path, node_id, queue_size=100000, batch_size=1000, flush_interval=0.2):
+        self.path = path
+        self.node_id = node_id
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = deque()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.logged = 0
+        self.dropped = 0
+        self.file = None
+        if path:
+            try:
+                self.file = open(path, 'a', buffering=1 << 16)
+            except OSError as e:
+                logging.error(f"Event log disabled, cannot open {path}: {e}")
+        self.thread = threading.Thread(target=self._run, daemon=True, name="event-log")
+        self.thread.start()
+
+    def log(self, event, **fields):
+        if self.file is None:
+            return
+        if len(self.pending) >= self.queue_size:
+            self.dropped += 1
+            return
+        self.pending.append((time.time(), time.monotonic_ns(), event, fields))
+        if len(self.pending) == self.batch_size:
+            self.wakeup.set()
+
+    def _run(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        if self.file is None:
+            return
+        try:
+            while self.pending:
+                lines = []
+                while self.pending and len(lines) < self.batch_size:
+                    wall, mono_ns, event, fields = self.pending.popleft()
+                    record = {'time': wall, 'mono_ns': mono_ns, 'node': self.node_id, 'event': event}
+                    record.update(fields)
+                    lines.append(json.dumps(record, separators=(',', ':')))
+                lines.append('')
+                self.file.write('\n'.join(lines))
+                self.logged += len(lines) - 1
+            self.file.flush()
+        except OSError as e:
+            logging.error(f"Failed to write event log: {e}")
+
+    def stats(self):
+        return {'path': self.path, 'queued': len(self.pending), 'logged': self.logged, 'dropped': self.dropped}
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+        self.thread.join()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.dropped:
+            logging.warning(f"Event log dropped {self.dropped} events")
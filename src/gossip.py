@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+import protos.blockchain_pb2 as pb2
+
+
+class SeenFilter:
+    """Bounded set of recently seen tx ids; the oldest ids fall out first."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ids = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __contains__(self, tx_id):
+        with self.lock:
+            return tx_id in self.ids
+
+    def add_many(self, tx_ids):
+        with self.lock:
+            for tx_id in tx_ids:
+                self.ids[tx_id] = None
+                self.ids.move_to_end(tx_id)
+            while len(self.ids) > self.capacity:
+                self.ids.popitem(last=False)
+
+    def missing(self, tx_ids):
+        with self.lock:
+            return [t for t in tx_ids if t not in self.ids]
+
+
+class TxGossip:
+    """Coalesces outgoing transactions and relays them to peers in batches.
+
+    Transactions wait in a buffer until batch_size of them are queued or the
+    oldest has waited max_delay seconds, so the extra relay latency is bounded
+    by max_delay. Each flush is relayed per peer as an inventory announcement
+    followed by one TransactionBatch holding only the ids the peer asked for.
+    Ids a peer announced to us, or that we already relayed to it, are
+    remembered per peer and never offered to it again. metadata(), if given,
+    returns the call metadata for each relayed batch (e.g. trace context).
+    max_delay is measured on the peer pool's clock.
+    """
+
+    def __init__(self, broadcaster, origin, batch_size=100, max_delay=0.05, known_capacity=100000,
+                 metadata=None):
+        self.broadcaster = broadcaster
+        self.metadata = metadata or (lambda: None)
+        self.peer_pool = broadcaster.peer_pool
+        self.clock = self.peer_pool.clock
+        self.origin = origin
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.known = {p.address: SeenFilter(known_capacity) for p in self.peer_pool}
+        self.buffer = []
+        self.first_at = 0.0
+        self.cond = self.clock.condition()
+        self.closed = False
+        self.stats = {'batches': 0, 'txs': 0, 'sent': 0, 'suppressed': 0, 'rpcs': 0}
+        self.stats_lock = threading.Lock()
+        self.thread = self.clock.thread(self._run, name="tx-gossip")
+
+    def add(self, tx_protos):
+        with self.cond:
+            if not self.buffer:
+                self.first_at = self.clock.now()
+            self.buffer.extend(tx_protos)
+            if len(self.buffer) >= self.batch_size or len(self.buffer) == len(tx_protos):
+                self.cond.notify()
+
+    def peer_knows(self, address, tx_ids):
+        # The peer at address already has these, don't offer them back to it
+        known = self.known.get(address)
+        if known is not None:
+            known.add_many(tx_ids)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.buffer and not self.closed:
+                    self.cond.wait()
+                deadline = self.first_at + self.max_delay
+                while len(self.buffer) < self.batch_size and not self.closed:
+                    remaining = deadline - self.clock.now()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                if self.closed:
+                    return
+                pending, self.buffer = self.buffer, []
+            for i in range(0, len(pending), self.batch_size):
+                self._flush(pending[i:i + self.batch_size])
+
+    def _count(self, **deltas):
+        with self.stats_lock:
+            for key, delta in deltas.items():
+                self.stats[key] += delta
+
+    def _flush(self, txs):
+        self._count(batches=1, txs=len(txs))
+        self.broadcaster.publish_task(lambda peer: self._relay(peer, txs))
+
+    def _relay(self, peer, txs):
+        # Runs on the peer's sender thread
+        known = self.known[peer.address]
+        fresh_ids = known.missing([t.id for t in txs])
+        if not fresh_ids:
+            self._count(suppressed=len(txs))
+            return
+        inventory = pb2.TxInventory(ids=fresh_ids, origin=self.origin)
+        self._count(rpcs=1)
+        wanted = self.peer_pool.call(peer, 'AnnounceTransactions', inventory)
+        if wanted is None:
+            return
+        known.add_many(fresh_ids)
+        wanted_ids = set(wanted.ids)
+        batch = [t for t in txs if t.id in wanted_ids]
+        self._count(suppressed=len(txs) - len(batch))
+        if batch:
+            self._count(rpcs=1, sent=len(batch))
+            self.peer_pool.call(peer, 'BroadcastTransactionBatch',
+                                pb2.TransactionBatch(transactions=batch, origin=self.origin),
+                                metadata=self.metadata())
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout=1.0)
@@ -0,0 +1,243 @@
+import sys
+import os
+import csv
+import time
+import uuid
+import random
+import asyncio
+import bisect
+from collections import Counter
+
+import grpc
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import protos.blockchain_pb2 as pb2
+import protos.blockchain_pb2_grpc as pb2_grpc
+from src.tracing import client_metadata
+
+# Bucket upper bounds (ms) of the printed latency histograms; the last row is everything above
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]
+RESCAN_DEPTH = 6  # Recent blocks fetched again on each poll, to catch ones swapped in by a reorg
+
+
+def parse_stages(spec):
+    """"50:10,100:10" -> [(50.0 tx/s, 10.0 s), (100.0, 10.0)]."""
+    stages = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        rate, _, duration = item.partition(':')
+        stages.append((float(rate), float(duration)))
+    return stages
+
+
+def arrivals(stages, process, rng):
+    """Scheduled send times (seconds from start) of an open-loop arrival process.
+
+    'constant' spaces arrivals 1/rate apart; 'poisson' draws exponential gaps
+    with mean 1/rate. Each stage runs for its duration at its own rate.
+    """
+    stage_start = 0.0
+    for rate, duration in stages:
+        stage_end = stage_start + duration
+        at = stage_start
+        while rate > 0:
+            at += rng.expovariate(rate) if process == 'poisson' else 1.0 / rate
+            if at >= stage_end:
+                break
+            yield at
+        stage_start = stage_end
+
+
+class TxRecord:
+    __slots__ = ('id', 'target', 'scheduled', 'sent', 'acked', 'ok', 'confirmed', 'block')
+
+    def __init__(self, tx_id, target, scheduled):
+        self.id = tx_id
+        self.target = target
+        self.scheduled = scheduled  # Wall time the arrival process asked for
+        self.sent = None
+        self.acked = None
+        self.ok = False
+        self.confirmed = None
+        self.block = None
+
+
+class LoadGenerator:
+    """Open-loop transaction load over grpc.aio, spread round-robin across targets.
+
+    Arrivals follow the schedule whatever the nodes' response times. At most
+    max_in_flight submissions are outstanding; an arrival with no free slot
+    is counted as dropped instead of being held back, so the generator never
+    waits on the system under test. Latency is measured from each arrival's
+    scheduled time, so a generator running behind shows up as latency too. A
+    watcher follows the first target's chain and stamps each transaction
+    with the time its block was first seen.
+    """
+
+    def __init__(self, targets, stages, process='poisson', max_in_flight=1000, timeout=10.0,
+                 confirm_poll=0.2, seed=None):
+        self.targets = targets
+        self.stages = stages
+        self.process = process
+        self.timeout = timeout
+        self.confirm_poll = confirm_poll
+        self.rng = random.Random(seed)
+        self.max_in_flight = max_in_flight
+        self.records = {}
+        self.errors = 0
+        self.dropped = 0  # Arrivals that found max_in_flight submissions outstanding
+        self.rejections = Counter()  # Node's rejection message -> count
+
+    def make_tx(self):
+        return pb2.Transaction(
+            id=str(uuid.UUID(int=self.rng.getrandbits(128), version=4)),
+            sender="Client",
+            receiver=f"Recipient_{self.rng.randint(1, 100)}",
+            amount=self.rng.uniform(1, 100),
+            timestamp=time.time()
+        )
+
+    async def submit(self, stub, tx, record):
+        try:
+            record.sent = time.time()
+            response = await stub.SubmitTransaction(tx, timeout=self.timeout, metadata=client_metadata())
+            record.ok = response.success
+            if not response.success:
+                self.rejections[response.message] += 1
+        except grpc.RpcError:
+            self.errors += 1
+        finally:
+            record.acked = time.time()
+
+    async def watch_confirmations(self, stub, stop):
+        height, tip_hash = None, None  # Blocks up to the tip at startup hold none of our transactions
+        while not stop.is_set():
+            try:
+                tip = await stub.GetTip(pb2.TipRequest(), timeout=self.timeout)
+                if height is None:
+                    height = tip.index
+                elif tip.index != height or tip.hash != tip_hash:
+                    now = time.time()
+                    start = max(1, min(height, tip.index) - RESCAN_DEPTH + 1)
+                    async for block in stub.GetBlocks(pb2.BlockRange(start=start, end=tip.index),
+                                                      timeout=self.timeout):
+                        for tx in block.transactions:
+                            record = self.records.get(tx.id)
+                            if record is not None and record.confirmed is None:
+                                record.confirmed, record.block = now, block.index
+                height, tip_hash = tip.index, tip.hash
+            except grpc.RpcError as e:
+                print(f"Confirmation poll failed: {e.code().name}")
+            try:
+                await asyncio.wait_for(stop.wait(), self.confirm_poll)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, confirm_timeout=30.0):
+        channels = [grpc.aio.insecure_channel(t) for t in self.targets]
+        stubs = [pb2_grpc.BlockchainNodeStub(c) for c in channels]
+        stop = asyncio.Event()
+        watcher = asyncio.ensure_future(self.watch_confirmations(stubs[0], stop))
+        loop = asyncio.get_running_loop()
+        started_loop, started_wall = loop.time(), time.time()
+        pending = set()
+        try:
+            for i, at in enumerate(arrivals(self.stages, self.process, self.rng)):
+                delay = started_loop + at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if len(pending) >= self.max_in_flight:
+                    self.dropped += 1
+                    continue
+                tx = self.make_tx()
+                target = i % len(stubs)
+                record = self.records[tx.id] = TxRecord(tx.id, self.targets[target], started_wall + at)
+                task = asyncio.ensure_future(self.submit(stubs[target], tx, record))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+            # Give the last accepted transactions time to make it into a block; rejected ones never will
+            deadline = loop.time() + confirm_timeout
+            while loop.time() < deadline and any(r.ok and r.confirmed is None for r in self.records.values()):
+                await asyncio.sleep(self.confirm_poll)
+        finally:
+            stop.set()
+            await watcher
+            for channel in channels:
+                await channel.close()
+
+    # --- Results ---
+    def write_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["tx_id", "target", "scheduled", "sent", "acked", "ok", "confirmed", "block"])
+            for r in self.records.values():
+                writer.writerow([r.id, r.target, r.scheduled, r.sent, r.acked, int(r.ok),
+                                 "" if r.confirmed is None else r.confirmed, "" if r.block is None else r.block])
+
+    def summary(self):
+        records = list(self.records.values())
+        acked = [r for r in records if r.acked is not None]
+        accepted = sum(r.ok for r in acked)
+        confirmed = [r for r in records if r.confirmed is not None]
+        lines = []
+        if acked:
+            span = max(r.acked for r in acked) - min(r.scheduled for r in acked)
+            lines.append(f"Sent {len(records)} tx, {accepted} accepted, {sum(self.rejections.values())} rejected, "
+                         f"{self.errors} errors, {len(acked) / span if span > 0 else 0:.1f} tx/s offered")
+            if self.dropped:
+                lines.append(f"Dropped {self.dropped} arrivals with {self.max_in_flight} submissions in flight")
+            for message, count in self.rejections.most_common(5):
+                lines.append(f"  {count:8d} x {message}")
+            lines += histogram("Submit latency (scheduled -> ack)", [r.acked - r.scheduled for r in acked])
+        if confirmed:
+            lines += histogram("End-to-end latency (scheduled -> confirmed)",
+                               [r.confirmed - r.scheduled for r in confirmed])
+        lines.append(f"Confirmed {sum(r.ok for r in confirmed)}/{accepted} accepted tx")
+        return "\n".join(lines)
+
+
+def histogram(title, values):
+    values = sorted(values)
+    if not values:
+        return []
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+    lines = [f"{title}: p50 {pick(0.5):.1f} ms, p95 {pick(0.95):.1f} ms, p99 {pick(0.99):.1f} ms, "
+             f"max {values[-1] * 1000:.1f} ms"]
+    counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for v in values:
+        counts[bisect.bisect_left(LATENCY_BUCKETS_MS, v * 1000)] += 1
+    widest = max(counts)
+    for i, count in enumerate(counts):
+        if not count:
+            continue
+        label = f"<= {LATENCY_BUCKETS_MS[i]} ms" if i < len(LATENCY_BUCKETS_MS) else f"> {LATENCY_BUCKETS_MS[-1]} ms"
+        lines.append(f"  {label:>11} {count:8d} {'#' * max(1, round(40 * count / widest))}")
+    return lines
+
+
+def run():
+    targets = [t for t in os.environ.get('TARGET_NODES', os.environ.get('TARGET_NODE', 'localhost:50051')).split(',') if t]
+    stages = parse_stages(os.environ.get('LOAD_STAGES', '100:10'))  # rate:seconds,...
+    process = os.environ.get('ARRIVAL', 'poisson')  # poisson | constant
+    max_in_flight = int(os.environ.get('MAX_IN_FLIGHT', '1000'))
+    confirm_timeout = float(os.environ.get('CONFIRM_TIMEOUT', '30'))
+    output = os.environ.get('LOADGEN_OUTPUT', '/logs/loadgen_results.csv')
+    seed = os.environ.get('LOADGEN_SEED')
+
+    print(f"Load generator -> {', '.join(targets)}: {process} arrivals, stages {stages}, "
+          f"{max_in_flight} in flight")
+    generator = LoadGenerator(targets, stages, process, max_in_flight, seed=seed)
+    asyncio.run(generator.run(confirm_timeout))
+    print(generator.summary())
+    if output:
+        try:
+            generator.write_csv(output)
+            print(f"Per-transaction results written to {output}")
+        except OSError as e:
+            print(f"Could not write {output}: {e}")
+
+if __name__ == '__main__':
+    run()
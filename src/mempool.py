@@ -0,0 +1,163 @@
+import heapq
+from collections import OrderedDict
+
+from src.merkle import MerkleTree, short_id
+from src.state import to_units
+
+EVICTION_POLICIES = ('oldest', 'lowest_amount')
+
+
+class Mempool:
+    """Pending transactions keyed by tx id, kept in arrival order.
+
+    Add, lookup and dedup are O(1); a block's worth of confirmed transactions
+    is removed in one pass. Transactions cache their own leaf hash, so the
+    Merkle tree only grows on append and is rebuilt from cached leaves (never
+    by rehashing) after removals. With max_size set, a full pool evicts by
+    the configured policy: 'oldest' first, or 'lowest_amount' first.
+
+    With balance_of (account -> confirmed units), a transaction is refused
+    when its sender's confirmed balance cannot cover it on top of what the
+    sender's other pending transactions already spend.
+    """
+
+    def __init__(self, max_size=0, eviction='oldest', balance_of=None):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy {eviction!r}, expected one of {EVICTION_POLICIES}")
+        self.max_size = max_size
+        self.eviction = eviction
+        self.txs = OrderedDict()  # tx id -> tx
+        self.by_short_id = {}  # Compact block short id -> ids of the pending txs sharing it
+        self.by_amount = []  # Lazy min-heap of (amount, seq, tx id) for 'lowest_amount'
+        self.amount_seq = {}  # tx id -> seq of its live by_amount entry; older entries are stale
+        self.seq = 0
+        self.tree = MerkleTree()
+        self.tree_dirty = False
+        self.evicted = 0
+        self.refused = 0  # Refused because the pool was full and nothing could be evicted
+        self.balance_of = balance_of
+        self.pending_out = {}  # Sender -> units spent by its pending transactions
+        self.overspends = 0
+        self.generation = 0  # Bumped on every change, so block templates know when to refresh
+
+    def __len__(self):
+        return len(self.txs)
+
+    def __contains__(self, tx_id):
+        return tx_id in self.txs
+
+    def __iter__(self):
+        return iter(self.txs.values())
+
+    def get(self, tx_id):
+        return self.txs.get(tx_id)
+
+    def find_short_id(self, sid):
+        """The pending transaction for a compact block short id, or None if unknown or ambiguous."""
+        ids = self.by_short_id.get(sid)
+        if ids is None or len(ids) != 1:
+            return None  # A collision has to be fetched like a missing tx
+        return self.txs.get(ids[0])
+
+    def add(self, tx):
+        """Returns True if tx was new and kept in the pool."""
+        return self.admit(tx) is None
+
+    def admit(self, tx):
+        """Adds tx to the pool; returns the reason it was refused, or None."""
+        if tx.id in self.txs:
+            return "duplicate"
+        if self.balance_of is not None and not self.affordable(tx):
+            self.overspends += 1
+            return "insufficient balance"
+        if self.max_size and len(self.txs) >= self.max_size and not self._evict_for(tx):
+            self.refused += 1
+            return "pool full"
+        self.txs[tx.id] = tx
+        self.generation += 1
+        self.by_short_id.setdefault(short_id(tx.hash), []).append(tx.id)
+        self.pending_out[tx.sender] = self.pending_out.get(tx.sender, 0) + to_units(tx.amount)
+        if self.eviction == 'lowest_amount':
+            self.seq += 1
+            self.amount_seq[tx.id] = self.seq
+            heapq.heappush(self.by_amount, (tx.amount, self.seq, tx.id))
+        if not self.tree_dirty:
+            self.tree.append(tx.hash)
+        return None
+
+    def add_many(self, txs):
+        return [tx for tx in txs if self.add(tx)]
+
+    def remove_many(self, tx_ids):
+        removed = 0
+        for tx_id in tx_ids:
+            tx = self.txs.pop(tx_id, None)
+            if tx is not None:
+                self._forget(tx)
+                removed += 1
+        if removed:
+            self.tree_dirty = True
+            self.generation += 1
+        if len(self.by_amount) > 2 * len(self.txs) + 64:
+            # Drop heap entries of transactions that already left the pool
+            self.by_amount = [e for e in self.by_amount if self._live(e)]
+            heapq.heapify(self.by_amount)
+        return removed
+
+    def affordable(self, tx):
+        spent = self.pending_out.get(tx.sender, 0) + to_units(tx.amount)
+        return spent <= self.balance_of(tx.sender)
+
+    def trim_overspends(self, accounts):
+        """Drops the newest pending txs of accounts whose confirmed balance no longer covers them."""
+        excess = {a: self.pending_out.get(a, 0) - self.balance_of(a) for a in accounts}
+        excess = {a: units for a, units in excess.items() if units > 0}
+        dropped = []
+        for tx in reversed(self.txs.values()):
+            if not excess:
+                break
+            if tx.sender in excess:
+                dropped.append(tx.id)
+                excess[tx.sender] -= to_units(tx.amount)
+                if excess[tx.sender] <= 0:
+                    del excess[tx.sender]
+        return self.remove_many(dropped)
+
+    def _live(self, entry):
+        # A tx removed and added again has a newer entry; its old one must not evict it
+        return self.amount_seq.get(entry[2]) == entry[1]
+
+    def _forget(self, tx):
+        sid = short_id(tx.hash)
+        ids = self.by_short_id.get(sid)
+        if ids is not None and tx.id in ids:
+            ids.remove(tx.id)
+            if not ids:
+                del self.by_short_id[sid]
+        self.amount_seq.pop(tx.id, None)
+        left = self.pending_out[tx.sender] - to_units(tx.amount)
+        if left:
+            self.pending_out[tx.sender] = left
+        else:
+            del self.pending_out[tx.sender]
+
+    def merkle_tree(self):
+        if self.tree_dirty:
+            self.tree = MerkleTree.from_transactions(self.txs.values())
+            self.tree_dirty = False
+        return self.tree
+
+    def _evict_for(self, tx):
+        if self.eviction == 'oldest':
+            _, evicted = self.txs.popitem(last=False)
+        else:
+            while self.by_amount and not self._live(self.by_amount[0]):
+                heapq.heappop(self.by_amount)  # Already confirmed, evicted or re-added
+            if not self.by_amount or self.by_amount[0][0] >= tx.amount:
+                return False  # The incoming transaction is the lowest one
+            evicted = self.txs.pop(heapq.heappop(self.by_amount)[2])
+        self._forget(evicted)
+        self.evicted += 1
+        self.tree_dirty = True
+        self.generation += 1
+        return True
@@ -0,0 +1,92 @@
+import hashlib
+
+HASH_SIZE = 32
+EMPTY_ROOT = bytes(HASH_SIZE)
+SHORT_ID_BYTES = 6  # Leaf hash prefix used as a compact block short id
+
+
+def short_id(leaf):
+    # A collision can only make reconstruction fail the merkle root check
+    return leaf[:SHORT_ID_BYTES]
+
+
+def _parent(left, right):
+    return hashlib.sha256(left + right).digest()
+
+
+class MerkleTree:
+    """Binary Merkle tree over transaction hashes with every level kept in memory.
+
+    Each level is one bytearray of packed 32-byte hashes rather than a list of
+    bytes objects. Odd levels pair their last node with itself. Appending a
+    leaf only rehashes the path from that leaf to the root, so a tree that
+    follows the mempool grows in O(log n) per transaction instead of being rebuilt.
+    """
+
+    def __init__(self, leaves=()):
+        self.levels = [bytearray()]
+        for leaf in leaves:
+            self.append(leaf)
+
+    @classmethod
+    def from_transactions(cls, txs):
+        return cls(t.hash for t in txs)
+
+    def __len__(self):
+        return len(self.levels[0]) // HASH_SIZE
+
+    @staticmethod
+    def _node(level, i):
+        return bytes(level[i * HASH_SIZE:(i + 1) * HASH_SIZE])
+
+    def leaf(self, i):
+        return self._node(self.levels[0], i)
+
+    def copy(self):
+        tree = MerkleTree()
+        tree.levels = [bytearray(level) for level in self.levels]
+        return tree
+
+    def append(self, leaf):
+        self.levels[0] += leaf
+        i = len(self) - 1
+        depth = 0
+        while len(self.levels[depth]) > HASH_SIZE:
+            level = self.levels[depth]
+            base = i - i % 2
+            left = self._node(level, base)
+            right = self._node(level, base + 1) if (base + 1) * HASH_SIZE < len(level) else left
+            if depth + 1 == len(self.levels):
+                self.levels.append(bytearray())
+            parent_level = self.levels[depth + 1]
+            i //= 2
+            if i * HASH_SIZE < len(parent_level):
+                parent_level[i * HASH_SIZE:(i + 1) * HASH_SIZE] = _parent(left, right)
+            else:
+                parent_level += _parent(left, right)
+            depth += 1
+
+    def root(self):
+        if not self.levels[0]:
+            return EMPTY_ROOT
+        return bytes(self.levels[-1])
+
+    def proof(self, index):
+        """Sibling path for leaf index as a list of (hash, sibling_is_left)."""
+        steps = []
+        for level in self.levels[:-1]:
+            if index % 2:
+                steps.append((self._node(level, index - 1), True))
+            else:
+                sibling = index + 1 if (index + 1) * HASH_SIZE < len(level) else index
+                steps.append((self._node(level, sibling), False))
+            index //= 2
+        return steps
+
+
+def verify_proof(leaf, steps, root):
+    """Checks an inclusion proof from MerkleTree.proof() against a root."""
+    node = leaf
+    for sibling, sibling_is_left in steps:
+        node = _parent(sibling, node) if sibling_is_left else _parent(node, sibling)
+    return node == root
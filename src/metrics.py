@@ -0,0 +1,255 @@
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; shared by RPC, peer-call and lock-wait histograms
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Counter:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        yield name, labels, self.value
+
+
+class _Gauge:
+    __slots__ = ('value', 'fn')
+
+    def __init__(self, fn=None):
+        self.value = 0
+        self.fn = fn
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self, name, labels):
+        yield name, labels, self.fn() if self.fn is not None else self.value
+
+
+class _Histogram:
+    """Fixed buckets; observe() only bumps preallocated slots."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def samples(self, name, labels):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), counts):
+            cumulative += count
+            yield name + '_bucket', labels + (('le', _format_bound(bound)),), cumulative
+        yield name + '_sum', labels, total
+        yield name + '_count', labels, cumulative
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class Metric:
+    """A named metric, optionally split by label values.
+
+    labels(*values) returns the child for one combination of label values;
+    look it up once and keep it on hot paths. Without label names the
+    metric is its own single child, so inc()/set()/observe() work on it.
+    A metric built with collect has no children: collect() is called on
+    each scrape and returns {label values: value}, for values another
+    object already tracks per label (e.g. per peer).
+    """
+
+    def __init__(self, kind, name, help_text, label_names=(), factory=None, collect=None):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.factory = factory
+        self.collect = collect
+        self.children = {}
+        self.lock = threading.Lock()
+        if not self.label_names and collect is None:
+            self._only = self.labels()
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, self.factory())
+        return child
+
+    # Shortcuts for a metric without labels
+    def inc(self, amount=1):
+        self._only.inc(amount)
+
+    def set(self, value):
+        self._only.set(value)
+
+    def observe(self, value):
+        self._only.observe(value)
+
+    def time(self):
+        return self._only.time()
+
+    def samples(self):
+        if self.collect is not None:
+            for values, value in self.collect().items():
+                yield self.name, tuple(zip(self.label_names, values)), value
+            return
+        with self.lock:
+            children = list(self.children.items())
+        for values, child in children:
+            yield from child.samples(self.name, tuple(zip(self.label_names, values)))
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _add(self, metric):
+        # Registering a name again replaces it, e.g. a gauge bound to a newer node
+        with self.lock:
+            self.metrics[metric.name] = metric
+        return metric
+
+    # With label names, fn maps label values to the current value and is read on scrape
+    def counter(self, name, help_text, label_names=(), fn=None):
+        if fn is not None and label_names:
+            return self._add(Metric('counter', name, help_text, label_names, collect=fn))
+        return self._add(Metric('counter', name, help_text, label_names, _Counter))
+
+    def gauge(self, name, help_text, label_names=(), fn=None):
+        if fn is not None and label_names:
+            return self._add(Metric('gauge', name, help_text, label_names, collect=fn))
+        return self._add(Metric('gauge', name, help_text, label_names, lambda: _Gauge(fn)))
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._add(Metric('histogram', name, help_text, label_names, lambda: _Histogram(tuple(buckets))))
+
+    def samples(self, prefix=""):
+        with self.lock:
+            metrics = [m for m in self.metrics.values() if m.name.startswith(prefix)]
+        for metric in metrics:
+            try:
+                yield from metric.samples()
+            except Exception as e:
+                logging.error(f"Failed to collect metric {metric.name}: {e}")
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                for name, labels, value in metric.samples():
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+            except Exception as e:
+                logging.error(f"Failed to collect metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()  # One node per process, as in the compose network
+
+
+class TimedLock:
+    """threading.Lock that records how long acquirers waited for it.
+
+    An uncontended acquire costs one extra non-blocking attempt; only
+    acquires that actually had to wait are timed.
+    """
+
+    def __init__(self, wait_histogram, contended_counter):
+        self.lock = threading.Lock()
+        self.wait = wait_histogram
+        self.contended = contended_counter
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self.lock.acquire(False):
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        acquired = self.lock.acquire(True, timeout)
+        self.wait.observe(time.perf_counter() - start)
+        self.contended.inc()
+        return acquired
+
+    def release(self):
+        self.lock.release()
+
+    def locked(self):
+        return self.lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+
+def start_http_server(port, registry=REGISTRY, host=''):
+    """Serves registry.render() at /metrics from a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes would flood the node log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
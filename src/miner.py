@@ -0,0 +1,165 @@
+import os
+import time
+import hashlib
+import multiprocessing
+from concurrent import futures
+
+from src.metrics import REGISTRY
+
+# Block.nonce is an int32 on the wire, so the search space is split inside it
+NONCE_SPACE = 2 ** 31
+CANCEL_CHECK_INTERVAL = 4096  # Nonces tried between two cancel/refresh checks
+POLL_INTERVAL = 0.01  # Seconds between parent-side abort and refresh checks
+MAX_PREFIX_BYTES = 256  # Room for the serialized header in shared memory
+
+HASHES = REGISTRY.counter('miner_hashes_total', 'Nonces tried by the PoW workers')
+SEARCH_SECONDS = REGISTRY.histogram('miner_search_seconds', 'Wall time of one search, until found, aborted or exhausted',
+                                    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+# Set once per worker process by _init_worker
+_cancel_event = None
+_shared = None
+
+
+def _init_worker(cancel_event, shared):
+    global _cancel_event, _shared
+    _cancel_event = cancel_event
+    _shared = shared
+
+
+class MiningTemplate:
+    """Block header with everything but the nonce already absorbed into a sha256 state.
+
+    Each attempt copies the prefix state and feeds only the 4 nonce bytes, so
+    the cost per nonce no longer depends on how many transactions the block
+    holds. target is the integer a hash must not exceed; tag is handed back
+    with a result so the caller knows which block it solved.
+    """
+
+    def __init__(self, prefix, target, tag=None):
+        self.prefix = prefix
+        self.target = target
+        self.tag = tag
+        self.state = hashlib.sha256(prefix)
+
+    def digest(self, nonce):
+        h = self.state.copy()
+        h.update(nonce.to_bytes(4, 'big'))
+        return h.digest()
+
+
+class SharedTemplate:
+    """The current template in shared memory, tagged with a generation counter.
+
+    The parent publishes a new prefix and target in place; workers notice the
+    bumped generation at their next check and carry on from the nonce they
+    were at, instead of being cancelled and resubmitted.
+    """
+
+    def __init__(self, ctx):
+        self.generation = ctx.Value('Q', 0)
+        self.prefix = ctx.Array('c', MAX_PREFIX_BYTES, lock=False)
+        self.prefix_len = ctx.Value('H', 0, lock=False)
+        self.target = ctx.Array('c', 32, lock=False)
+
+    def publish(self, template):
+        if len(template.prefix) > MAX_PREFIX_BYTES:
+            raise ValueError(f"Header prefix of {len(template.prefix)} bytes does not fit")
+        with self.generation.get_lock():
+            self.prefix[:len(template.prefix)] = template.prefix
+            self.prefix_len.value = len(template.prefix)
+            self.target[:] = template.target.to_bytes(32, 'big')
+            self.generation.value += 1
+            return self.generation.value
+
+    def load(self):
+        with self.generation.get_lock():
+            return self.generation.value, self.prefix[:self.prefix_len.value], self.target[:]
+
+
+def _search_range(start, end):
+    """Runs in a worker process: scans [start, end) of the shared template for a winning nonce.
+
+    Returns (nonces tried, found), where found is None or (generation,
+    nonce, hash) and generation identifies the template the nonce belongs to.
+    """
+    generation, prefix, limit = _shared.load()
+    copy = hashlib.sha256(prefix).copy
+    for nonce in range(start, end):
+        if (nonce - start) % CANCEL_CHECK_INTERVAL == 0:
+            if _cancel_event.is_set():
+                return nonce - start, None
+            if _shared.generation.value != generation:
+                generation, prefix, limit = _shared.load()
+                copy = hashlib.sha256(prefix).copy
+        h = copy()
+        h.update(nonce.to_bytes(4, 'big'))
+        digest = h.digest()
+        # Equal-length big-endian bytes compare like the integers they encode
+        if digest <= limit:
+            return nonce - start + 1, (generation, nonce, digest)
+    return end - start, None
+
+
+class ParallelMiner:
+    """Process-pool proof-of-work engine.
+
+    Every search splits the nonce space into one contiguous range per worker.
+    The first worker to find a valid nonce wins and the rest are cancelled
+    through a shared event, as are all of them when abort_event fires.
+    Templates refreshed during a search are swapped in through shared memory.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        # spawn keeps the workers clear of the gRPC threads living in the parent
+        ctx = multiprocessing.get_context('spawn')
+        self.cancel_event = ctx.Event()
+        self.shared = SharedTemplate(ctx)
+        self.pool = futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=ctx,
+            initializer=_init_worker, initargs=(self.cancel_event, self.shared)
+        )
+
+    def partitions(self):
+        chunk = NONCE_SPACE // self.workers
+        for i in range(self.workers):
+            end = NONCE_SPACE if i == self.workers - 1 else (i + 1) * chunk
+            yield i * chunk, end
+
+    def search(self, template, abort_event, refresh=None):
+        """Returns (template, nonce, hash) for the winning MiningTemplate, or None if aborted or exhausted.
+
+        refresh() is polled every POLL_INTERVAL and may return a replacement
+        MiningTemplate, which the workers pick up without restarting. A nonce
+        found for an earlier template of this search is still returned with
+        that template; the caller decides whether it is stale.
+        """
+        self.cancel_event.clear()
+        templates = {self.shared.publish(template): template}
+        # hashlib states cannot be pickled, each worker rebuilds one from the shared prefix
+        pending = {self.pool.submit(_search_range, start, end) for start, end in self.partitions()}
+        result = None
+        started = time.perf_counter()
+        while pending:
+            done, pending = futures.wait(pending, timeout=POLL_INTERVAL,
+                                         return_when=futures.FIRST_COMPLETED)
+            for f in done:
+                tried, found = f.result()
+                HASHES.inc(tried)
+                if result is None and found is not None:
+                    generation, nonce, digest = found
+                    result = templates[generation], nonce, digest
+            if result is not None or abort_event.is_set():
+                self.cancel_event.set()
+            elif refresh is not None and pending:
+                replacement = refresh()
+                if replacement is not None:
+                    templates[self.shared.publish(replacement)] = replacement
+        # Stale workers have all returned, so the next search starts clean
+        SEARCH_SECONDS.observe(time.perf_counter() - started)
+        return result
+
+    def shutdown(self):
+        self.cancel_event.set()
+        self.pool.shutdown(wait=True)
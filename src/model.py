@@ -0,0 +1,275 @@
+import struct
+import hashlib
+from array import array
+
+import protos.blockchain_pb2 as pb2
+from src.merkle import MerkleTree, HASH_SIZE, short_id
+from src.miner import MiningTemplate
+from src.difficulty import bits_to_target
+
+# Canonical binary layout. Hashes, the block store and the miner all use it;
+# gRPC messages keep their protobuf fields and convert at the edges.
+# Header before the nonce: index, previous hash, timestamp, merkle root, difficulty (compact target bits)
+HEADER = struct.Struct('>i32sd32si')
+NONCE = struct.Struct('>i')
+TX_VALUES = struct.Struct('>fd')  # amount (float32, as on the wire), timestamp
+STR_LEN = struct.Struct('>H')
+COUNT = struct.Struct('>I')
+
+_FLOAT32 = struct.Struct('>f')
+
+
+def _pack_str(value):
+    data = value.encode()
+    return STR_LEN.pack(len(data)) + data
+
+
+def _unpack_str(data, offset):
+    (length,) = STR_LEN.unpack_from(data, offset)
+    offset += STR_LEN.size
+    return bytes(data[offset:offset + length]).decode(), offset + length
+
+
+def hash_from_hex(value):
+    """Raw 32-byte hash from its hex form, or None if it is not one."""
+    try:
+        raw = bytes.fromhex(value)
+    except ValueError:
+        return None
+    return raw if len(raw) == HASH_SIZE else None
+
+
+def block_hash(index, previous_hash, timestamp, merkle_root, difficulty, nonce):
+    header = HEADER.pack(index, previous_hash, timestamp, merkle_root, difficulty)
+    return hashlib.sha256(header + NONCE.pack(nonce)).digest()
+
+
+class Transaction:
+    """Slotted transaction record; its leaf hash is computed once and cached."""
+
+    __slots__ = ('id', 'sender', 'receiver', 'amount', 'timestamp', '_hash')
+
+    def __init__(self, id, sender, receiver, amount, timestamp):
+        self.id = id
+        self.sender = sender
+        self.receiver = receiver
+        # Rounded to float32 like the wire field, so every copy hashes the same
+        self.amount = _FLOAT32.unpack(_FLOAT32.pack(amount))[0]
+        self.timestamp = timestamp
+        self._hash = None
+
+    @classmethod
+    def from_proto(cls, t):
+        return cls(t.id, t.sender, t.receiver, t.amount, t.timestamp)
+
+    def to_proto(self):
+        return pb2.Transaction(id=self.id, sender=self.sender, receiver=self.receiver,
+                               amount=self.amount, timestamp=self.timestamp)
+
+    def serialize(self):
+        return (_pack_str(self.id) + _pack_str(self.sender) + _pack_str(self.receiver)
+                + TX_VALUES.pack(self.amount, self.timestamp))
+
+    @classmethod
+    def parse(cls, data, offset=0):
+        """(transaction, offset just past it) from serialize() output."""
+        tx_id, offset = _unpack_str(data, offset)
+        sender, offset = _unpack_str(data, offset)
+        receiver, offset = _unpack_str(data, offset)
+        amount, timestamp = TX_VALUES.unpack_from(data, offset)
+        return cls(tx_id, sender, receiver, amount, timestamp), offset + TX_VALUES.size
+
+    @property
+    def hash(self):
+        # Merkle leaf
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.serialize()).digest()
+        return self._hash
+
+    def __repr__(self):
+        return f"Transaction({self.id!r}, {self.sender!r} -> {self.receiver!r}, {self.amount})"
+
+
+class TransactionList:
+    """Read-only sequence of transactions packed back to back in their binary form.
+
+    One bytes buffer plus an array of record offsets replaces a list of
+    objects; a Transaction is only decoded when it is accessed.
+    """
+
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, data=b'', offsets=None):
+        self.data = data
+        self.offsets = offsets if offsets is not None else array('I')
+
+    @classmethod
+    def pack(cls, txs):
+        offsets = array('I')
+        parts = []
+        size = 0
+        for t in txs:
+            record = t.serialize()
+            offsets.append(size)
+            parts.append(record)
+            size += len(record)
+        return cls(b''.join(parts), offsets)
+
+    @classmethod
+    def from_buffer(cls, data, count):
+        """Indexes count records at the start of data without decoding them."""
+        offsets = array('I')
+        offset = 0
+        for _ in range(count):
+            offsets.append(offset)
+            for _ in range(3):  # id, sender, receiver
+                offset += STR_LEN.size + STR_LEN.unpack_from(data, offset)[0]
+            offset += TX_VALUES.size
+        return cls(bytes(data[:offset]), offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def record(self, i):
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(self.data)
+        return self.data[self.offsets[i]:end]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.offsets)
+        if not 0 <= i < len(self.offsets):
+            raise IndexError(i)
+        return Transaction.parse(self.data, self.offsets[i])[0]
+
+    def __iter__(self):
+        offset = 0
+        for _ in range(len(self.offsets)):
+            tx, offset = Transaction.parse(self.data, offset)
+            yield tx
+
+    def hashes(self):
+        # Merkle leaves straight from the packed records
+        return (hashlib.sha256(self.record(i)).digest() for i in range(len(self.offsets)))
+
+    def __repr__(self):
+        return f"TransactionList({list(self)!r})"
+
+
+def _header_proto(block):
+    return pb2.BlockHeader(
+        index=block.index, previous_hash=block.previous_hash.hex(), timestamp=block.timestamp,
+        merkle_root=block.merkle_root.hex(), nonce=block.nonce, hash=block.hash.hex(), difficulty=block.difficulty
+    )
+
+
+class BlockHeader:
+    """Header fields of a stored block, read without decoding its transactions."""
+
+    __slots__ = ('index', 'previous_hash', 'timestamp', 'merkle_root', 'difficulty', 'nonce', 'hash')
+
+    SIZE = HEADER.size + NONCE.size  # Leading bytes of InternalBlock.serialize()
+
+    def __init__(self, index, previous_hash, timestamp, merkle_root, difficulty, nonce, hash_val):
+        self.index = index
+        self.previous_hash = previous_hash
+        self.timestamp = timestamp
+        self.merkle_root = merkle_root
+        self.difficulty = difficulty
+        self.nonce = nonce
+        self.hash = hash_val
+
+    @classmethod
+    def parse(cls, data, hash_val):
+        index, previous_hash, timestamp, merkle_root, difficulty = HEADER.unpack_from(data, 0)
+        (nonce,) = NONCE.unpack_from(data, HEADER.size)
+        return cls(index, previous_hash, timestamp, merkle_root, difficulty, nonce, hash_val)
+
+    def to_header_proto(self):
+        return _header_proto(self)
+
+
+class InternalBlock:
+    """Slotted block with raw hashes and its transactions in a TransactionList."""
+
+    __slots__ = ('index', 'previous_hash', 'timestamp', 'transactions', 'merkle_root',
+                 'difficulty', 'nonce', 'hash', 'chain_work', 'miner_id')
+
+    def __init__(self, index, previous_hash, timestamp, transactions, nonce=0, hash_val=None, tree=None,
+                 difficulty=0, miner_id=""):
+        self.index = index
+        self.previous_hash = previous_hash
+        self.timestamp = timestamp
+        if not isinstance(transactions, TransactionList):
+            transactions = list(transactions)
+            if tree is None:
+                tree = MerkleTree.from_transactions(transactions)  # Reuses the cached leaf hashes
+            transactions = TransactionList.pack(transactions)
+        self.transactions = transactions
+        # Only the root is kept; merkle_tree() rebuilds the levels when a proof needs them
+        self.merkle_root = (tree if tree is not None else self.merkle_tree()).root()
+        self.difficulty = difficulty
+        self.nonce = nonce
+        self.hash = hash_val or self.calculate_hash()
+        self.chain_work = 0  # Set when the block is connected to the chain
+        self.miner_id = miner_id
+
+    @classmethod
+    def from_proto(cls, p):
+        """Block from a pb2.Block; the claimed hash is kept as is, not recomputed."""
+        return cls(p.index, bytes.fromhex(p.previous_hash), p.timestamp,
+                   [Transaction.from_proto(t) for t in p.transactions], p.nonce, bytes.fromhex(p.hash),
+                   difficulty=p.difficulty, miner_id=p.miner_id)
+
+    def header_prefix(self):
+        # Everything hashed before the nonce; fixed for a given mining template
+        return HEADER.pack(self.index, self.previous_hash, self.timestamp, self.merkle_root, self.difficulty)
+
+    def calculate_hash(self):
+        return block_hash(self.index, self.previous_hash, self.timestamp, self.merkle_root,
+                          self.difficulty, self.nonce)
+
+    def merkle_tree(self):
+        return MerkleTree(self.transactions.hashes())
+
+    def mining_template(self):
+        # Serialized once per template; hashes match calculate_hash() for every nonce
+        return MiningTemplate(self.header_prefix(), bits_to_target(self.difficulty), self)
+
+    def serialize(self):
+        return b''.join((self.header_prefix(), NONCE.pack(self.nonce), _pack_str(self.miner_id),
+                         COUNT.pack(len(self.transactions)), self.transactions.data))
+
+    @classmethod
+    def parse(cls, data):
+        index, previous_hash, timestamp, _, difficulty = HEADER.unpack_from(data, 0)
+        offset = HEADER.size
+        (nonce,) = NONCE.unpack_from(data, offset)
+        miner_id, offset = _unpack_str(data, offset + NONCE.size)
+        (count,) = COUNT.unpack_from(data, offset)
+        txs = TransactionList.from_buffer(memoryview(data)[offset + COUNT.size:], count)
+        # The root is rebuilt from the transactions and the hash recomputed from both
+        return cls(index, previous_hash, timestamp, txs, nonce, difficulty=difficulty, miner_id=miner_id)
+
+    def to_proto(self, miner_id=None):
+        return pb2.Block(
+            index=self.index, previous_hash=self.previous_hash.hex(), timestamp=self.timestamp,
+            transactions=[t.to_proto() for t in self.transactions], nonce=self.nonce, hash=self.hash.hex(),
+            miner_id=miner_id or self.miner_id, difficulty=self.difficulty, merkle_root=self.merkle_root.hex()
+        )
+
+    def to_header_proto(self):
+        return _header_proto(self)
+
+    def to_compact_proto(self, miner_id, origin):
+        return pb2.CompactBlock(
+            index=self.index, previous_hash=self.previous_hash.hex(), timestamp=self.timestamp,
+            nonce=self.nonce, hash=self.hash.hex(), miner_id=miner_id, difficulty=self.difficulty,
+            merkle_root=self.merkle_root.hex(), short_ids=[short_id(h) for h in self.transactions.hashes()],
+            origin=origin
+        )
+
+    def merkle_proof(self, tx_id):
+        for i, t in enumerate(self.transactions):
+            if t.id == tx_id:
+                return i, self.merkle_tree().proof(i)
+        return None, None
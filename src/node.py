@@ -1,13 +1,13 @@
 import sys
 import os
 import time
-import hashlib
-import json
 import threading
 import socket
-import csv
 import logging
 import random
+import asyncio
+import functools
+from collections import Counter
 from concurrent import futures
 
 # Add project root to sys.path
@@ -16,188 +16,712 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import grpc
 import protos.blockchain_pb2 as pb2
 import protos.blockchain_pb2_grpc as pb2_grpc
+from src.miner import ParallelMiner
+from src.model import Transaction, InternalBlock, BlockHeader, block_hash, hash_from_hex
+from src.difficulty import leading_zeros_bits, bits_to_target, meets_target, block_work, next_bits
+from src.mempool import Mempool
+from src.peers import PeerPool
+from src.broadcast import Broadcaster
+from src.gossip import TxGossip, SeenFilter
+from src.sync import SyncManager, FORK_MOVED
+from src.blockindex import BlockIndex
+from src.clock import SYSTEM_CLOCK
+from src.blockstore import BlockStore, StoredChain
+from src.template import TemplateBuilder
+from src.validation import BlockValidator, BlockRejected, KnownBlock, UnknownParent, oversized
+from src.state import AccountState, InsufficientFunds, parse_allocations, AMOUNT_SCALE
+from src.eventlog import EventLogger
+from src.aioserver import serve_aio
+from src.metrics import REGISTRY, TimedLock, start_http_server
+from src.tracing import Tracer
 
 # Configuration
-DIFFICULTY = 4  # Number of leading zeros
-LOG_FILE = "/logs/simulation_data.csv"
+DIFFICULTY = int(os.environ.get('DIFFICULTY', '4'))  # Leading zeros of the starting target; retargeting takes over from there
+LOG_DIR = os.environ.get('LOG_DIR', '/logs')  # Per-node event logs (events_<node_id>.jsonl); empty = off
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '100000'))  # Unwritten events held before dropping
+LOG_BATCH_SIZE = int(os.environ.get('LOG_BATCH_SIZE', '1000'))  # Events per write
+LOG_FLUSH_MS = float(os.environ.get('LOG_FLUSH_MS', '200'))  # Max delay before queued events hit the file
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.01'))  # Share of txs traced to spans_<node_id>.jsonl; 0 = off
+MINER_WORKERS = int(os.environ.get('MINER_WORKERS', os.cpu_count() or 1))
+MEMPOOL_MAX_SIZE = int(os.environ.get('MEMPOOL_MAX_SIZE', '0'))  # 0 = unbounded
+MEMPOOL_EVICTION = os.environ.get('MEMPOOL_EVICTION', 'oldest')  # oldest | lowest_amount
+PEER_RPC_TIMEOUT = float(os.environ.get('PEER_RPC_TIMEOUT', '2.0'))  # Deadline per peer call (s)
+BROADCAST_QUEUE_SIZE = int(os.environ.get('BROADCAST_QUEUE_SIZE', '1000'))  # Per peer, per lane
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', '500'))  # Txs added per lock on a stream
+GOSSIP_BATCH_SIZE = int(os.environ.get('GOSSIP_BATCH_SIZE', '100'))  # Flush relay buffer at this many txs
+GOSSIP_MAX_DELAY_MS = float(os.environ.get('GOSSIP_MAX_DELAY_MS', '50'))  # ... or when the oldest is this old
+SEEN_CACHE_SIZE = int(os.environ.get('SEEN_CACHE_SIZE', '100000'))  # Recent tx ids remembered for dedup
+COMPACT_BLOCKS = os.environ.get('COMPACT_BLOCKS', '1') == '1'  # Relay blocks as header + short tx ids
+SYNC_INTERVAL = float(os.environ.get('SYNC_INTERVAL', '5.0'))  # Seconds between peer tip checks
+SYNC_CHUNK_SIZE = int(os.environ.get('SYNC_CHUNK_SIZE', '500'))  # Blocks per streamed download range
+SYNC_WORKERS = int(os.environ.get('SYNC_WORKERS', '4'))  # Ranges downloaded in parallel
+SIDE_KEEP_DEPTH = int(os.environ.get('SIDE_KEEP_DEPTH', '100'))  # Side-branch blocks kept this far below the tip; 0 = all
+MAX_SIDE_BLOCKS = int(os.environ.get('MAX_SIDE_BLOCKS', '1000'))  # Lightest side branches dropped beyond this; 0 = no cap
+MAX_HEADERS_PER_REQUEST = int(os.environ.get('MAX_HEADERS_PER_REQUEST', '2000'))  # GetHeaders replies stop after this many
+MAX_BLOCKS_PER_REQUEST = int(os.environ.get('MAX_BLOCKS_PER_REQUEST', '500'))  # GetBlocks replies stop after this many
+INITIAL_BITS = leading_zeros_bits(DIFFICULTY)  # Compact target of genesis and the first window
+TARGET_BLOCK_TIME = float(os.environ.get('TARGET_BLOCK_TIME', '1.0'))  # Seconds per block retargeting aims for
+RETARGET_WINDOW = int(os.environ.get('RETARGET_WINDOW', '20'))  # Blocks per retarget; 0 keeps the starting target
+GENESIS_HASH = bytes(32)
+DATA_DIR = os.environ.get('DATA_DIR', '/data')  # Block store location for serve(); empty = memory only
+BLOCK_DURABILITY = os.environ.get('BLOCK_DURABILITY', 'batch')  # none | batch | always
+BLOCK_FSYNC_EVERY = int(os.environ.get('BLOCK_FSYNC_EVERY', '100'))  # 'batch': fsync after this many blocks
+BLOCK_FSYNC_INTERVAL = float(os.environ.get('BLOCK_FSYNC_INTERVAL', '1.0'))  # ... or this many seconds
+BLOCK_CACHE_SIZE = int(os.environ.get('BLOCK_CACHE_SIZE', '1000'))  # Block bodies kept in memory
+VALIDATION_WORKERS = int(os.environ.get('VALIDATION_WORKERS', '2'))  # Processes checking large blocks' txs; 0 = in-thread
+VERIFY_CACHE_SIZE = int(os.environ.get('VERIFY_CACHE_SIZE', '10000'))  # Verified block hashes remembered
+GENESIS_ALLOCATIONS = os.environ.get('GENESIS_ALLOCATIONS', 'Client=1000000000')  # account=amount,... funded at genesis
+BLOCK_MAX_TXS = int(os.environ.get('BLOCK_MAX_TXS', '2000'))  # Transactions per block; 0 = no limit
+BLOCK_MAX_BYTES = int(os.environ.get('BLOCK_MAX_BYTES', '1000000'))  # Serialized tx bytes per block; 0 = no limit
+BLOCK_SELECTION = os.environ.get('BLOCK_SELECTION', 'fifo')  # fifo | amount (largest transfers first)
+TEMPLATE_REFRESH_MS = float(os.environ.get('TEMPLATE_REFRESH_MS', '500'))  # Min age before new txs refresh a template
+STATE_SNAPSHOT_INTERVAL = int(os.environ.get('STATE_SNAPSHOT_INTERVAL', '1000'))  # Blocks between balance snapshots
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'thread')  # thread (grpc.server + pool) | aio (grpc.aio transport, same threaded node)
+RPC_WORKERS = int(os.environ.get('RPC_WORKERS', '10'))  # Concurrent handlers ('aio': of those that touch node state)
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '9100'))  # HTTP /metrics for serve(); 0 = off
+
+# Metrics (one registry per process; gauges follow the most recently created node)
+RPC_SECONDS = REGISTRY.histogram('node_rpc_seconds', 'Time spent handling unary RPCs', ('method',))
+LOCK_WAIT = REGISTRY.histogram('node_lock_wait_seconds', 'Time spent waiting for the node lock when it was held')
+LOCK_CONTENDED = REGISTRY.counter('node_lock_contended_total', 'Node lock acquisitions that had to wait')
+TXS_ACCEPTED = REGISTRY.counter('node_transactions_accepted_total', 'New transactions added to the mempool')
+TXS_REFUSED = REGISTRY.counter('node_transactions_refused_total', 'Transactions not added to the mempool, by reason',
+                               ('reason',))
+BLOCKS_RECEIVED = REGISTRY.counter('node_blocks_received_total', 'Blocks relayed to this node, by outcome', ('result',))
+BLOCKS_MINED = REGISTRY.counter('node_blocks_mined_total', 'Blocks found by the miner, by whether they still extended the tip', ('result',))
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class InternalBlock:
-    def __init__(self, index, previous_hash, timestamp, transactions, nonce=0, hash_val=""):
-        self.index = index
-        self.previous_hash = previous_hash
-        self.timestamp = timestamp
-        self.transactions = transactions
-        self.nonce = nonce
-        self.hash = hash_val or self.calculate_hash()
-
-    def calculate_hash(self):
-        tx_str = json.dumps([t.__str__() for t in self.transactions], sort_keys=True)
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{tx_str}{self.nonce}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-    def to_proto(self, miner_id):
-        proto_txs = []
-        for t in self.transactions:
-            proto_txs.append(pb2.Transaction(
-                id=t['id'], sender=t['sender'], receiver=t['receiver'], 
-                amount=t['amount'], timestamp=t['timestamp']
-            ))
-        return pb2.Block(
-            index=self.index, previous_hash=self.previous_hash, timestamp=self.timestamp,
-            transactions=proto_txs, nonce=self.nonce, hash=self.hash, 
-            miner_id=miner_id, difficulty=DIFFICULTY
-        )
+def batch_ack(accepted, refused, message):
+    """BatchAck for an intake outcome; refused maps reason -> count, duplicates are counted apart."""
+    refused = dict(refused)
+    duplicates = refused.pop("duplicate", 0)
+    if refused:
+        message += " (rejected: " + ", ".join(f"{reason} x{n}" for reason, n in refused.items()) + ")"
+    return pb2.BatchAck(success=True, message=message, accepted=accepted, duplicates=duplicates,
+                        rejected=sum(refused.values()))
+
+def tx_ack(accepted, refused):
+    if accepted:
+        return pb2.Ack(success=True, message="Transaction added to pool")
+    return pb2.Ack(success=False, message=f"Transaction rejected: {next(iter(refused))}")
+
+class StreamIntake:
+    """Adds a transaction stream in chunks, so it neither holds the lock long nor buffers everything."""
+
+    def __init__(self, node, incoming, chunk_size):
+        self.node = node
+        self.incoming = incoming
+        self.chunk_size = chunk_size
+        self.chunk = []
+        self.accepted = 0
+        self.refused = Counter()
+
+    def add(self, tx_proto):
+        """Buffers tx_proto; returns True once a full chunk is waiting for flush()."""
+        self.chunk.append(tx_proto)
+        return len(self.chunk) >= self.chunk_size
+
+    def flush(self):
+        if self.chunk:
+            accepted, refused = self.node.add_transactions(self.chunk, self.incoming)
+            self.accepted += accepted
+            self.refused.update(refused)
+            self.chunk = []
+
+    def ack(self):
+        self.flush()
+        return batch_ack(self.accepted, self.refused, "Stream added to pool")
+
+def timed_rpc(method):
+    histogram = RPC_SECONDS.labels(method.__name__)
+
+    @functools.wraps(method)
+    def wrapper(self, request, context):
+        with histogram.time():
+            return method(self, request, context)
+    return wrapper
 
 class BlockchainNode(pb2_grpc.BlockchainNodeServicer):
-    def __init__(self, node_id, port, peers):
+    def __init__(self, node_id, port, peers, miner_workers=MINER_WORKERS, address=None, data_dir=None,
+                 log_dir=None, peer_pool=None, miner=None, events=None, clock=None):
+        # peer_pool, miner, events and clock replace the gRPC transport, the PoW
+        # worker pool, the event log file and the OS clock and threads, e.g.
+        # with src.simnet for in-process runs
         self.node_id = node_id
+        self.clock = clock or SYSTEM_CLOCK
         self.port = port
+        self.events = events or EventLogger(os.path.join(log_dir, f"events_{node_id}.jsonl") if log_dir else None,
+                                            node_id, LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_MS / 1000.0)
+        span_log = None
+        if log_dir and TRACE_SAMPLE_RATE > 0:
+            span_log = EventLogger(os.path.join(log_dir, f"spans_{node_id}.jsonl"), node_id,
+                                   LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_MS / 1000.0)
+        self.tracer = Tracer(node_id, span_log, TRACE_SAMPLE_RATE)
+        # How peers reach us; matches their PEERS entries in the compose network
+        self.address = address or os.environ.get('ADVERTISE_ADDR', f"{node_id}:{port}")
         self.peers = peers  # List of "host:port" strings
-        self.chain = [self.create_genesis_block()]
-        self.pending_transactions = []
-        self.lock = threading.Lock()
-        self.mining_event = threading.Event()
-        self.stop_event = threading.Event()
+        self.peer_pool = peer_pool or PeerPool(peers, timeout=PEER_RPC_TIMEOUT, clock=self.clock)
+        self.broadcaster = Broadcaster(self.peer_pool, BROADCAST_QUEUE_SIZE)
+        self.gossip = TxGossip(self.broadcaster, self.address, GOSSIP_BATCH_SIZE,
+                               GOSSIP_MAX_DELAY_MS / 1000.0, SEEN_CACHE_SIZE,
+                               metadata=lambda: self.tracer.metadata('mempool'))
+        self.seen = SeenFilter(SEEN_CACHE_SIZE)  # Pending and confirmed tx ids, so re-forwards are dropped
+        # Active chain plus side branches, indexed by hash and by height. With a
+        # data_dir the active chain lives on disk and only the tip is read at startup
+        active = None
+        if data_dir:
+            store = BlockStore(data_dir, BLOCK_DURABILITY, BLOCK_FSYNC_EVERY, BLOCK_FSYNC_INTERVAL)
+            active = StoredChain(store, InternalBlock.serialize, InternalBlock.parse, BLOCK_CACHE_SIZE,
+                                 BlockHeader.parse, BlockHeader.SIZE)
+        self.chain = BlockIndex(self.create_genesis_block(), lambda block: block_work(block.difficulty), active,
+                                SIDE_KEEP_DEPTH, MAX_SIDE_BLOCKS)
+        # Balances at the tip, rebuilt from the last snapshot plus the blocks after it
+        self.state = AccountState(parse_allocations(GENESIS_ALLOCATIONS),
+                                  os.path.join(data_dir, 'state.json') if data_dir else None,
+                                  STATE_SNAPSHOT_INTERVAL)
+        self.state.load(self.chain)
+        self.mempool = Mempool(MEMPOOL_MAX_SIZE, MEMPOOL_EVICTION, self.state.balance)
+        self.template_builder = TemplateBuilder(self.mempool, BLOCK_MAX_TXS, BLOCK_MAX_BYTES, BLOCK_SELECTION)
+        self.template_generation = 0
+        self.template_built_at = 0.0
+        self.lock = TimedLock(LOCK_WAIT, LOCK_CONTENDED)
+        self.mining_event = self.clock.event()
+        self.stop_event = self.clock.event()
+        self.miner = miner or ParallelMiner(miner_workers)
+        self.sync = SyncManager(self, SYNC_INTERVAL, SYNC_CHUNK_SIZE, SYNC_WORKERS)
+        self.validator = BlockValidator(self, VALIDATION_WORKERS, VERIFY_CACHE_SIZE)
+        self.register_gauges()
         
-        self.log_event("Node Started", f"Node {node_id} started on port {port}")
+        self.log_event("Node Started", port=int(port), height=self.chain.tip.index)
 
     def create_genesis_block(self):
-        return InternalBlock(0, "0", time.time(), [], 0, "00000000000000000000000000000000")
+        return InternalBlock(0, GENESIS_HASH, self.clock.time(), [], 0, GENESIS_HASH, difficulty=INITIAL_BITS)
 
-    def log_event(self, event_type, details=""):
-        try:
-            with open(LOG_FILE, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([time.time(), self.node_id, event_type, details])
-        except Exception as e:
-            logging.error(f"Failed to log event: {e}")
+    def log_event(self, event_type, **fields):
+        # Queued for the background writer, safe to call under the lock
+        self.events.log(event_type, **fields)
+
+    def register_gauges(self):
+        # Read on scrape without the node lock; a slightly stale value is fine
+        REGISTRY.gauge('node_chain_height', 'Height of the active chain tip', fn=lambda: self.chain.tip.index)
+        REGISTRY.gauge('node_mempool_size', 'Transactions waiting to be mined', fn=lambda: len(self.mempool))
+        REGISTRY.gauge('node_side_blocks', 'Blocks held on side branches', fn=lambda: len(self.chain.side))
+        REGISTRY.gauge('node_broadcast_queue_depth', 'Messages queued for all peers',
+                       fn=lambda: sum(q['queued_blocks'] + q['queued_txs'] for q in self.broadcaster.stats()))
+        REGISTRY.gauge('node_peers_up', 'Peers not in failure backoff', fn=lambda: len(self.peer_pool.available()))
+        REGISTRY.gauge('node_events_dropped', 'Event log records dropped on a full queue',
+                       fn=lambda: self.events.stats()['dropped'])
+
+        # Per peer, from PeerPool.health() and the broadcast queues' stats()
+        def per_peer(rows, key):
+            return {(r['address'],): r[key] for r in rows}
+
+        REGISTRY.gauge('node_peer_up', '1 if the last call to the peer succeeded', ('peer',),
+                       fn=lambda: {(h['address'],): int(h['up']) for h in self.peer_pool.health()})
+        REGISTRY.gauge('node_peer_consecutive_failures', 'Failed calls to the peer since its last success', ('peer',),
+                       fn=lambda: per_peer(self.peer_pool.health(), 'failures'))
+        REGISTRY.gauge('node_peer_retry_seconds', 'Seconds until a down peer is probed again', ('peer',),
+                       fn=lambda: per_peer(self.peer_pool.health(), 'retry_in'))
+        REGISTRY.counter('node_peer_calls_total', 'Calls and streams sent to the peer, failed ones included',
+                         ('peer',), fn=lambda: per_peer(self.peer_pool.health(), 'sent'))
+        REGISTRY.gauge('node_broadcast_queued', 'Messages waiting in the peer\'s broadcast queue', ('peer', 'lane'),
+                       fn=lambda: {(q['address'], lane): q[f'queued_{lane}']
+                                   for q in self.broadcaster.stats() for lane in ('blocks', 'txs')})
+        REGISTRY.counter('node_broadcast_enqueued_total', 'Messages queued for the peer', ('peer',),
+                         fn=lambda: per_peer(self.broadcaster.stats(), 'enqueued'))
+        REGISTRY.counter('node_broadcast_dropped_total', 'Messages dropped because the peer\'s queue was full',
+                         ('peer',), fn=lambda: per_peer(self.broadcaster.stats(), 'dropped'))
+        REGISTRY.counter('node_broadcast_skipped_total', 'Messages not queued because the peer was in backoff',
+                         ('peer',), fn=lambda: per_peer(self.broadcaster.stats(), 'skipped'))
 
     # --- gRPC Methods ---
+    @timed_rpc
     def SubmitTransaction(self, request, context):
-        tx = {
-            'id': request.id, 'sender': request.sender, 'receiver': request.receiver,
-            'amount': request.amount, 'timestamp': request.timestamp
-        }
-        with self.lock:
-            if tx not in self.pending_transactions:
-                self.pending_transactions.append(tx)
-                self.log_event("Transaction Received", f"Tx {tx['id']} from {tx['sender']}")
-                # Broadcast to peers
-                threading.Thread(target=self.broadcast_transaction, args=(request,)).start()
-        return pb2.Ack(success=True, message="Transaction added to pool")
+        return tx_ack(*self.add_transactions([request], self.tracer.received(context, 'submit')))
 
+    @timed_rpc
     def BroadcastBlock(self, request, context):
-        block_hash = request.hash
+        return self.accept_block(
+            request, lambda: [Transaction.from_proto(t) for t in request.transactions],
+            lambda: {'relay': 'full', 'missing': 0, 'bytes': request.ByteSize()},
+            self.tracer.received(context, 'confirm')
+        )
+
+    @timed_rpc
+    def BroadcastCompactBlock(self, request, context):
+        incoming = self.tracer.received(context, 'confirm')
+        missing = []
+
+        def load_txs():
+            # Rebuild from the mempool; only unknown short ids need a round trip
+            with self.lock:
+                found = [self.mempool.find_short_id(sid) for sid in request.short_ids]
+            missing.extend(i for i, tx in enumerate(found) if tx is None)
+            if missing:
+                fetched = self.fetch_block_transactions(request, missing)
+                if fetched is None:
+                    raise BlockRejected("Missing transactions unavailable", cacheable=False)
+                for i, t in zip(missing, fetched):
+                    found[i] = Transaction.from_proto(t)
+            return found
+
+        return self.accept_block(request, load_txs,
+                                 lambda: {'relay': 'compact', 'missing': len(missing), 'bytes': request.ByteSize()},
+                                 incoming)
+
+    def accept_block(self, request, load_txs, relay_fields, incoming=None):
+        """Validates a block outside the lock, then commits it under the lock.
+
+        load_txs() returns the block's transactions once its header checks
+        out; relay_fields() adds to the "Block Received" event. incoming is
+        the call's trace context, for the confirm spans of sampled txs.
+        """
+        try:
+            new_block = self.validator.validate(request, load_txs)
+        except KnownBlock:
+            BLOCKS_RECEIVED.labels('known').inc()
+            return pb2.Ack(success=True, message="Block already exists")
+        except UnknownParent as e:
+            # Missing blocks in between: let sync fetch the branch
+            BLOCKS_RECEIVED.labels('orphan').inc()
+            self.sync.request_sync()
+            return pb2.Ack(success=False, message=str(e))
+        except BlockRejected as e:
+            BLOCKS_RECEIVED.labels('rejected').inc()
+            return pb2.Ack(success=False, message=str(e))
+
+        logging.info(f"Received block {request.index} from {request.miner_id}")
+        self.log_event("Block Received", block=request.index, hash=request.hash, **relay_fields())
+
         with self.lock:
-            if block_hash == self.chain[-1].hash:
+            if new_block.hash in self.chain:
+                BLOCKS_RECEIVED.labels('known').inc()
                 return pb2.Ack(success=True, message="Block already exists")
-            if request.index <= self.chain[-1].index:
-                return pb2.Ack(success=False, message="Block index too low")
-            
-            # Simple validation (check hash difficulty)
-            if not request.hash.startswith('0' * DIFFICULTY):
-                 return pb2.Ack(success=False, message="Invalid PoW")
-
-            # In a real blockchain, we'd validate transactions and previous hash heavily
-            # Here we accept longest chain
-            
-            logging.info(f"Received block {request.index} from {request.miner_id}")
-            self.log_event("Block Received", f"Block {request.index} Hash {request.hash[:8]}")
-
-            # Reconstruct internal block
-            txs = []
-            for t in request.transactions:
-                txs.append({'id': t.id, 'sender': t.sender, 'receiver': t.receiver,
-                           'amount': t.amount, 'timestamp': t.timestamp})
-            
-            new_block = InternalBlock(
-                request.index, request.previous_hash, request.timestamp,
-                txs, request.nonce, request.hash
-            )
-            
-            self.chain.append(new_block)
-            
-            # Remove confirmed txs from pending
-            for tx in txs:
-                self.pending_transactions = [p for p in self.pending_transactions if p['id'] != tx['id']]
-            
-            # Restart mining
-            self.mining_event.set() 
+            # A known parent anywhere (not only our tip) is fine, competing blocks go to a side branch
+            committed, reason = self.commit_block(new_block)
+            self.chain.prune()
+            if reason is None and not committed and new_block.hash not in self.chain:
+                reason = "Block branch is too far behind the tip"
+        if reason:
+            BLOCKS_RECEIVED.labels('rejected').inc()
+            return pb2.Ack(success=False, message=reason)
+        if not committed:
+            BLOCKS_RECEIVED.labels('side').inc()
+            return pb2.Ack(success=True, message="Block stored on side branch")
             
+        BLOCKS_RECEIVED.labels('accepted').inc()
+        self.tracer.block_committed(new_block, incoming)
         return pb2.Ack(success=True, message="Block accepted")
 
+    def fetch_block_transactions(self, compact, indexes):
+        # Ask the relaying node first, then any other peer that may have the block
+        request = pb2.BlockTransactionsRequest(block_hash=compact.hash, indexes=indexes)
+        peers = sorted(self.peer_pool.available(), key=lambda p: p.address != compact.origin)
+        for peer in peers:
+            batch = self.peer_pool.call(peer, 'GetBlockTransactions', request)
+            if batch is not None and len(batch.transactions) == len(indexes):
+                return batch.transactions
+        return None
+
+    @timed_rpc
     def BroadcastTransaction(self, request, context):
         # Same as SubmitTransaction basically, but this is node-to-node
-        return self.SubmitTransaction(request, context)
+        return tx_ack(*self.add_transactions([request], self.tracer.received(context, 'gossip')))
 
-    # --- Networking ---
-    def broadcast_transaction(self, tx_proto):
-        for peer in self.peers:
-            try:
-                with grpc.insecure_channel(peer) as channel:
-                    stub = pb2_grpc.BlockchainNodeStub(channel)
-                    stub.BroadcastTransaction(tx_proto)
-            except:
-                pass # Peer might be down
-
-    def broadcast_block(self, block_proto):
-        for peer in self.peers:
+    @timed_rpc
+    def SubmitTransactionBatch(self, request, context):
+        return self.add_batch(request, self.tracer.received(context, 'submit'))
+
+    def add_batch(self, request, incoming=None):
+        return batch_ack(*self.add_transactions(request.transactions, incoming), "Batch added to pool")
+
+    def SubmitTransactions(self, request_iterator, context):
+        intake = self.stream_intake(context)
+        for tx_proto in request_iterator:
+            if intake.add(tx_proto):
+                intake.flush()
+        return intake.ack()
+
+    def stream_intake(self, context, chunk_size=STREAM_CHUNK_SIZE):
+        return StreamIntake(self, self.tracer.received(context, 'submit'), chunk_size)
+
+    @timed_rpc
+    def BroadcastTransactionBatch(self, request, context):
+        # Same as SubmitTransactionBatch, but this is node-to-node
+        self.gossip.peer_knows(request.origin, [t.id for t in request.transactions])
+        return self.add_batch(request, self.tracer.received(context, 'gossip'))
+
+    @timed_rpc
+    def AnnounceTransactions(self, request, context):
+        self.gossip.peer_knows(request.origin, request.ids)
+        with self.lock:
+            wanted = [i for i in self.seen.missing(request.ids) if i not in self.mempool]
+        return pb2.TxInventory(ids=wanted, origin=self.address)
+
+    def add_transactions(self, tx_protos, incoming=None):
+        """Adds a batch under a single lock and queues the new ones for batched gossip.
+
+        Returns (accepted count, Counter of refusal reason -> count). incoming
+        is the trace context of the call that brought the batch.
+        """
+        refused = Counter()
+        # Stateless checks first, outside the lock
+        checked = []
+        for t in tx_protos:
+            tx = Transaction.from_proto(t)
+            reason = self.validator.verify_transaction(tx)
+            if reason is None:
+                checked.append((t, tx))
+            else:
+                refused[reason] += 1
+        with self.lock:
+            added = []
+            for t, tx in checked:
+                reason = "duplicate" if t.id in self.seen else self.mempool.admit(tx)
+                if reason is None:
+                    added.append(t)
+                else:
+                    refused[reason] += 1
+            self.seen.add_many(t.id for t in added)
+            for t in added:
+                self.log_event("Transaction Received", tx=t.id, sender=t.sender)
+            TXS_ACCEPTED.inc(len(added))
+            if added:
+                self.broadcast_transactions(added)
+        self.tracer.transactions_added([t.id for t in added], incoming)
+        for reason, count in refused.items():
+            TXS_REFUSED.labels(reason).inc(count)
+        return len(added), refused
+
+    @timed_rpc
+    def GetTip(self, request, context):
+        with self.lock:
+            tip = self.chain.tip
+        return pb2.Tip(index=tip.index, hash=tip.hash.hex(), total_work=str(tip.chain_work))
+
+    # Range replies are capped, callers page through longer ranges. Only the
+    # reads happen under the lock; protos are built after it is released
+    def GetHeaders(self, request, context):
+        end = min(request.end, request.start + MAX_HEADERS_PER_REQUEST - 1)
+        with self.lock:
+            headers = self.chain.header_range(request.start, end)
+        for header in headers:
+            yield header.to_header_proto()
+
+    def GetBlocks(self, request, context):
+        end = min(request.end, request.start + MAX_BLOCKS_PER_REQUEST - 1)
+        with self.lock:
+            blocks = self.chain.range(request.start, end)
+        for block in blocks:
+            yield block.to_proto()
+
+    @timed_rpc
+    def GetBlockTransactions(self, request, context):
+        with self.lock:
+            block = self.find_block(request.block_hash)
+        if block is None or any(i < 0 or i >= len(block.transactions) for i in request.indexes):
+            return pb2.TransactionBatch()
+        return pb2.TransactionBatch(transactions=[block.transactions[i].to_proto() for i in request.indexes])
+
+    def find_block(self, hash_hex):
+        hash_val = hash_from_hex(hash_hex)
+        return self.chain.get(hash_val) if hash_val is not None else None
+
+    @timed_rpc
+    def GetMerkleProof(self, request, context):
+        with self.lock:
+            block = self.find_block(request.block_hash)
+        if block is None:
+            return pb2.MerkleProof(found=False)
+        index, steps = block.merkle_proof(request.tx_id)
+        if index is None:
+            return pb2.MerkleProof(found=False, block_index=block.index, merkle_root=block.merkle_root.hex())
+        return pb2.MerkleProof(
+            found=True, block_index=block.index, tx_hash=block.transactions[index].hash.hex(),
+            merkle_root=block.merkle_root.hex(),
+            steps=[pb2.MerkleProofStep(hash=h.hex(), is_left=left) for h, left in steps]
+        )
+
+    @timed_rpc
+    def GetBalance(self, request, context):
+        with self.lock:
+            balance = self.state.balance(request.account)
+            pending = self.mempool.pending_out.get(request.account, 0)
+            tip = self.chain.tip
+        return pb2.Balance(account=request.account, balance=balance / AMOUNT_SCALE,
+                           pending=pending / AMOUNT_SCALE, height=tip.index, tip_hash=tip.hash.hex())
+
+    def GetStats(self, request, context):
+        return pb2.Stats(samples=[pb2.StatSample(name=name, labels=dict(labels), value=value)
+                                  for name, labels, value in REGISTRY.samples(request.prefix)])
+
+    # --- Chain ---
+    def commit_block(self, block):
+        """Indexes a block with a known parent (caller holds the lock).
+
+        Returns (committed, reason): committed is True if the block's branch
+        became the active chain, reason says why the block was not stored.
+        """
+        if not self.chain.add(block):
+            return False, "Parent block is no longer known"
+        try:
+            return self.activate(block), None
+        except InsufficientFunds as e:
+            return False, f"Block overspends an account: {e}"
+
+    def activate(self, block):
+        """Switches the active chain to block's branch if it carries more work.
+
+        Reorgs roll back to the fork point and the disconnected transactions go
+        back to the pool. A branch with a block that overspends is dropped
+        before the chain moves and InsufficientFunds is raised. Caller holds
+        the lock.
+        """
+        if block.chain_work <= self.chain.tip.chain_work:
+            return False  # Equal work keeps the first-seen tip
+        disconnected, connected = self.chain.fork_path(block)
+        try:
+            self.state.switch(disconnected, connected)
+        except InsufficientFunds as e:
+            logging.warning(f"Rejected block {e.block.index}: {e}")
+            self.chain.discard(e.block)
+            self.validator.reject(e.block, str(e))
+            raise
+        self.chain.reorg_to(block)
+
+        confirmed = set()
+        touched = set()  # Accounts whose pending spends may no longer be covered
+        for b in connected:
+            for tx in b.transactions:
+                confirmed.add(tx.id)
+                touched.add(tx.sender)
+        self.mempool.remove_many(confirmed)
+        self.seen.add_many(confirmed)
+        # Transactions only the abandoned branch confirmed go back to the pool
+        for b in disconnected:
+            for tx in b.transactions:
+                touched.add(tx.receiver)
+                if tx.id not in confirmed:
+                    self.mempool.add(tx)
+        self.mempool.trim_overspends(touched)
+        if disconnected:
+            tip = self.chain.tip
+            logging.info(f"Reorg to block {tip.index}: {len(disconnected)} disconnected, {len(connected)} connected")
+            self.log_event("Chain Reorg", fork=connected[0].index - 1, disconnected=len(disconnected),
+                           connected=len(connected), tip=tip.index, hash=tip.hash.hex())
+
+        # Restart mining on the new tip
+        self.mining_event.set()
+        return True
+
+    def tip_work(self):
+        with self.lock:
+            return self.chain.tip.chain_work
+
+    def tip_height(self):
+        with self.lock:
+            return self.chain.tip.index
+
+    def block_hash_at(self, height):
+        with self.lock:
+            return self.chain.hash_at(height) if height < len(self.chain) else None
+
+    def header_context(self, hash_val, previous_hash):
+        """(already known, parent block or None, bits required after it) for the validator's linkage stage."""
+        with self.lock:
+            parent = self.chain.get(previous_hash)
+            return hash_val in self.chain, parent, self.next_bits(parent) if parent is not None else None
+
+    def next_bits(self, parent):
+        # Caller holds the lock
+        return next_bits(parent, lambda height: self.ancestor(parent, height), RETARGET_WINDOW, TARGET_BLOCK_TIME)
+
+    def ancestor(self, block, height):
+        """The block at height on block's branch, which may be a side branch."""
+        while block.index > height:
+            if self.chain.is_active(block):
+                return self.chain[height]
+            block = self.chain.get(block.previous_hash)
+        return block
+
+    def block_from_proto(self, request):
+        """InternalBlock from a peer's pb2.Block, or None if a field is malformed."""
+        previous_hash, hash_val = hash_from_hex(request.previous_hash), hash_from_hex(request.hash)
+        if previous_hash is None or hash_val is None:
+            return None
+        txs = [Transaction.from_proto(t) for t in request.transactions]
+        if any(oversized(t) for t in txs):
+            return None  # Cannot even be serialized
+        return InternalBlock(request.index, previous_hash, request.timestamp, txs, request.nonce, hash_val,
+                             difficulty=request.difficulty, miner_id=request.miner_id)
+
+    def check_header_chain(self, fork_height, fork_hash, headers):
+        """Linkage, difficulty, recomputed hash and PoW for every header on top of our block at fork_height.
+
+        fork_hash is the block sync matched at fork_height; if our chain has
+        moved off it since, the result is FORK_MOVED rather than a fault of
+        the peer. Returns the reason the chain is invalid, or None.
+        """
+        with self.lock:
+            if fork_height >= len(self.chain) or self.chain.hash_at(fork_height) != fork_hash:
+                return FORK_MOVED
+            # Enough of our chain below the fork for the first retarget after it
+            base = max(fork_height - RETARGET_WINDOW, 0)
+            below = self.chain.header_range(base, fork_height)
+
+        def ancestor_at(height):
+            return headers[height - fork_height - 1] if height > fork_height else below[height - base]
+
+        parent = below[-1]
+        prev_hash = parent.hash
+        for expected_index, h in enumerate(headers, fork_height + 1):
+            hash_val, merkle_root = hash_from_hex(h.hash), hash_from_hex(h.merkle_root)
+            if h.index != expected_index or hash_from_hex(h.previous_hash) != prev_hash:
+                return f"header {expected_index} does not link"
+            if hash_val is None or merkle_root is None:
+                return f"header {expected_index} is malformed"
+            if h.difficulty != next_bits(parent, ancestor_at, RETARGET_WINDOW, TARGET_BLOCK_TIME):
+                return f"header {expected_index} has the wrong difficulty"
+            if block_hash(h.index, prev_hash, h.timestamp, merkle_root, h.difficulty, h.nonce) != hash_val:
+                return f"header {expected_index} hash mismatch"
+            if not meets_target(hash_val, h.difficulty):
+                return f"header {expected_index} has invalid PoW"
+            parent = h
+            prev_hash = hash_val
+        return None
+
+    def valid_blocks(self, blocks, headers):
+        # Bodies must hash to the already validated headers (the root covers the txs)
+        for b, h in zip(blocks, headers):
+            if b.calculate_hash() != hash_from_hex(h.hash) or self.validator.check_transactions(b.transactions):
+                return False
+            self.validator.mark_verified(b)
+        return True
+
+    def switch_chain(self, fork_height, blocks):
+        """Indexes a downloaded branch forking at fork_height; True if it became the active chain."""
+        with self.lock:
+            if blocks[0].previous_hash not in self.chain:
+                return False
+            for block in blocks:
+                if block.hash not in self.chain:
+                    self.chain.add(block)
+            # None if a block failed to link, or the branch base was pruned meanwhile
+            tip = self.chain.get(blocks[-1].hash)
             try:
-                with grpc.insecure_channel(peer) as channel:
-                    stub = pb2_grpc.BlockchainNodeStub(channel)
-                    stub.BroadcastBlock(block_proto)
-            except:
-                pass
+                activated = tip is not None and self.activate(tip)
+            except InsufficientFunds:
+                activated = False
+            # The branch is handled either way, only now can side blocks go
+            self.chain.prune()
+            if not activated:
+                return False
+            tip = self.chain.tip
+            logging.info(f"Synced to block {tip.index} (fork at {fork_height})")
+            self.log_event("Chain Synced", fork=fork_height, blocks=len(blocks), tip=tip.index, hash=tip.hash.hex())
+        return True
+
+    # --- Networking ---
+    # Both only enqueue; the per-peer sender threads do the RPCs in parallel.
+    # Peers in backoff (e.g. a stopped container) are skipped until their retry is due
+    def broadcast_transactions(self, tx_protos):
+        # Coalesced with other recent txs and relayed as one batch per peer
+        self.gossip.add(tx_protos)
+
+    def broadcast_block(self, block):
+        if COMPACT_BLOCKS:
+            method, proto = 'BroadcastCompactBlock', block.to_compact_proto(self.node_id, self.address)
+        else:
+            method, proto = 'BroadcastBlock', block.to_proto()
+        if not self.tracer.enabled:
+            self.broadcaster.publish(method, proto, priority=True)
+            return
+        # Trace metadata is stamped on the sender thread, so queueing shows up as relay wait
+        stage = 'include' if block.miner_id == self.node_id else 'confirm'
+        self.broadcaster.publish_task(
+            lambda peer: self.peer_pool.call(peer, method, proto, metadata=self.tracer.metadata(stage)),
+            priority=True)
 
 
     # --- Mining Loop ---
+    def build_template(self):
+        """Fresh block template on the current tip (caller holds the lock)."""
+        last_block = self.chain.tip
+        bits = self.next_bits(last_block)
+        if bits != last_block.difficulty:
+            logging.info(f"Difficulty retarget at block {last_block.index + 1}: target {bits_to_target(bits):#066x}")
+        self.template_generation = self.mempool.generation
+        self.template_built_at = self.clock.now()
+        return self.template_builder.build(last_block, bits, self.clock.time())
+
+    def refresh_template(self):
+        """Polled by the miner: a replacement template once the tip moved or new txs are due."""
+        if self.mining_event.is_set():
+            self.mining_event.clear()  # Chain moved, the old parent is stale
+        elif (self.mempool.generation == self.template_generation or
+              self.clock.now() - self.template_built_at < TEMPLATE_REFRESH_MS / 1000.0):
+            return None
+        with self.lock:
+            return self.build_template().mining_template()
+
     def mine(self):
-        logging.info("Mining started...")
+        logging.info(f"Mining started with {self.miner.workers} worker(s)...")
         while not self.stop_event.is_set():
             self.mining_event.clear()
             
             with self.lock:
-                last_block = self.chain[-1]
-                # Deep copy pending txs to mine
-                txs_to_mine = list(self.pending_transactions)
+                # Pending txs picked within the block limits, with the Merkle tree built over them
+                template = self.build_template()
             
-            new_index = last_block.index + 1
-            new_timestamp = time.time()
-            new_nonce = 0
+            # Mining (PoW) across the worker pool; the template is swapped in place
+            # when a block arrives or new transactions come in
+            result = self.miner.search(template.mining_template(), self.stop_event, self.refresh_template)
+            if result is not None:
+                self.block_found(result)
+            # else stopping or nonce range exhausted, take a fresh template
+
+    def block_found(self, result):
+        """Commits and relays a block solved by the miner, unless the tip moved on meanwhile."""
+        mining_template, nonce, hash_val = result
+        template = mining_template.tag  # May be a refresh made during the search
+        template.nonce, template.hash = nonce, hash_val
+        template.miner_id = self.node_id
+        
+        # Block Found!
+        with self.lock:
+            # Double check we haven't been beaten (or moved to another chain by sync)
+            if self.chain.tip.hash != template.previous_hash:
+                BLOCKS_MINED.labels('stale').inc()
+                return False
             
-            # Mining (PoW)
-            while not self.mining_event.is_set():
-                # Check simple condition to stop wasteful compute if chain updated
-                
-                temp_block = InternalBlock(new_index, last_block.hash, new_timestamp, txs_to_mine, new_nonce)
-                if temp_block.hash.startswith('0' * DIFFICULTY):
-                    # Block Found!
-                    with self.lock:
-                        # Double check we haven't been beaten
-                        if self.chain[-1].index >= new_index:
-                            break 
-                        
-                        logging.info(f"Block {new_index} mined! Hash: {temp_block.hash}")
-                        self.log_event("Block Mined", f"Block {new_index} Hash {temp_block.hash[:8]}")
-                        self.chain.append(temp_block)
-                        
-                        # Remove mined txs
-                        for tx in txs_to_mine:
-                            self.pending_transactions = [p for p in self.pending_transactions if p['id'] != tx['id']]
-
-                        # Broadcast
-                        proto_block = temp_block.to_proto(self.node_id)
-                        threading.Thread(target=self.broadcast_block, args=(proto_block,)).start()
-                    
-                    break # Restart loop for next block
-                
-                new_nonce += 1
-                if new_nonce % 10000 == 0:
-                     # Yield to allow thread switch or event check
-                     time.sleep(0.001)
+            logging.info(f"Block {template.index} mined! Hash: {template.hash.hex()}")
+            self.log_event("Block Mined", block=template.index, hash=template.hash.hex())
+            BLOCKS_MINED.labels('extended').inc()
+            self.commit_block(template)
+            self.chain.prune()
+            self.validator.mark_verified(template)
+
+            # Broadcast
+            self.broadcast_block(template)
+        self.tracer.block_mined(template)
+        return True
+
+    def close(self):
+        # After mining and the RPC server have stopped
+        self.sync.close()
+        self.validator.close()
+        self.miner.shutdown()
+        self.gossip.close()
+        self.broadcaster.close()
+        self.peer_pool.close()
+        with self.lock:
+            self.chain.close()
+        self.state.close()
+        self.events.close()
+        self.tracer.close()
 
 def serve():
     node_id = os.environ.get('NODE_ID', 'node_1')
@@ -205,12 +729,28 @@ def serve():
     peers_str = os.environ.get('PEERS', '') # Comma separated
     peers = [p for p in peers_str.split(',') if p]
     
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    node = BlockchainNode(node_id, port, peers)
+    node = BlockchainNode(node_id, port, peers, data_dir=DATA_DIR, log_dir=LOG_DIR)
+    if METRICS_PORT:
+        try:
+            start_http_server(METRICS_PORT)
+        except OSError as e:
+            # Metrics are optional, the node runs without the endpoint (GetStats still works)
+            logging.error(f"Metrics endpoint disabled, cannot listen on port {METRICS_PORT}: {e}")
+    if SERVER_MODE == 'aio':
+        try:
+            asyncio.run(serve_aio(node, port, STREAM_CHUNK_SIZE, RPC_WORKERS))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=RPC_WORKERS))
     pb2_grpc.add_BlockchainNodeServicer_to_server(node, server)
     server.add_insecure_port(f'[::]:{port}')
     server.start()
     
+    # Catch up with peers (e.g. after a restart), then keep checking their tips
+    node.sync.start()
+
     # Start mining thread
     miner_thread = threading.Thread(target=node.mine)
     miner_thread.start()
@@ -221,13 +761,9 @@ def serve():
     except KeyboardInterrupt:
         server.stop(0)
         node.stop_event.set()
+        node.mining_event.set()
         miner_thread.join()
+        node.close()
 
 if __name__ == '__main__':
-    # Initialize logs file header if not exists (only by one node or setup script)
-    # Ideally should be done by orchestrator, but we can check if empty
-    if not os.path.exists(LOG_FILE):
-         # This is racey in docker, but let's assume orchestrator handles or we append
-         pass
-         
     serve()
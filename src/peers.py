@@ -0,0 +1,119 @@
+import logging
+import threading
+
+import grpc
+import protos.blockchain_pb2_grpc as pb2_grpc
+from src.clock import SYSTEM_CLOCK
+from src.metrics import REGISTRY
+
+# Keepalive pings detect dead connections between messages; reconnect backoff
+# is left to the channel itself so a restarted peer is picked up again.
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 10000),
+    ('grpc.keepalive_timeout_ms', 5000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.initial_reconnect_backoff_ms', 200),
+    ('grpc.max_reconnect_backoff_ms', 5000),
+]
+
+CALL_SECONDS = REGISTRY.histogram('peer_call_seconds', 'Unary calls to peers, including failed ones', ('method',))
+FAILURES = REGISTRY.counter('peer_failures_total', 'Failed calls and streams per peer', ('peer',))
+
+
+class Peer:
+    def __init__(self, address):
+        self.address = address
+        self.channel = grpc.insecure_channel(address, options=CHANNEL_OPTIONS)
+        self.stub = pb2_grpc.BlockchainNodeStub(self.channel)
+        self.failures = 0  # Consecutive failed calls
+        self.down_until = 0.0
+        self.last_error = ""
+        self.sent = 0  # Calls and streams attempted, failed ones included
+        self.failed = 0
+
+    def health(self, now):
+        return {
+            'address': self.address, 'up': self.failures == 0,
+            'failures': self.failures, 'sent': self.sent, 'failed': self.failed,
+            'retry_in': max(0.0, self.down_until - now), 'last_error': self.last_error,
+        }
+
+
+class PeerPool:
+    """One long-lived channel and stub per peer, shared by every broadcast.
+
+    A failed call marks the peer down for an exponentially growing backoff
+    (capped at max_backoff); while it is down the peer is skipped instead of
+    timing out on every message. The first call after the backoff is the probe.
+    """
+
+    def __init__(self, addresses, timeout=2.0, base_backoff=0.5, max_backoff=30.0, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.peers = {a: Peer(a) for a in addresses}
+
+    def __iter__(self):
+        return iter(self.peers.values())
+
+    def available(self):
+        now = self.clock.now()
+        return [p for p in self.peers.values() if p.down_until <= now]
+
+    def call(self, peer, method, request, timeout=None, metadata=None):
+        """Unary call on a peer's stub; returns the response, or None if it failed."""
+        self.attempted(peer)
+        try:
+            with CALL_SECONDS.labels(method).time():
+                response = getattr(peer.stub, method)(request, timeout=timeout or self.timeout,
+                                                      metadata=metadata)
+        except grpc.RpcError as e:
+            self.mark_failed(peer, e)
+            return None
+        self.mark_ok(peer)
+        return response
+
+    def stream(self, peer, method, request, timeout=None):
+        """Server-streaming call collected into a list, or None if it failed midway."""
+        self.attempted(peer)
+        try:
+            responses = list(getattr(peer.stub, method)(request, timeout=timeout or self.timeout))
+        except grpc.RpcError as e:
+            self.mark_failed(peer, e)
+            return None
+        self.mark_ok(peer)
+        return responses
+
+    def attempted(self, peer):
+        with self.lock:
+            peer.sent += 1
+
+    def mark_ok(self, peer):
+        with self.lock:
+            if peer.failures:
+                logging.info(f"Peer {peer.address} is back up")
+            peer.failures = 0
+            peer.down_until = 0.0
+
+    def mark_failed(self, peer, error):
+        FAILURES.labels(peer.address).inc()
+        with self.lock:
+            peer.failures += 1
+            peer.failed += 1
+            peer.last_error = error.code().name if hasattr(error, 'code') else str(error)
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (peer.failures - 1))
+            peer.down_until = self.clock.now() + backoff
+            if peer.failures == 1:
+                logging.warning(f"Peer {peer.address} unreachable ({peer.last_error}), backing off")
+
+    def health(self):
+        with self.lock:
+            now = self.clock.now()
+            return [p.health(now) for p in self.peers.values()]
+
+    def close(self):
+        for p in self.peers.values():
+            p.channel.close()
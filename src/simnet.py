@@ -0,0 +1,522 @@
+import heapq
+import random
+import logging
+import itertools
+import threading
+from collections import deque
+from concurrent import futures
+
+from src.peers import Peer, PeerPool
+
+POLL_INTERVAL = 0.01  # Simulated seconds between a simulated miner's abort/refresh checks
+SIM_EPOCH = 1600000000.0  # Wall clock (time()) at simulated second 0
+
+
+class _Waiter:
+    """One suspension of a simulated thread, resumed by a wake-up or its timeout."""
+
+    __slots__ = ('task', 'woken', 'timed_out')
+
+    def __init__(self, task):
+        self.task = task
+        self.woken = False
+        self.timed_out = False
+
+
+class SimThread:
+    """A simulated thread: a real daemon thread that only runs when the scheduler hands it the turn."""
+
+    def __init__(self, clock, target, args, name):
+        self.clock = clock
+        self.target = target
+        self.args = args
+        self.name = name
+        self.turn = threading.Semaphore(0)
+        self.finished = clock.event()
+        self.error = None
+        self.os_thread = threading.Thread(target=self._main, daemon=True, name=name)
+
+    def _main(self):
+        self.turn.acquire()
+        self.clock.local.task = self
+        try:
+            self.target(*self.args)
+        except BaseException as e:
+            self.error = e
+            if self is not self.clock.main:
+                logging.exception(f"Simulated thread {self.name} failed")
+        finally:
+            self.finished.set()
+            self.clock.baton.release()
+
+    def join(self, timeout=None):
+        self.finished.wait(timeout)
+
+    def is_alive(self):
+        return not self.finished.is_set()
+
+
+class SimEvent:
+    """threading.Event on a SimClock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.flag = False
+        self.waiters = []
+
+    def is_set(self):
+        return self.flag
+
+    def set(self):
+        self.flag = True
+        waiters, self.waiters = self.waiters, []
+        for waiter in waiters:
+            self.clock._wake(waiter)
+
+    def clear(self):
+        self.flag = False
+
+    def wait(self, timeout=None):
+        if self.flag:
+            return True
+        waiter = self.clock._waiter()
+        self.waiters.append(waiter)
+        self.clock._suspend(waiter, timeout)
+        if waiter.timed_out:
+            self.waiters.remove(waiter)
+            return self.flag
+        return True
+
+
+class SimCondition:
+    """threading.Condition on a SimClock.
+
+    Only one simulated thread runs at a time and none is suspended inside
+    the with block except in wait(), so the lock is never contended.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.waiters = deque()
+
+    def __enter__(self):
+        return self.lock.__enter__()
+
+    def __exit__(self, *exc):
+        return self.lock.__exit__(*exc)
+
+    def wait(self, timeout=None):
+        waiter = self.clock._waiter()
+        self.waiters.append(waiter)
+        self.lock.release()
+        try:
+            self.clock._suspend(waiter, timeout)
+        finally:
+            self.lock.acquire()
+        if waiter.timed_out:
+            self.waiters.remove(waiter)
+            return False
+        return True
+
+    def notify(self, n=1):
+        for _ in range(min(n, len(self.waiters))):
+            self.clock._wake(self.waiters.popleft())
+
+    def notify_all(self):
+        self.notify(len(self.waiters))
+
+
+class SimFuture:
+    """The part of concurrent.futures.Future that node code uses, waiting on a SimClock."""
+
+    def __init__(self, clock):
+        self.done_event = clock.event()
+        self.state = 'pending'
+        self.value = None
+        self.error = None
+
+    def cancel(self):
+        if self.state != 'pending':
+            return self.state == 'cancelled'
+        self.state = 'cancelled'
+        self.done_event.set()
+        return True
+
+    def start(self):
+        # False if it was cancelled before a worker got to it
+        if self.state != 'pending':
+            return False
+        self.state = 'running'
+        return True
+
+    def finish(self, value=None, error=None):
+        self.state, self.value, self.error = 'finished', value, error
+        self.done_event.set()
+
+    def done(self):
+        return self.done_event.is_set()
+
+    def result(self, timeout=None):
+        self.done_event.wait(timeout)
+        if self.state == 'cancelled':
+            raise futures.CancelledError()
+        if self.state != 'finished':
+            raise futures.TimeoutError()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class SimExecutor:
+    """ThreadPoolExecutor on a SimClock: up to workers simulated threads drain the submitted calls in order."""
+
+    def __init__(self, clock, workers, name):
+        self.clock = clock
+        self.workers = workers
+        self.name = name
+        self.queue = deque()
+        self.active = 0
+
+    def submit(self, fn, *args, **kwargs):
+        future = SimFuture(self.clock)
+        self.queue.append((future, fn, args, kwargs))
+        if self.active < self.workers:
+            self.active += 1
+            self.clock.thread(self._work, name=f"{self.name}-{self.active}")
+        return future
+
+    def _work(self):
+        while self.queue:
+            future, fn, args, kwargs = self.queue.popleft()
+            if not future.start():
+                continue
+            try:
+                future.finish(fn(*args, **kwargs))
+            except Exception as e:
+                future.finish(error=e)
+        self.active -= 1
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            while self.queue:
+                self.queue.popleft()[0].cancel()
+
+
+class SimClock:
+    """Discrete-event clock and scheduler for an in-process network.
+
+    Every node thread (broadcast senders, gossip, sync, mining and the
+    driver) is a SimThread, and only one of them runs at a time: a thread
+    runs until it waits, on simulated time (sleep_until, a timeout) or on a
+    SimEvent or SimCondition, then hands the turn to the waiting thread with
+    the earliest wake-up time, ties going to whichever was woken first.
+    Node code takes no simulated time, so message order, mining, timers and
+    timeouts depend only on the seeds and two runs with the same seeds
+    produce identical results.
+    """
+
+    def __init__(self, epoch=SIM_EPOCH):
+        self.epoch = epoch
+        self.current = 0.0
+        self.ready = []  # Heap of (time, seq, waiter, is_timeout)
+        self.seq = itertools.count()
+        self.baton = threading.Semaphore(0)  # Released by a simulated thread when it gives up the turn
+        self.local = threading.local()
+        self.main = None
+
+    # --- Clock interface (src.clock.Clock) ---
+    def now(self):
+        return self.current
+
+    def time(self):
+        return self.epoch + self.current
+
+    def thread(self, target, *args, name=None):
+        task = SimThread(self, target, args, name or "sim")
+        self._push(self.current, _Waiter(task))
+        task.os_thread.start()
+        return task
+
+    def event(self):
+        return SimEvent(self)
+
+    def condition(self):
+        return SimCondition(self)
+
+    def executor(self, workers, name):
+        return SimExecutor(self, workers, name)
+
+    # --- Simulation control ---
+    def sleep_until(self, at):
+        self._suspend(self._waiter(), max(at - self.current, 0.0))
+
+    def run(self, main, *args):
+        """Runs main(*args) as a simulated thread until it returns; returns its result."""
+        result = []
+        self.main = self.thread(lambda: result.append(main(*args)), name="sim-main")
+        while not self.main.finished.is_set():
+            if not self.ready:
+                raise RuntimeError("Simulation deadlocked: every thread is waiting without a timeout")
+            at, _, waiter, is_timeout = heapq.heappop(self.ready)
+            if is_timeout:
+                if waiter.woken:
+                    continue
+                waiter.woken = waiter.timed_out = True
+            self.current = max(self.current, at)
+            waiter.task.turn.release()
+            self.baton.acquire()
+        if self.main.error is not None:
+            raise self.main.error
+        return result[0]
+
+    # --- Scheduler internals ---
+    def _push(self, at, waiter, is_timeout=False):
+        heapq.heappush(self.ready, (at, next(self.seq), waiter, is_timeout))
+
+    def _waiter(self):
+        task = getattr(self.local, 'task', None)
+        if task is None:
+            raise RuntimeError("Simulated waits are only possible on a SimClock thread")
+        return _Waiter(task)
+
+    def _wake(self, waiter):
+        if not waiter.woken:
+            waiter.woken = True
+            self._push(self.current, waiter)
+
+    def _suspend(self, waiter, timeout=None):
+        if timeout is not None:
+            self._push(self.current + timeout, waiter, is_timeout=True)
+        self.baton.release()
+        waiter.task.turn.acquire()
+
+
+class Link:
+    """One direction of a connection between two nodes.
+
+    A message waits for the messages queued ahead of it to be serialized at
+    bandwidth bytes/s, then takes latency seconds (plus up to jitter) to
+    arrive, or is lost with probability loss. Each link draws from its own
+    seeded generator, so its delays do not depend on traffic elsewhere.
+    """
+
+    def __init__(self, latency, jitter, bandwidth, loss, seed):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.busy_until = 0.0
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+        self.lost = 0
+
+    def send(self, now, size):
+        """Simulated arrival time of a size-byte message sent at now, or None if it is lost."""
+        with self.lock:
+            self.messages += 1
+            self.bytes += size
+            if self.loss and self.rng.random() < self.loss:
+                self.lost += 1
+                return None
+            start = max(now, self.busy_until)
+            self.busy_until = start + (size / self.bandwidth if self.bandwidth else 0.0)
+            return self.busy_until + self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+
+class SimNetwork:
+    """In-memory stand-in for the gRPC network between BlockchainNode instances.
+
+    Nodes are registered by address; SimPeerPool calls a peer's servicer
+    method directly once the link delay has passed in simulated time. Every
+    ordered pair of addresses gets its own Link with the same parameters.
+    """
+
+    def __init__(self, seed=0, latency=0.01, jitter=0.0, bandwidth=0, loss=0.0, clock=None):
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.loss = loss
+        self.clock = clock or SimClock()
+        self.nodes = {}
+        self.links = {}
+        self.lock = threading.Lock()
+
+    def register(self, address, node):
+        self.nodes[address] = node
+
+    def link(self, source, target):
+        with self.lock:
+            link = self.links.get((source, target))
+            if link is None:
+                link = Link(self.latency, self.jitter, self.bandwidth, self.loss,
+                            f"{self.seed}:{source}->{target}")
+                self.links[(source, target)] = link
+            return link
+
+    def stats(self):
+        with self.lock:
+            links = list(self.links.values())
+        return {'messages': sum(l.messages for l in links), 'bytes': sum(l.bytes for l in links),
+                'lost': sum(l.lost for l in links)}
+
+
+class SimPeer(Peer):
+    def __init__(self, address):
+        # Peer's bookkeeping without the channel and stub
+        self.address = address
+        self.failures = 0
+        self.down_until = 0.0
+        self.last_error = ""
+        self.sent = 0
+        self.failed = 0
+
+
+class MessageLost(Exception):
+    pass
+
+
+class SimContext:
+    """The part of a gRPC servicer context the node reads: call metadata."""
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+
+    def invocation_metadata(self):
+        return self.metadata
+
+
+class SimPeerPool(PeerPool):
+    """PeerPool over a SimNetwork: same backoff bookkeeping, no channels.
+
+    A lost request or response counts as a failed call after the pool's
+    timeout has passed in simulated time, as a dropped gRPC call would.
+    """
+
+    def __init__(self, network, origin, addresses, timeout=2.0, base_backoff=0.5, max_backoff=30.0):
+        self.network = network
+        self.clock = network.clock
+        self.origin = origin
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.peers = {a: SimPeer(a) for a in addresses}
+
+    def _exchange(self, peer, method, request, timeout, metadata=None):
+        clock = self.network.clock
+        sent_at = clock.now()
+        arrival = self.network.link(self.origin, peer.address).send(sent_at, request.ByteSize())
+        if arrival is None:
+            clock.sleep_until(sent_at + (timeout or self.timeout))
+            raise MessageLost("simulated loss")
+        clock.sleep_until(arrival)
+        context = SimContext(metadata) if metadata else None
+        response = getattr(self.network.nodes[peer.address], method)(request, context)
+        return response, sent_at
+
+    def _reply(self, peer, size, sent_at, timeout):
+        clock = self.network.clock
+        arrival = self.network.link(peer.address, self.origin).send(clock.now(), size)
+        if arrival is None:
+            clock.sleep_until(sent_at + (timeout or self.timeout))
+            raise MessageLost("simulated loss")
+        clock.sleep_until(arrival)
+
+    def call(self, peer, method, request, timeout=None, metadata=None):
+        self.attempted(peer)
+        try:
+            response, sent_at = self._exchange(peer, method, request, timeout, metadata)
+            self._reply(peer, response.ByteSize(), sent_at, timeout)
+        except MessageLost as e:
+            self.mark_failed(peer, e)
+            return None
+        self.mark_ok(peer)
+        return response
+
+    def stream(self, peer, method, request, timeout=None):
+        self.attempted(peer)
+        try:
+            responses, sent_at = self._exchange(peer, method, request, timeout)
+            responses = list(responses)
+            self._reply(peer, sum(r.ByteSize() for r in responses), sent_at, timeout)
+        except MessageLost as e:
+            self.mark_failed(peer, e)
+            return None
+        self.mark_ok(peer)
+        return responses
+
+    def close(self):
+        pass
+
+
+class SimulatedMiner:
+    """Mining-rate model with ParallelMiner's search() interface.
+
+    Instead of hashing until a nonce meets the target, each search waits an
+    exponentially distributed time with mean block_time simulated seconds
+    (memoryless, so template refreshes do not reset it), then grinds the few
+    nonces an easy simulation target needs for a genuinely valid block.
+    abort_event must be an event of the same SimClock.
+    """
+
+    workers = 1
+
+    def __init__(self, clock, block_time, seed=0):
+        self.clock = clock
+        self.block_time = block_time
+        self.rng = random.Random(seed)
+
+    def search(self, template, abort_event, refresh=None):
+        found_at = self.clock.now() + self.rng.expovariate(1.0 / self.block_time)
+        while not abort_event.is_set():
+            remaining = found_at - self.clock.now()
+            if remaining <= 0:
+                return self.solve(template)
+            abort_event.wait(min(remaining, POLL_INTERVAL))
+            if refresh is not None:
+                template = refresh() or template
+        return None
+
+    @staticmethod
+    def solve(template):
+        for nonce in range(2 ** 31):
+            digest = template.digest(nonce)
+            if int.from_bytes(digest, 'big') <= template.target:
+                return template, nonce, digest
+        return None
+
+    def shutdown(self):
+        pass
+
+
+class EventRecorder:
+    """Collects a node's log events in memory, stamped with simulated time.
+
+    Stands in for EventLogger; records are the same (time, node, event,
+    fields) a per-node log file would hold.
+    """
+
+    def __init__(self, clock, node_id, sink, lock):
+        self.clock = clock
+        self.node_id = node_id
+        self.sink = sink
+        self.lock = lock
+        self.logged = 0
+
+    def log(self, event, **fields):
+        record = {'time': self.clock.now(), 'node': self.node_id, 'event': event}
+        record.update(fields)
+        with self.lock:
+            self.sink.append(record)
+            self.logged += 1
+
+    def stats(self):
+        # Same keys as EventLogger.stats(); nothing is queued or dropped in memory
+        return {'path': None, 'queued': 0, 'logged': self.logged, 'dropped': 0}
+
+    def close(self):
+        pass
@@ -0,0 +1,167 @@
+import os
+import json
+import logging
+import threading
+
+AMOUNT_SCALE = 10 ** 6  # Balances are integer micro-units so undo exactly reverses apply
+
+
+def to_units(amount):
+    return round(amount * AMOUNT_SCALE)
+
+
+def parse_allocations(spec):
+    """"alice=100,bob=5.5" -> {account: units}."""
+    allocations = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        account, _, amount = item.partition('=')
+        allocations[account.strip()] = to_units(float(amount))
+    return allocations
+
+
+class InsufficientFunds(Exception):
+    def __init__(self, block, tx):
+        super().__init__(f"{tx.sender} cannot pay {tx.amount} in tx {tx.id} of block {block.index}")
+        self.block = block
+        self.tx = tx
+
+
+class AccountState:
+    """Confirmed balance of every account at the active tip.
+
+    Applying a block debits each sender and credits each receiver in block
+    order, and fails (leaving the table untouched) if a sender would go
+    negative. Undo is the same transfers reversed, so both are O(transactions
+    in the block) and a reorg costs only the blocks it swaps. With a path, a
+    snapshot of the table is written every snapshot_interval heights so a
+    restart replays only the blocks after it. One writer thread writes the
+    snapshots in order; if several are taken before it gets to them, only
+    the newest is written.
+    """
+
+    def __init__(self, allocations, path=None, snapshot_interval=1000):
+        self.allocations = dict(allocations)
+        self.balances = dict(allocations)
+        self.height = 0
+        self.tip_hash = None
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.pending = None  # Newest snapshot not yet written
+        self.wakeup = threading.Condition()
+        self.closed = False
+        self.writer = None
+        if path:
+            self.writer = threading.Thread(target=self._run, daemon=True, name="state-snapshot")
+            self.writer.start()
+
+    def balance(self, account):
+        return self.balances.get(account, 0)
+
+    def _move(self, sender, receiver, units):
+        balances = self.balances
+        remaining = balances.get(sender, 0) - units
+        if remaining:
+            balances[sender] = remaining
+        else:
+            balances.pop(sender, None)  # Empty accounts leave the table
+        credited = balances.get(receiver, 0) + units
+        if credited:
+            balances[receiver] = credited
+        else:
+            balances.pop(receiver, None)
+
+    def apply(self, block):
+        applied = []
+        for tx in block.transactions:
+            units = to_units(tx.amount)
+            if self.balances.get(tx.sender, 0) < units:
+                for done, done_units in reversed(applied):
+                    self._move(done.receiver, done.sender, done_units)
+                raise InsufficientFunds(block, tx)
+            self._move(tx.sender, tx.receiver, units)
+            applied.append((tx, units))
+        self.height, self.tip_hash = block.index, block.hash
+
+    def undo(self, block):
+        for tx in reversed(list(block.transactions)):
+            self._move(tx.receiver, tx.sender, to_units(tx.amount))
+        self.height, self.tip_hash = block.index - 1, block.previous_hash
+
+    def switch(self, disconnected, connected):
+        """Undoes disconnected (oldest first) and applies connected, all or nothing.
+
+        Raises InsufficientFunds naming the first block that overspends, with
+        the table restored to where it started.
+        """
+        for block in reversed(disconnected):
+            self.undo(block)
+        applied = []
+        try:
+            for block in connected:
+                self.apply(block)
+                applied.append(block)
+        except InsufficientFunds:
+            for block in reversed(applied):
+                self.undo(block)
+            for block in disconnected:
+                self.apply(block)
+            raise
+        if self.path and connected and any(b.index % self.snapshot_interval == 0 for b in connected):
+            self.save_snapshot()
+
+    # --- Snapshots ---
+    def save_snapshot(self):
+        # Copied under the caller's lock, written by the writer thread
+        data = {'height': self.height, 'hash': self.tip_hash.hex(), 'balances': dict(self.balances)}
+        with self.wakeup:
+            self.pending = data
+            self.wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self.wakeup:
+                while self.pending is None and not self.closed:
+                    self.wakeup.wait()
+                data, self.pending = self.pending, None
+            if data is None:
+                return  # Closed with nothing left to write
+            self._write(data)
+
+    def _write(self, data):
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)  # Never leaves a half-written snapshot behind
+        except OSError as e:
+            logging.error(f"Failed to write state snapshot: {e}")
+
+    def close(self):
+        # Writes a snapshot still waiting, then stops the writer
+        with self.wakeup:
+            self.closed = True
+            self.wakeup.notify()
+        if self.writer is not None:
+            self.writer.join()
+
+    def load(self, chain):
+        """Rebuilds the table for chain's active tip from the newest usable snapshot."""
+        start = 0
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                height = data['height']
+                # A snapshot of a branch that was later reorged away is useless
+                if height < len(chain) and chain.hash_at(height).hex() == data['hash']:
+                    self.balances = data['balances']
+                    start = height
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Ignoring state snapshot: {e}")
+        if not start:
+            self.balances = dict(self.allocations)
+        self.height, self.tip_hash = start, chain.hash_at(start)
+        for height in range(start + 1, len(chain)):
+            self.apply(chain[height])
+        if len(chain) - 1 - start:
+            logging.info(f"State replayed {len(chain) - 1 - start} blocks from height {start}")
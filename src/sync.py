@@ -0,0 +1,156 @@
+import logging
+
+import protos.blockchain_pb2 as pb2
+from src.model import hash_from_hex
+
+# check_header_chain() result when our own chain left the fork point, not the peer's fault
+FORK_MOVED = "fork point left the active chain"
+
+
+class SyncManager:
+    """Catches the node up with the heaviest chain among its peers.
+
+    A round asks every reachable peer for its tip. If one has more total work,
+    the manager binary-searches the fork point with single-header requests,
+    pages through the peer's headers from there (replies are capped per
+    request) and checks their linkage and PoW. Block bodies are then streamed in fixed-size ranges from every peer that
+    is far enough ahead, in parallel. Each range is checked against the
+    headers as soon as it arrives, while later ranges are still downloading.
+    The node only switches chains once the whole branch is valid and still heavier.
+    """
+
+    def __init__(self, node, interval=5.0, chunk_size=500, workers=4, timeout=30.0):
+        self.node = node
+        self.peer_pool = node.peer_pool
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.pool = node.clock.executor(workers, "sync")
+        self.wakeup = node.clock.event()
+        self.closed = False
+        self.thread = None
+
+    def start(self):
+        self.thread = self.node.clock.thread(self._run, name="sync")
+
+    def request_sync(self):
+        # Called when a block arrives whose parent we don't have
+        self.wakeup.set()
+
+    def _run(self):
+        while not self.closed and not self.node.stop_event.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                logging.error(f"Chain sync failed: {e}")
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+
+    def sync_once(self):
+        """One catch-up round; returns True if the node switched to a heavier chain."""
+        tips = self.peer_tips()
+        local_work = self.node.tip_work()
+        ahead = [(p, t) for p, t in tips if int(t.total_work) > local_work]
+        if not ahead:
+            return False
+        best_peer, best_tip = max(ahead, key=lambda pt: int(pt[1].total_work))
+        found = self.find_fork_point(best_peer, best_tip.index)
+        if found is None:
+            return False
+        fork, fork_hash = found
+        headers = self.paged(best_peer, 'GetHeaders', fork + 1, best_tip.index)
+        if headers is None:
+            return False  # The call failed; the pool backs the peer off
+        if not headers:
+            logging.info(f"Peer {best_peer.address} has no headers past {fork} any more, retrying next round")
+            return False
+        reason = self.node.check_header_chain(fork, fork_hash, headers)
+        if reason == FORK_MOVED:
+            logging.info(f"Chain moved during sync with {best_peer.address}, retrying")
+            self.wakeup.set()
+            return False
+        if reason:
+            logging.warning(f"Peer {best_peer.address} served an invalid header chain: {reason}")
+            self.peer_pool.mark_failed(best_peer, f"invalid header chain: {reason}")
+            return False
+        sources = [p for p, t in ahead if t.index >= best_tip.index] or [best_peer]
+        blocks = self.download(headers, sources, best_peer)
+        if blocks is None:
+            return False
+        return self.node.switch_chain(fork, blocks)
+
+    def peer_tips(self):
+        peers = self.peer_pool.available()
+        calls = [self.pool.submit(self.peer_pool.call, p, 'GetTip', pb2.TipRequest()) for p in peers]
+        return [(p, f.result()) for p, f in zip(peers, calls) if f.result() is not None]
+
+    def find_fork_point(self, peer, peer_height):
+        # (height, our hash there) of the highest block both chains hold; genesis always matches
+        lo, hi = 0, min(peer_height, self.node.tip_height())
+        lo_hash = self.node.block_hash_at(0)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            header = self.stream(peer, 'GetHeaders', pb2.BlockRange(start=mid, end=mid))
+            if not header:
+                return None
+            ours = self.node.block_hash_at(mid)
+            if ours is not None and hash_from_hex(header[0].hash) == ours:
+                lo, lo_hash = mid, ours
+            else:
+                hi = mid - 1
+        return lo, lo_hash
+
+    def download(self, headers, sources, fallback):
+        ranges = [headers[i:i + self.chunk_size] for i in range(0, len(headers), self.chunk_size)]
+        jobs = [self.pool.submit(self.fetch_range, sources[i % len(sources)], r[0].index, r[-1].index)
+                for i, r in enumerate(ranges)]
+        blocks = []
+        # Validate in order while later ranges are still in flight
+        for job, expected in zip(jobs, ranges):
+            chunk = job.result()
+            if chunk is None or not self.node.valid_blocks(chunk, expected):
+                # Retry once from the peer that served the headers
+                chunk = self.fetch_range(fallback, expected[0].index, expected[-1].index)
+                if chunk is None or not self.node.valid_blocks(chunk, expected):
+                    for j in jobs:
+                        j.cancel()
+                    return None
+            blocks.extend(chunk)
+        return blocks
+
+    def fetch_range(self, peer, start, end):
+        protos = self.paged(peer, 'GetBlocks', start, end)
+        if protos is None or len(protos) != end - start + 1:
+            return None
+        blocks = [self.node.block_from_proto(p) for p in protos]
+        if any(b is None for b in blocks):
+            logging.warning(f"Peer {peer.address} served a malformed block in {start}..{end}")
+            self.peer_pool.mark_failed(peer, "malformed block")
+            return None
+        return blocks
+
+    def paged(self, peer, method, start, end):
+        """Everything in start..end, over as many requests as the peer's reply cap needs; None on failure."""
+        items = []
+        while start <= end:
+            if self.closed:
+                return None
+            page = self.stream(peer, method, pb2.BlockRange(start=start, end=end))
+            if page is None:
+                return None
+            if not page or page[-1].index < start:
+                break  # The peer has nothing more in the range
+            items.extend(page)
+            start = page[-1].index + 1
+        return items
+
+    def stream(self, peer, method, request):
+        return self.peer_pool.stream(peer, method, request, timeout=self.timeout)
+
+    def close(self):
+        # Let the current round finish (it gives up at the next page) before the pool goes away
+        self.closed = True
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.pool.shutdown(cancel_futures=True)
@@ -0,0 +1,54 @@
+import heapq
+
+from src.merkle import MerkleTree
+from src.model import InternalBlock
+
+SELECTION_POLICIES = ('fifo', 'amount')
+
+
+class TemplateBuilder:
+    """Chooses the transactions of the next block from the mempool.
+
+    A block holds at most max_txs transactions and max_bytes of serialized
+    transactions (0 lifts either limit). 'fifo' takes them in arrival order;
+    'amount' takes the largest transfers first, as transactions carry no fee.
+    A sender's pending transactions are covered as a whole by the pool's
+    balance check, so any subset of them is valid in a block.
+    """
+
+    def __init__(self, mempool, max_txs=0, max_bytes=0, policy='fifo'):
+        if policy not in SELECTION_POLICIES:
+            raise ValueError(f"Unknown selection policy {policy!r}, expected one of {SELECTION_POLICIES}")
+        self.mempool = mempool
+        self.max_txs = max_txs
+        self.max_bytes = max_bytes
+        self.policy = policy
+
+    def candidates(self):
+        if self.policy == 'fifo':
+            return iter(self.mempool)
+        if self.max_txs:
+            return iter(heapq.nlargest(self.max_txs, self.mempool, key=lambda tx: tx.amount))
+        return iter(sorted(self.mempool, key=lambda tx: tx.amount, reverse=True))
+
+    def select(self):
+        selected = []
+        size = 0
+        for tx in self.candidates():
+            if self.max_txs and len(selected) >= self.max_txs:
+                break
+            tx_size = len(tx.serialize())
+            if self.max_bytes and size + tx_size > self.max_bytes:
+                continue  # A smaller one further on may still fit
+            selected.append(tx)
+            size += tx_size
+        return selected
+
+    def build(self, parent, bits, timestamp):
+        """Unsolved block on top of parent; caller holds the lock that guards the mempool."""
+        txs = self.select()
+        if len(txs) == len(self.mempool) and self.policy == 'fifo':
+            tree = self.mempool.merkle_tree().copy()  # The whole pool, follows it incrementally
+        else:
+            tree = MerkleTree.from_transactions(txs)  # Leaf hashes are cached on the transactions
+        return InternalBlock(parent.index + 1, parent.hash, timestamp, txs, tree=tree, difficulty=bits)
@@ -0,0 +1,116 @@
+import time
+import zlib
+
+# gRPC metadata keys (lowercase, as gRPC requires)
+TRACE_PARENT = 'trace-parent'  # "<node_id>/<stage>" of the sender's span the message continues
+TRACE_SENT = 'trace-sent-ns'  # Sender wall clock (ns) when the call went out
+
+
+def client_metadata():
+    """Metadata for a client submission, so the node can record the hop from the client."""
+    return ((TRACE_SENT, str(time.time_ns())),)
+
+
+class Incoming:
+    """Trace context read from one incoming call."""
+
+    __slots__ = ('stage', 'parent', 'sent_ns', 'received_ns')
+
+    def __init__(self, stage, parent, sent_ns, received_ns):
+        self.stage = stage  # Name of the hop span this call ends
+        self.parent = parent
+        self.sent_ns = sent_ns
+        self.received_ns = received_ns
+
+
+class Tracer:
+    """Records lifecycle spans for a sampled subset of transactions.
+
+    The trace id is the transaction id and sampling hashes it, so every node
+    picks the same transactions without passing a sampled flag around. A
+    node records each stage of a transaction at most once, which makes
+    "<node_id>/<stage>" a unique span id within a trace; a message carries
+    the sender's span id in its metadata and the receiver's hop span points
+    back to it. Stages: submit (client -> node), gossip (node -> node),
+    mempool (received -> in the pool), include (template built -> block
+    mined) and confirm (block sent -> committed by a peer).
+
+    Span timestamps are wall-clock nanoseconds, so spans from different
+    nodes line up only as well as the nodes' clocks do.
+    """
+
+    def __init__(self, node_id, exporter=None, sample_rate=0.0):
+        self.node_id = node_id
+        self.exporter = exporter  # EventLogger-like: log(event, **fields), close()
+        self.threshold = int(min(max(sample_rate, 0.0), 1.0) * 2 ** 32)
+        self.enabled = exporter is not None and self.threshold > 0
+
+    def sampled(self, tx_id):
+        return zlib.crc32(tx_id.encode()) < self.threshold
+
+    def span_id(self, stage):
+        return f"{self.node_id}/{stage}"
+
+    def metadata(self, stage):
+        """Outgoing metadata continuing this node's span for stage; call right before sending."""
+        if not self.enabled:
+            return None
+        return ((TRACE_PARENT, self.span_id(stage)), (TRACE_SENT, str(time.time_ns())))
+
+    def received(self, context, stage):
+        """Trace context of an incoming call, or None when tracing is off."""
+        if not self.enabled:
+            return None
+        received_ns = time.time_ns()
+        parent = sent_ns = None
+        if context is not None:
+            for key, value in context.invocation_metadata():
+                if key == TRACE_PARENT:
+                    parent = value
+                elif key == TRACE_SENT:
+                    try:
+                        sent_ns = int(value)
+                    except ValueError:
+                        pass  # Malformed header from the caller; the hop span is just left out
+        return Incoming(stage, parent, sent_ns, received_ns)
+
+    def span(self, trace, stage, start_ns, end_ns, parent=None, **attrs):
+        self.exporter.log("Span", trace=trace, span=self.span_id(stage), parent=parent, stage=stage,
+                          start_ns=start_ns, end_ns=end_ns, **attrs)
+
+    def transactions_added(self, tx_ids, incoming):
+        """Hop and mempool spans for newly pooled transactions."""
+        if incoming is None:
+            return
+        now = time.time_ns()
+        for tx_id in tx_ids:
+            if not self.sampled(tx_id):
+                continue
+            parent = None
+            if incoming.sent_ns is not None:
+                self.span(tx_id, incoming.stage, incoming.sent_ns, incoming.received_ns, incoming.parent)
+                parent = self.span_id(incoming.stage)
+            self.span(tx_id, 'mempool', incoming.received_ns, now, parent)
+
+    def block_mined(self, block):
+        """include spans, from the winning template's build time to now."""
+        if not self.enabled:
+            return
+        start, now, hash_hex = int(block.timestamp * 1e9), time.time_ns(), block.hash.hex()
+        for tx in block.transactions:
+            if self.sampled(tx.id):
+                self.span(tx.id, 'include', start, now, self.span_id('mempool'), block=block.index, hash=hash_hex)
+
+    def block_committed(self, block, incoming):
+        """confirm spans for a relayed block that became part of the active chain."""
+        if incoming is None:
+            return
+        now, hash_hex = time.time_ns(), block.hash.hex()
+        start = incoming.sent_ns if incoming.sent_ns is not None else incoming.received_ns
+        for tx in block.transactions:
+            if self.sampled(tx.id):
+                self.span(tx.id, incoming.stage, start, now, incoming.parent, block=block.index, hash=hash_hex)
+
+    def close(self):
+        if self.exporter is not None:
+            self.exporter.close()
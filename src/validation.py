@@ -0,0 +1,295 @@
+import math
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent import futures
+
+from src.merkle import MerkleTree, HASH_SIZE
+from src.model import InternalBlock, Transaction, TransactionList, block_hash, hash_from_hex
+from src.difficulty import valid_bits, meets_target
+
+MAX_FUTURE_BLOCK_TIME = 2 * 60 * 60  # Seconds a timestamp may run ahead of our clock
+MAX_FIELD_BYTES = 256  # Longest tx id / sender / receiver accepted
+PARALLEL_MIN_TXS = 1000  # Blocks with at least this many txs are checked on the process pool
+
+
+class BlockRejected(Exception):
+    """A block failed validation; the message goes back in the Ack.
+
+    cacheable is False when the failure says nothing about the block itself
+    (a body that does not match its header, a parent we have not seen yet).
+    """
+
+    def __init__(self, message, cacheable=True):
+        super().__init__(message)
+        self.cacheable = cacheable
+
+
+class KnownBlock(BlockRejected):
+    pass
+
+
+class UnknownParent(BlockRejected):
+    def __init__(self, message):
+        super().__init__(message, cacheable=False)
+
+
+class LRUCache:
+    """Bounded, locked mapping; the least recently used key falls out first."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.items:
+                return default
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.items
+
+    def put(self, key, value=None):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+
+
+def oversized(tx):
+    """True if a field is certainly over MAX_FIELD_BYTES, judged by characters.
+
+    Serialization (and so tx.hash) cannot pack a field over 64 KiB, so this
+    runs before anything hashes a transaction from a peer or client.
+    """
+    return max(len(tx.id), len(tx.sender), len(tx.receiver)) > MAX_FIELD_BYTES
+
+
+def check_transaction(tx, now=None):
+    """Stateless rules for a single transaction; returns the reason it is invalid, or None."""
+    if not tx.id or not tx.sender or not tx.receiver:
+        return "empty id, sender or receiver"
+    if max(len(tx.id.encode()), len(tx.sender.encode()), len(tx.receiver.encode())) > MAX_FIELD_BYTES:
+        return "field too long"
+    if not math.isfinite(tx.amount) or tx.amount <= 0:
+        return "amount must be positive"
+    if not math.isfinite(tx.timestamp) or tx.timestamp > (now or time.time()) + MAX_FUTURE_BLOCK_TIME:
+        return "timestamp in the future"
+    return None
+
+
+def _check_records(data, count, now):
+    """Pool worker: checks count packed transaction records.
+
+    Returns (first reason found or None, tx ids, concatenated leaf hashes).
+    """
+    ids, leaves = [], []
+    offset = 0
+    for _ in range(count):
+        start = offset
+        tx, offset = Transaction.parse(data, offset)
+        reason = check_transaction(tx, now)
+        if reason:
+            return f"{tx.id}: {reason}", None, None
+        ids.append(tx.id)
+        leaves.append(hashlib.sha256(data[start:offset]).digest())
+    return None, ids, b''.join(leaves)
+
+
+class BlockValidator:
+    """Staged block validation that runs outside the chain lock.
+
+    Stages, cheapest first: header sanity, hash recomputation and PoW, parent
+    linkage and the required difficulty, transaction checks (which also
+    compute the leaf hashes), and the Merkle commitment. Blocks with at
+    least PARALLEL_MIN_TXS transactions are checked on a process pool,
+    since the checks are pure Python and threads would share one GIL: the
+    packed records are split into one byte range per worker, so the calling
+    thread does no per-transaction work. Smaller blocks are checked in one
+    pass on the calling thread. Only the linkage lookup
+    reads the chain, through node.header_context(). Outcomes are cached by
+    block hash, so a block relayed by several peers is verified once; copies
+    that arrive while the first is still being checked wait for its result.
+    Transactions verified on intake or in an earlier block are skipped.
+    """
+
+    def __init__(self, node, workers=0, cache_size=10000):
+        self.node = node
+        self.workers = workers
+        self.pool = None
+        if workers:
+            # spawn keeps the workers clear of the gRPC threads living in the parent
+            self.pool = futures.ProcessPoolExecutor(max_workers=workers,
+                                                    mp_context=multiprocessing.get_context('spawn'))
+        self.blocks = LRUCache(cache_size)  # block hash -> None if valid, else the rejection reason
+        self.txs = LRUCache(cache_size * 10)  # leaf hashes of transactions that passed check_transaction
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def validate(self, header, load_txs):
+        """Runs every stage for a block header (any proto with the Block header fields).
+
+        load_txs() supplies the body once the header has passed, so a compact
+        block only fetches missing transactions for a plausible block. Returns
+        the InternalBlock, or raises BlockRejected.
+        """
+        hash_val = hash_from_hex(header.hash)
+        if hash_val is None:
+            raise BlockRejected("Malformed block hash")
+        while True:
+            reason = self.blocks.get(hash_val, False)
+            if reason is None:
+                raise KnownBlock("Block already verified")
+            if reason:
+                raise BlockRejected(reason)
+            with self.lock:
+                pending = self.inflight.get(hash_val)
+                if pending is None:
+                    self.inflight[hash_val] = owner = self.node.clock.event()
+                    break
+            # Same block from another peer is being checked, reuse its outcome
+            pending.wait()
+        try:
+            block = self._run(header, hash_val, load_txs)
+            self.blocks.put(hash_val, None)
+            return block
+        except KnownBlock:
+            self.blocks.put(hash_val, None)
+            raise
+        except BlockRejected as e:
+            if e.cacheable:
+                self.blocks.put(hash_val, str(e))
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[hash_val]
+            owner.set()
+
+    def _run(self, header, hash_val, load_txs):
+        # 1. Header sanity. Until the hash is recomputed these fields are not
+        # known to belong to hash_val, so failures here are not cached
+        previous_hash, merkle_root = hash_from_hex(header.previous_hash), hash_from_hex(header.merkle_root)
+        if previous_hash is None or merkle_root is None:
+            raise BlockRejected("Malformed block header", cacheable=False)
+        if header.index < 1 or not valid_bits(header.difficulty):
+            raise BlockRejected("Invalid block index or difficulty", cacheable=False)
+        if not math.isfinite(header.timestamp) or header.timestamp > self.node.clock.time() + MAX_FUTURE_BLOCK_TIME:
+            raise BlockRejected("Block timestamp in the future", cacheable=False)
+
+        # 2. Hash recomputation and PoW
+        if block_hash(header.index, previous_hash, header.timestamp, merkle_root,
+                      header.difficulty, header.nonce) != hash_val:
+            raise BlockRejected("Block hash mismatch", cacheable=False)
+        if not meets_target(hash_val, header.difficulty):
+            raise BlockRejected("Invalid PoW")
+
+        # 3. Parent linkage and the difficulty the parent's branch requires
+        known, parent, bits = self.node.header_context(hash_val, previous_hash)
+        if known:
+            raise KnownBlock("Block already exists")
+        if parent is None:
+            raise UnknownParent("Unknown parent, syncing")
+        if header.index != parent.index + 1:
+            raise BlockRejected("Invalid block index")
+        if header.difficulty != bits:
+            raise BlockRejected("Invalid difficulty")
+
+        # 4. Transactions. A field too long to serialize leaves no root to compare,
+        # so that failure says nothing about the block itself either
+        txs = list(load_txs())
+        if any(oversized(t) for t in txs):
+            raise BlockRejected("Invalid transaction: field too long", cacheable=False)
+        if self.pool is not None and len(txs) >= PARALLEL_MIN_TXS:
+            txs = TransactionList.pack(txs)
+            reason, leaves = self._check_parallel(txs)
+            tree = MerkleTree(leaves) if leaves is not None else MerkleTree.from_transactions(txs)
+        else:
+            reason = self.check_transactions(txs)
+            tree = MerkleTree.from_transactions(txs)
+
+        # 5. Merkle commitment; a body that does not match says nothing about the block itself
+        if tree.root() != merkle_root:
+            raise BlockRejected("Invalid merkle root", cacheable=False)
+        if reason:
+            raise BlockRejected(f"Invalid transaction: {reason}")
+
+        return InternalBlock(header.index, previous_hash, header.timestamp, txs, header.nonce, hash_val,
+                             tree, header.difficulty, header.miner_id)
+
+    def check_transactions(self, txs):
+        """Checks a block's transactions; returns the first reason found, or None.
+
+        A large TransactionList (a stored or synced block) goes to the pool.
+        """
+        if self.pool is not None and isinstance(txs, TransactionList) and len(txs) >= PARALLEL_MIN_TXS:
+            return self._check_parallel(txs)[0]
+        txs = list(txs)
+        if len({t.id for t in txs}) != len(txs):
+            return "duplicate transaction id"
+        now = self.node.clock.time()
+        for tx in txs:
+            if oversized(tx):
+                return "field too long"
+            leaf = tx.hash  # Computed and cached here, the Merkle stage reuses it
+            if leaf in self.txs:
+                continue
+            reason = check_transaction(tx, now)
+            if reason:
+                return f"{tx.id}: {reason}"
+            self.txs.put(leaf)
+        return None
+
+    def verify_transaction(self, tx):
+        """Intake check for a single transaction; returns the reason it is invalid, or None.
+
+        A transaction that passes is remembered, so its block skips the check.
+        """
+        if oversized(tx):
+            return "field too long"
+        if tx.hash in self.txs:
+            return None
+        reason = check_transaction(tx, self.node.clock.time())
+        if reason is None:
+            self.txs.put(tx.hash)
+        return reason
+
+    def _check_parallel(self, packed):
+        """(first reason or None, leaf hashes or None) for a TransactionList, one byte range per worker."""
+        count, now = len(packed), self.node.clock.time()
+        step = -(-count // self.workers)
+        jobs = []
+        for first in range(0, count, step):
+            last = min(first + step, count)
+            end = packed.offsets[last] if last < count else len(packed.data)
+            jobs.append(self.pool.submit(_check_records, packed.data[packed.offsets[first]:end], last - first, now))
+        ids, leaves = [], []
+        for job in jobs:
+            reason, chunk_ids, chunk_leaves = job.result()
+            if reason:
+                for j in jobs:
+                    j.cancel()
+                return reason, None
+            ids.extend(chunk_ids)
+            leaves.extend(chunk_leaves[i:i + HASH_SIZE] for i in range(0, len(chunk_leaves), HASH_SIZE))
+        if len(set(ids)) != count:
+            return "duplicate transaction id", None
+        return None, leaves
+
+    def reject(self, block, reason):
+        # Failed a stateful check at commit time, e.g. an overspend
+        self.blocks.put(block.hash, reason)
+
+    def mark_verified(self, block):
+        # Blocks we mined or synced and checked another way
+        self.blocks.put(block.hash, None)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
@@ -3,18 +3,79 @@ import matplotlib.pyplot as plt
 import sys
 import os
 import json  # <--- Tambahan untuk fitur history
+from merge_logs import merge
 
 LOG_FILE = "logs/simulation_data.csv"
 HISTORY_FILE = "logs/benchmark_history.json" # <--- File database history
+LATENCY_FILE = "logs/latency_per_block.csv"  # Distribusi latency per blok
+CHUNK_SIZE = 500000  # Baris CSV yang dibaca per chunk, agar log besar tetap muat di memori
+PERCENTILES = [0.5, 0.95, 0.99]
+
+COLUMNS = ["Timestamp", "NodeID", "Event", "Details"]
+
+
+def load_events(path, chunksize=CHUNK_SIZE):
+    """Baca log per chunk dan simpan hanya kolom yang dipakai analisis.
+
+    Mengembalikan DataFrame ringkas: event blok (dengan Hash/Relay/Bytes sudah
+    diparse), transaksi (Timestamp + Details unik), plus ringkasan seluruh log.
+    """
+    blocks, txs = [], []
+    summary = {"start": None, "end": None, "nodes": set(), "rows": 0}
+    for chunk in pd.read_csv(path, names=COLUMNS, chunksize=chunksize):
+        summary["rows"] += len(chunk)
+        summary["nodes"].update(chunk["NodeID"].dropna().unique())
+        start, end = chunk["Timestamp"].min(), chunk["Timestamp"].max()
+        summary["start"] = start if summary["start"] is None else min(summary["start"], start)
+        summary["end"] = end if summary["end"] is None else max(summary["end"], end)
+
+        tx = chunk[chunk["Event"].str.contains("Transaction", case=False, na=False)]
+        txs.append(tx[["Timestamp", "Details"]].drop_duplicates("Details"))
+
+        # Details: "Block <i> Hash <h> [Relay <full|compact> Missing <n> Bytes <b>]"
+        block = chunk[chunk["Event"].isin(["Block Mined", "Block Received"])]
+        fields = block["Details"].str.extract(r"Hash (?P<Hash>\S+)(?:.*?Relay (?P<Relay>\S+))?(?:.*?Bytes (?P<Bytes>\d+))?")
+        blocks.append(pd.concat([block[["Timestamp", "NodeID", "Event"]], fields], axis=1))
+
+    blocks = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(columns=["Timestamp", "NodeID", "Event", "Hash", "Relay", "Bytes"])
+    blocks = blocks.dropna(subset=["Hash"])
+    blocks["Relay"] = blocks["Relay"].fillna("full")
+    blocks["Bytes"] = pd.to_numeric(blocks["Bytes"])
+    txs = pd.concat(txs, ignore_index=True).drop_duplicates("Details") if txs else pd.DataFrame(columns=["Timestamp", "Details"])
+    return blocks, txs, summary
+
+
+def propagation_latencies(blocks):
+    """Satu baris per penerimaan blok: waktu terima dikurangi waktu blok itu ditambang."""
+    mined = blocks[blocks["Event"] == "Block Mined"].groupby("Hash", as_index=False)["Timestamp"].min()
+    received = blocks[blocks["Event"] == "Block Received"]
+    joined = received.merge(mined, on="Hash", suffixes=("", "Mined"))
+    joined["Latency"] = joined["Timestamp"] - joined["TimestampMined"]
+    return joined[joined["Latency"] > 0]
+
+
+def distribution(latencies, by):
+    """Jumlah, rata-rata, p50/p95/p99 dan maksimum latency per kelompok."""
+    grouped = latencies.groupby(by)["Latency"]
+    stats = grouped.agg(["count", "mean", "max"])
+    quantiles = grouped.quantile(PERCENTILES).unstack()
+    quantiles.columns = [f"p{int(q * 100)}" for q in quantiles.columns]
+    return stats.join(quantiles)[["count", "mean", "p50", "p95", "p99", "max"]]
+
 
 def analyze():
+    # 0. Gabungkan log event per node (events_*.jsonl) ke format CSV lama, jika ada yang baru
+    merged = merge()
+    if merged:
+        print(f"[*] {merged} event digabung ke {LOG_FILE}")
+
     # 1. Cek File
     if not os.path.exists(LOG_FILE):
         print(f"File log tidak ditemukan di: {LOG_FILE}")
         return
 
     try:
-        df = pd.read_csv(LOG_FILE, names=["Timestamp", "NodeID", "Event", "Details"])
+        blocks, tx_logs, summary = load_events(LOG_FILE)
     except Exception as e:
         print(f"Error membaca CSV: {e}")
         return
@@ -23,20 +84,20 @@ def analyze():
     print(f"   ANALISIS PERFORMA BLOCKCHAIN (METODE ACTIVE WINDOW)")
     print(f"{'='*50}")
 
-    if df.empty:
+    if not summary["rows"]:
         print("Data kosong.")
         return
 
     # Hitung Jumlah Node Aktif (Penting untuk Key Database)
-    active_nodes = df["NodeID"].nunique()
+    active_nodes = len(summary["nodes"])
     print(f"Jumlah Node Terdeteksi       : {active_nodes} Node")
 
     # --- BAGIAN 1: DATA MENTAH & MINING ---
-    start_sim = df["Timestamp"].min()
-    end_sim = df["Timestamp"].max()
+    start_sim = summary["start"]
+    end_sim = summary["end"]
     total_duration = end_sim - start_sim
     
-    mined_blocks = df[df["Event"] == "Block Mined"]
+    mined_blocks = blocks[blocks["Event"] == "Block Mined"]
     total_blocks = len(mined_blocks)
     
     # Block Throughput
@@ -48,16 +109,14 @@ def analyze():
     print(f"{'-'*50}")
 
     # --- BAGIAN 2: TRANSAKSI & TPS (LOGIKA BARU) ---
-    tx_logs = df[df["Event"].str.contains("Transaction", case=False, na=False)]
-    
     # Inisialisasi variabel default agar tidak error jika kosong
     real_tps = 0
     tx_duration = 0
     unique_tx_count = 0
 
     if not tx_logs.empty:
-        # A. Hitung Jumlah Transaksi Unik
-        unique_tx_count = tx_logs["Details"].nunique()
+        # A. Hitung Jumlah Transaksi Unik (sudah dideduplikasi saat dibaca)
+        unique_tx_count = len(tx_logs)
         
         # B. Tentukan 'Active Window'
         tx_start_time = tx_logs["Timestamp"].min()
@@ -83,21 +142,33 @@ def analyze():
     print(f"{'-'*50}")
 
     # --- BAGIAN 3: LATENCY (PROPAGASI) ---
-    df["Hash"] = df["Details"].apply(lambda x: x.split("Hash ")[1] if isinstance(x, str) and "Hash " in x else None)
-    mined_events = df[df["Event"] == "Block Mined"].dropna(subset=["Hash"])
-    received_events = df[df["Event"] == "Block Received"].dropna(subset=["Hash"])
-    
-    latencies = []
-    for _, mined in mined_events.iterrows():
-        block_hash = mined["Hash"]
-        mine_time = mined["Timestamp"]
-        receptions = received_events[received_events["Hash"] == block_hash]
-        for _, rx in receptions.iterrows():
-            latency = rx["Timestamp"] - mine_time
-            if latency > 0: latencies.append(latency)
-                
-    avg_latency = sum(latencies) / len(latencies) if latencies else 0
+    latencies = propagation_latencies(blocks)
+    avg_latency = latencies["Latency"].mean() if not latencies.empty else 0
     print(f"Rata-rata Latency Propagasi      : {avg_latency:.6f} detik")
+
+    if not latencies.empty:
+        q = latencies["Latency"].quantile(PERCENTILES)
+        print(f"Latency p50 / p95 / p99 / max    : {q[0.5]:.6f} / {q[0.95]:.6f} / "
+              f"{q[0.99]:.6f} / {latencies['Latency'].max():.6f} detik")
+
+        # Distribusi per node penerima
+        print("Latency per node (detik):")
+        print(distribution(latencies, "NodeID").to_string(float_format=lambda v: f"{v:.6f}"))
+
+        # Distribusi per blok disimpan ke CSV, yang paling lambat ditampilkan
+        per_block = distribution(latencies, "Hash").sort_values("max", ascending=False)
+        per_block.to_csv(LATENCY_FILE)
+        print(f"Blok paling lambat menyebar (dari {len(per_block)} blok, detail di {LATENCY_FILE}):")
+        print(per_block.head(5).to_string(float_format=lambda v: f"{v:.6f}"))
+
+    # Perbandingan relay blok penuh vs compact block (latency & ukuran pesan)
+    received_events = blocks[blocks["Event"] == "Block Received"]
+    relay_bytes = received_events.groupby("Relay")["Bytes"].mean()
+    for mode, stats in latencies.groupby("Relay")["Latency"].agg(["count", "mean"]).iterrows():
+        avg_bytes = relay_bytes.get(mode, 0)
+        avg_bytes = 0 if pd.isna(avg_bytes) else avg_bytes
+        print(f"  Relay {mode:<8}: {int(stats['count'])} blok, latency {stats['mean']:.6f} detik, "
+              f"rata-rata {avg_bytes:.0f} byte/blok")
     print(f"{'='*50}")
 
     # --- BAGIAN 4: SIMPAN KE DATABASE JSON (FITUR BARU) ---
@@ -136,7 +207,7 @@ def analyze():
     # --- BAGIAN 5: PLOTTING ---
     if not mined_blocks.empty:
         plt.figure(figsize=(10, 6))
-        mined_blocks = mined_blocks.sort_values("Timestamp")
+        mined_blocks = mined_blocks.sort_values("Timestamp").copy()
         mined_blocks["Elapsed"] = mined_blocks["Timestamp"] - start_sim
         mined_blocks["BlockCount"] = range(1, len(mined_blocks) + 1)
         plt.plot(mined_blocks["Elapsed"], mined_blocks["BlockCount"])
@@ -0,0 +1,130 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.model import Transaction, InternalBlock
+from src.difficulty import leading_zeros_bits
+
+
+def legacy_tx_hash(tx):
+    return hashlib.sha256(json.dumps(tx, sort_keys=True).encode()).digest()
+
+
+# Merkle tree lama (src/merkle.py sebelum model compact): setiap level disimpan
+# sebagai list digest, node terakhir level ganjil dipasangkan dengan dirinya
+class LegacyMerkleTree:
+    def __init__(self, leaves):
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            self.levels.append([hashlib.sha256(level[i] + level[min(i + 1, len(level) - 1)]).digest()
+                                for i in range(0, len(level), 2)])
+
+    def root(self):
+        return self.levels[-1][0].hex() if self.levels[0] else "0" * 64
+
+
+# Representasi lama: dict per transaksi, hash hex, blok dengan __dict__
+class LegacyBlock:
+    def __init__(self, index, previous_hash, timestamp, transactions, nonce=0):
+        self.index = index
+        self.previous_hash = previous_hash
+        self.timestamp = timestamp
+        self.transactions = transactions
+        self.tree = LegacyMerkleTree(legacy_tx_hash(t) for t in transactions)
+        self.merkle_root = self.tree.root()
+        self.nonce = nonce
+        self.hash = hashlib.sha256(f"{index}{previous_hash}{timestamp}{self.merkle_root}{nonce}".encode()).hexdigest()
+        self.chain_work = 0
+        self.difficulty = 4
+        self.miner_id = ""
+
+
+def make_tx_fields(i):
+    return str(uuid.uuid4()), "Client", f"User_{i % 100}", float(i % 1000), time.time()
+
+
+def build_legacy(blocks, txs_per_block):
+    chain = []
+    prev = "0" * 64
+    for b in range(blocks):
+        txs = []
+        for i in range(txs_per_block):
+            tx_id, sender, receiver, amount, ts = make_tx_fields(i)
+            txs.append({'id': tx_id, 'sender': sender, 'receiver': receiver, 'amount': amount, 'timestamp': ts})
+        block = LegacyBlock(b + 1, prev, time.time(), txs)
+        chain.append(block)
+        prev = block.hash
+    return chain
+
+
+def build_compact(blocks, txs_per_block):
+    chain = []
+    prev = bytes(32)
+    for b in range(blocks):
+        txs = [Transaction(*make_tx_fields(i)) for i in range(txs_per_block)]
+        block = InternalBlock(b + 1, prev, time.time(), txs, difficulty=leading_zeros_bits(4))
+        chain.append(block)
+        prev = block.hash
+    return chain
+
+
+# Transaksi pending di mempool tetap berupa objek (dict vs slotted + leaf hash)
+def build_legacy_pending(blocks, txs_per_block):
+    pending = {}
+    for i in range(blocks * txs_per_block):
+        tx_id, sender, receiver, amount, ts = make_tx_fields(i)
+        tx = {'id': tx_id, 'sender': sender, 'receiver': receiver, 'amount': amount, 'timestamp': ts}
+        pending[tx_id] = (tx, legacy_tx_hash(tx))
+    return pending
+
+
+def build_compact_pending(blocks, txs_per_block):
+    pending = {}
+    for i in range(blocks * txs_per_block):
+        tx = Transaction(*make_tx_fields(i))
+        tx.hash  # Leaf hash di-cache di objek
+        pending[tx.id] = tx
+    return pending
+
+
+def measure(builder, blocks, txs_per_block):
+    tracemalloc.start()
+    data = builder(blocks, txs_per_block)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan memori model blok/transaksi lama vs compact")
+    parser.add_argument('--blocks', type=int, default=200, help="Jumlah blok")
+    parser.add_argument('--txs', type=int, default=100, help="Transaksi per blok")
+    args = parser.parse_args()
+
+    total_txs = args.blocks * args.txs
+    print(f"[*] {args.blocks} blok x {args.txs} transaksi ({total_txs} transaksi)")
+    for label, legacy, compact in (("Chain", build_legacy, build_compact),
+                                   ("Mempool", build_legacy_pending, build_compact_pending)):
+        print(f"\n--- {label} ---")
+        results = {}
+        for name, builder in (("legacy", legacy), ("compact", compact)):
+            current, peak = measure(builder, args.blocks, args.txs)
+            results[name] = current
+            print(f"{name:>8}: {current / 1024:10.1f} KiB total | "
+                  f"{current / args.blocks:10.1f} B/blok | {current / total_txs:8.1f} B/transaksi | "
+                  f"peak {peak / 1024:.1f} KiB")
+        saved = 1 - results["compact"] / results["legacy"]
+        print(f"[*] Penghematan memori: {saved:.1%}")
+
+
+if __name__ == '__main__':
+    main()
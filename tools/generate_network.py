@@ -25,6 +25,7 @@ def generate_compose(num_nodes):
       - PYTHONUNBUFFERED=1
     volumes:
       - ./logs:/logs
+      - ./data/{node_id}:/data
     networks:
       - blockchain-net
 """
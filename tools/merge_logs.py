@@ -0,0 +1,94 @@
+import argparse
+import csv
+import glob
+import heapq
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.eventlog import legacy_details
+
+LOG_DIR = "logs"
+OUTPUT_FILE = "logs/simulation_data.csv"
+
+
+REORDER_WINDOW = 10000  # Event yang ditahan per file untuk merapikan urutan waktu antar thread penulis
+
+
+def read_events(path, window=REORDER_WINDOW):
+    """Event dari satu file node, urut waktu, dibaca baris per baris.
+
+    Thread penulis di satu node bisa sedikit tidak urut, jadi setiap event
+    ditahan di heap berukuran window dan yang tertua dikeluarkan lebih dulu;
+    memori tetap terbatas berapa pun besar filenya. Baris terakhir yang
+    belum lengkap dilewati.
+    """
+    pending = []
+    with open(path) as f:
+        for seq, line in enumerate(f):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            heapq.heappush(pending, (event["time"], seq, event))
+            if len(pending) > window:
+                yield heapq.heappop(pending)[2]
+    while pending:
+        yield heapq.heappop(pending)[2]
+
+
+def up_to_date(files, output):
+    """True jika output lebih baru dari semua file log, jadi tidak perlu digabung ulang."""
+    try:
+        built = os.path.getmtime(output)
+    except OSError:
+        return False
+    return all(os.path.getmtime(path) <= built for path in files)
+
+
+def merge(log_dir=LOG_DIR, output=OUTPUT_FILE, force=False):
+    """Gabungkan events_<node>.jsonl menjadi CSV format lama (Timestamp, NodeID, Event, Details).
+
+    k-way merge atas iterator per file, ditulis langsung ke CSV tanpa
+    memuat seluruh event ke memori. Mengembalikan jumlah event yang ditulis,
+    0 jika tidak ada log, atau None jika CSV sudah lebih baru dari semua
+    log (kecuali force).
+    """
+    files = sorted(glob.glob(os.path.join(log_dir, "events_*.jsonl")))
+    if not files:
+        return 0
+    if not force and up_to_date(files, output):
+        return None
+    count = 0
+    # Ditulis ke file sementara dulu, agar CSV yang setengah jadi tidak dianggap sudah terbaru
+    partial = output + ".tmp"
+    with open(partial, "w", newline="") as f:
+        writer = csv.writer(f)
+        for event in heapq.merge(*(read_events(path) for path in files), key=lambda e: e["time"]):
+            writer.writerow([event["time"], event["node"], event["event"], legacy_details(event)])
+            count += 1
+    os.replace(partial, output)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gabungkan log event per node menjadi simulation_data.csv")
+    parser.add_argument("--log-dir", default=LOG_DIR, help="folder berisi events_<node>.jsonl")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="file CSV hasil gabungan")
+    parser.add_argument("--force", action="store_true", help="gabungkan ulang walau CSV sudah terbaru")
+    args = parser.parse_args()
+
+    count = merge(args.log_dir, args.output, args.force)
+    if count is None:
+        print(f"[*] {args.output} sudah lebih baru dari semua log, tidak digabung ulang (pakai --force)")
+        return
+    if not count:
+        print(f"Tidak ada log event di: {args.log_dir}")
+        return
+    print(f"[*] {count} event digabung ke {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Difficulty kecil: waktu blok ditentukan model mining, bukan hashing sungguhan.
+# Harus diset sebelum src.node diimpor karena dibaca saat import.
+os.environ.setdefault('DIFFICULTY', '1')
+os.environ.setdefault('RETARGET_WINDOW', '0')
+# Puluhan node dalam satu proses: cek transaksi tanpa process pool per node
+os.environ.setdefault('VALIDATION_WORKERS', '0')
+
+import protos.blockchain_pb2 as pb2
+from src.node import BlockchainNode, PEER_RPC_TIMEOUT
+from src.simnet import SimClock, SimNetwork, SimPeerPool, SimulatedMiner, EventRecorder
+
+HISTORY_FILE = "logs/benchmark_history.json"
+SUBMIT_BATCH = 100  # Transaksi per SubmitTransactionBatch dari klien simulasi
+CHECK_INTERVAL = 0.05  # Jeda (detik simulasi) antar cek apakah simulasi selesai
+
+
+def make_txs(rng, count, now):
+    # Sama seperti client.py, tapi id, nominal, dan timestamp dari generator ber-seed dan jam simulasi
+    return [pb2.Transaction(id=str(uuid.UUID(int=rng.getrandbits(128))), sender="Client",
+                            receiver=f"Recipient_{rng.randint(1, 100)}", amount=rng.uniform(1, 100),
+                            timestamp=now)
+            for _ in range(count)]
+
+
+def start_network(clock, num_nodes, args):
+    network = SimNetwork(args.seed, args.latency, args.jitter, args.bandwidth, args.loss, clock)
+    records, lock = [], threading.Lock()
+    addresses = [f"node_{i}:50051" for i in range(1, num_nodes + 1)]
+    nodes = []
+    for address in addresses:
+        node_id = address.split(":")[0]
+        peers = [a for a in addresses if a != address]
+        # Setiap node mendapat 1/num_nodes hashrate, jadi jaringan tetap 1 blok per block_time
+        node = BlockchainNode(node_id, "50051", peers, address=address,
+                              peer_pool=SimPeerPool(network, address, peers, timeout=PEER_RPC_TIMEOUT),
+                              miner=SimulatedMiner(clock, args.block_time * num_nodes, f"{args.seed}:{node_id}"),
+                              events=EventRecorder(clock, node_id, records, lock), clock=clock)
+        network.register(address, node)
+        nodes.append(node)
+    threads = []
+    for node in nodes:
+        node.sync.start()
+        threads.append(clock.thread(node.mine, name=f"mine-{node.node_id}"))
+    return network, nodes, threads, records, lock
+
+
+def stop_network(nodes, threads):
+    for node in nodes:
+        node.stop_event.set()
+        node.mining_event.set()
+    for t in threads:
+        t.join()
+    # Sync semua node dihentikan dulu, karena sync satu node memanggil node lain secara langsung
+    for node in nodes:
+        node.sync.close()
+    for node in nodes:
+        node.validator.close()
+        node.gossip.close()
+        node.broadcaster.close()
+        with node.lock:
+            node.chain.close()
+
+
+def settled(nodes, tx_ids):
+    # Setiap node sudah mengenal semua transaksi (lewat gossip atau lewat blok)
+    # dan chain aktifnya sudah memuat semuanya
+    return all(not len(node.mempool) and not node.seen.missing(tx_ids) for node in nodes)
+
+
+def summarize(records):
+    """Metrik dengan definisi yang sama seperti analyze_results.py, dalam waktu simulasi."""
+    tx_events = [r for r in records if r["event"] == "Transaction Received"]
+    unique_tx_count = len({r["tx"] for r in tx_events})
+    tx_duration = 0.0
+    if tx_events:
+        tx_duration = max(r["time"] for r in tx_events) - min(r["time"] for r in tx_events)
+        if tx_duration <= 0.0001:
+            tx_duration = 1.0
+    mined = {}
+    for r in records:
+        if r["event"] == "Block Mined":
+            mined.setdefault(r["hash"], r["time"])
+    latencies = [r["time"] - mined[r["hash"]] for r in records
+                 if r["event"] == "Block Received" and r["hash"] in mined and r["time"] > mined[r["hash"]]]
+    return {
+        "duration": tx_duration,
+        "throughput": unique_tx_count / tx_duration if tx_duration else 0.0,
+        "latency": sum(latencies) / len(latencies) if latencies else 0.0,
+        "tx_count": unique_tx_count,
+        "blocks": len(mined),
+    }
+
+
+def run(num_nodes, args):
+    """Satu run di jam simulasi sendiri; seed yang sama selalu memberi hasil yang sama."""
+    clock = SimClock()
+    started = time.monotonic()
+    result = clock.run(simulate_network, clock, num_nodes, args)
+    result["wall_time"] = time.monotonic() - started
+    return result
+
+
+def simulate_network(clock, num_nodes, args):
+    # Berjalan sebagai thread simulasi: setiap tunggu memajukan jam simulasi
+    rng = random.Random(f"{args.seed}:workload")
+    network, nodes, threads, records, lock = start_network(clock, num_nodes, args)
+    try:
+        txs = make_txs(rng, args.txs, clock.time())
+        submit_at = clock.now()
+        for i in range(0, len(txs), SUBMIT_BATCH):
+            if args.tx_rate:
+                clock.sleep_until(submit_at + i / args.tx_rate)
+            nodes[0].SubmitTransactionBatch(pb2.TransactionBatch(transactions=txs[i:i + SUBMIT_BATCH]), None)
+
+        tx_ids = [t.id for t in txs]
+        while clock.now() < args.max_time:
+            if settled(nodes, tx_ids):
+                break
+            clock.sleep_until(clock.now() + CHECK_INTERVAL)
+        else:
+            print(f"[!] {num_nodes} node belum konvergen setelah {args.max_time:.0f} detik simulasi")
+        sim_time = clock.now()
+    finally:
+        stop_network(nodes, threads)
+
+    with lock:
+        result = summarize(records)
+    result.update(nodes=num_nodes, sim_time=sim_time, **network.stats())
+    return result
+
+
+def save_history(results, path):
+    data_history = {}
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                data_history = json.load(f)
+        except (OSError, ValueError):
+            data_history = {}
+    for r in results:
+        data_history[str(r["nodes"])] = {
+            "nodes": int(r["nodes"]),
+            "duration": float(r["duration"]),
+            "throughput": float(r["throughput"]),
+            "latency": float(r["latency"]),
+            "tx_count": int(r["tx_count"]),
+        }
+    with open(path, "w") as f:
+        json.dump(data_history, f, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulasi jaringan blockchain dalam satu proses (tanpa Docker/gRPC)")
+    parser.add_argument("--nodes", default="1,2,4,8", help="daftar jumlah node, dipisah koma (mis. 1,2,4,8,16,32,64)")
+    parser.add_argument("--txs", type=int, default=1000, help="jumlah transaksi per run")
+    parser.add_argument("--tx-rate", type=float, default=0, help="transaksi per detik simulasi (0 = kirim sekaligus)")
+    parser.add_argument("--seed", type=int, default=42, help="seed untuk transaksi, link, dan model mining")
+    parser.add_argument("--latency", type=float, default=0.01, help="latency satu arah per link (detik)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="tambahan latency acak maksimum (detik)")
+    parser.add_argument("--bandwidth", type=float, default=0, help="bandwidth per link (byte/detik, 0 = tak terbatas)")
+    parser.add_argument("--loss", type=float, default=0.0, help="peluang pesan hilang per link (0-1)")
+    parser.add_argument("--block-time", type=float, default=1.0, help="rata-rata waktu blok jaringan (detik simulasi)")
+    parser.add_argument("--max-time", type=float, default=120.0, help="batas waktu per run (detik simulasi)")
+    parser.add_argument("--history", default=HISTORY_FILE, help="file history untuk plot_comparison.py")
+    parser.add_argument("--verbose", action="store_true", help="tampilkan log INFO dari setiap node")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for num_nodes in (int(n) for n in args.nodes.split(",") if n):
+        r = run(num_nodes, args)
+        results.append(r)
+        print(f"{num_nodes:>3} node | {r['tx_count']} tx dalam {r['duration']:.3f} detik "
+              f"({r['throughput']:.1f} TPS) | latency {r['latency'] * 1000:.1f} ms | {r['blocks']} blok | "
+              f"{r['messages']} pesan, {r['lost']} hilang | simulasi {r['sim_time']:.1f} detik, "
+              f"wall {r['wall_time']:.1f} detik")
+
+    os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+    save_history(results, args.history)
+    print(f"[*] Hasil disimpan ke {args.history}")
+
+
+if __name__ == '__main__':
+    main()
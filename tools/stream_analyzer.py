@@ -0,0 +1,212 @@
+import argparse
+import bisect
+import glob
+import json
+import os
+import time
+
+LOG_DIR = "logs"
+CHECKPOINT_FILE = "logs/stream_checkpoint.json"
+WINDOW = 10.0  # Lebar jendela TPS (detik)
+READ_CHUNK = 1 << 20  # Byte per pembacaan file log, memori tetap kecil untuk log besar
+# Batas atas bucket histogram latency (ms); bucket terakhir = di atas batas tertinggi
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class StreamAnalyzer:
+    """Agregat berjalan dari log event per node (events_<node>.jsonl).
+
+    Setiap file dibaca mulai dari offset byte terakhir, hanya sampai baris
+    lengkap terakhir, jadi log yang masih ditulis node bisa dibaca berulang.
+    Semua agregat berukuran kecil (per jendela, per blok, per bucket) dan
+    disimpan bersama offset ke checkpoint, sehingga run berikutnya hanya
+    memproses data baru.
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.offsets = state.get("offsets", {})
+        # Jendela waktu -> node -> jumlah transaksi diterima. Tiap node menerima
+        # setiap transaksi sekali, jadi TPS jaringan = node dengan jumlah terbanyak
+        self.windows = state.get("windows", {})
+        self.tx_totals = state.get("tx_totals", {})
+        self.mined = state.get("mined", {})  # hash -> [waktu, tinggi], tambang paling awal
+        self.pending = state.get("pending", {})  # hash -> waktu terima, blok tambangnya belum terbaca
+        self.histogram = state.get("histogram", [0] * (len(LATENCY_BUCKETS_MS) + 1))
+        self.latency_sum = state.get("latency_sum", 0.0)
+        self.latency_max = state.get("latency_max", 0.0)
+        self.reorgs = state.get("reorgs", 0)
+        self.events = state.get("events", 0)
+
+    # --- Checkpoint ---
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Checkpoint diabaikan ({e}), mulai dari awal")
+            return cls()
+
+    def save(self, path):
+        state = {
+            "offsets": self.offsets, "windows": self.windows, "tx_totals": self.tx_totals,
+            "mined": self.mined, "pending": self.pending, "histogram": self.histogram,
+            "latency_sum": self.latency_sum, "latency_max": self.latency_max,
+            "reorgs": self.reorgs, "events": self.events,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)  # Checkpoint lama tetap utuh jika proses berhenti di tengah
+
+    # --- Membaca log ---
+    def consume(self, log_dir):
+        """Proses semua baris baru di log_dir; mengembalikan jumlah event baru."""
+        count = 0
+        for path in sorted(glob.glob(os.path.join(log_dir, "events_*.jsonl"))):
+            count += self.consume_file(path)
+        return count
+
+    def consume_file(self, path):
+        offset = self.offsets.get(path, 0)
+        if os.path.getsize(path) < offset:
+            offset = 0  # File dibuat ulang (simulasi baru), baca dari awal
+        count = 0
+        carry = b""  # Potongan baris terakhir chunk sebelumnya
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                data = carry + chunk
+                end = data.rfind(b"\n") + 1
+                carry = data[end:]
+                for line in data[:end].splitlines():
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.handle(event)
+                    count += 1
+                offset += end
+        # Baris terakhir yang belum lengkap (carry) ditunggu run berikutnya
+        self.offsets[path] = offset
+        self.events += count
+        return count
+
+    def handle(self, event):
+        kind = event.get("event")
+        if kind == "Transaction Received":
+            window = str(int(event["time"] // WINDOW * WINDOW))
+            per_node = self.windows.setdefault(window, {})
+            per_node[event["node"]] = per_node.get(event["node"], 0) + 1
+            self.tx_totals[event["node"]] = self.tx_totals.get(event["node"], 0) + 1
+        elif kind == "Block Mined":
+            known = self.mined.get(event["hash"])
+            if known is None or event["time"] < known[0]:
+                self.mined[event["hash"]] = [event["time"], event["block"]]
+            for received in self.pending.pop(event["hash"], []):
+                self.record_latency(received - event["time"])
+        elif kind == "Block Received":
+            mined = self.mined.get(event["hash"])
+            if mined is None:
+                # File node penambang belum sampai ke blok ini
+                self.pending.setdefault(event["hash"], []).append(event["time"])
+            else:
+                self.record_latency(event["time"] - mined[0])
+        elif kind == "Chain Reorg":
+            self.reorgs += 1
+
+    def record_latency(self, latency):
+        if latency <= 0:
+            return
+        ms = latency * 1000
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    # --- Ringkasan ---
+    def tps(self, window):
+        per_node = self.windows.get(window, {})
+        return max(per_node.values(), default=0) / WINDOW
+
+    def latency_percentile(self, q):
+        """Batas atas bucket (ms) yang memuat persentil q; None jika di atas bucket tertinggi."""
+        total = sum(self.histogram)
+        if not total:
+            return 0
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= q * total:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def block_intervals(self):
+        # Waktu tambang paling awal per tinggi; selisih antar tinggi berurutan
+        first = {}
+        for mined_at, height in self.mined.values():
+            if height not in first or mined_at < first[height]:
+                first[height] = mined_at
+        heights = sorted(first)
+        return [first[b] - first[a] for a, b in zip(heights, heights[1:]) if b == a + 1]
+
+    def orphans(self):
+        # Blok yang ditambang di tinggi yang sudah punya blok lain
+        return len(self.mined) - len({height for _, height in self.mined.values()})
+
+    def report(self, recent=3):
+        lines = []
+        windows = sorted(self.windows, key=float)
+        total_txs = max(self.tx_totals.values(), default=0)
+        lines.append(f"Event diproses: {self.events} | Transaksi unik: {total_txs} | "
+                     f"Blok: {len(self.mined)} | Orphan: {self.orphans()} | Reorg: {self.reorgs}")
+        if windows:
+            recent_tps = ", ".join(f"{self.tps(w):.1f}" for w in windows[-recent:])
+            peak = max(self.tps(w) for w in windows)
+            lines.append(f"TPS per {WINDOW:.0f} detik (terakhir): {recent_tps} | puncak {peak:.1f}")
+        intervals = self.block_intervals()
+        if intervals:
+            lines.append(f"Interval blok: rata-rata {sum(intervals) / len(intervals):.3f} detik, "
+                         f"terakhir {intervals[-1]:.3f} detik")
+        received = sum(self.histogram)
+        if received:
+            def fmt(q):
+                bound = self.latency_percentile(q)
+                return f"> {LATENCY_BUCKETS_MS[-1]}" if bound is None else f"<= {bound}"
+            lines.append(f"Latency propagasi: rata-rata {self.latency_sum / received * 1000:.1f} ms, "
+                         f"p50 {fmt(0.5)} ms, p95 {fmt(0.95)} ms, p99 {fmt(0.99)} ms, "
+                         f"max {self.latency_max * 1000:.1f} ms ({received} penerimaan)")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analisis log event secara bertahap (incremental)")
+    parser.add_argument("--log-dir", default=LOG_DIR, help="folder berisi events_<node>.jsonl")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="file checkpoint agregat & offset")
+    parser.add_argument("--reset", action="store_true", help="abaikan checkpoint, proses ulang dari awal")
+    parser.add_argument("--follow", action="store_true", help="mode live: terus baca log baru")
+    parser.add_argument("--interval", type=float, default=5.0, help="jeda antar pembaruan di mode live (detik)")
+    args = parser.parse_args()
+
+    analyzer = StreamAnalyzer() if args.reset else StreamAnalyzer.load(args.checkpoint)
+    try:
+        while True:
+            started = time.time()
+            count = analyzer.consume(args.log_dir)
+            analyzer.save(args.checkpoint)
+            print(f"[{time.strftime('%H:%M:%S')}] +{count} event ({time.time() - started:.2f} detik)")
+            print(analyzer.report())
+            if not args.follow:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        analyzer.save(args.checkpoint)
+
+
+if __name__ == '__main__':
+    main()
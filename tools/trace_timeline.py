@@ -0,0 +1,140 @@
+import argparse
+import csv
+import glob
+import json
+import os
+
+LOG_DIR = "logs"
+OUTPUT_FILE = "logs/trace_critical_path.csv"
+# Urutan segmen critical path; "menunggu X" = jeda antara akhir span induk dan awal span X
+SEGMENTS = ["submit", "mempool", "menunggu gossip", "gossip", "menunggu include", "include",
+            "menunggu confirm", "confirm"]
+
+
+def load_spans(log_dir):
+    """trace (tx id) -> span id -> record, dari semua spans_<node>.jsonl."""
+    traces = {}
+    for path in sorted(glob.glob(os.path.join(log_dir, "spans_*.jsonl"))):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Baris terakhir yang belum selesai ditulis
+                if record.get("event") == "Span":
+                    traces.setdefault(record["trace"], {}).setdefault(record["span"], record)
+    return traces
+
+
+def critical_path(spans):
+    """Rantai span dari akar sampai node terakhir yang mengonfirmasi transaksi.
+
+    Setiap node selesai saat span include (penambang) atau confirm-nya
+    berakhir; node yang paling lambat menentukan ujung critical path, lalu
+    rantai induknya ditelusuri mundur. Mengembalikan (path, lengkap), dengan
+    lengkap = False jika ada span induk yang tidak ada di log.
+    """
+    final = [s for s in spans.values() if s["stage"] in ("include", "confirm")]
+    if not final:
+        return [], False
+    path = [max(final, key=lambda s: s["end_ns"])]
+    while path[-1]["parent"] is not None:
+        parent = spans.get(path[-1]["parent"])
+        if parent is None or parent in path:
+            return path[::-1], False
+        path.append(parent)
+    return path[::-1], True
+
+
+def segments(path):
+    """(label, ms) sepanjang path: durasi tiap span dan jeda sebelum span berikutnya."""
+    result = []
+    previous = None
+    for span in path:
+        # mempool dimulai tepat saat hop sebelumnya diterima, jadi tidak ada jeda
+        if previous is not None and span["stage"] != "mempool":
+            result.append((f"menunggu {span['stage']}", (span["start_ns"] - previous["end_ns"]) / 1e6))
+        result.append((span["stage"], (span["end_ns"] - span["start_ns"]) / 1e6))
+        previous = span
+    return result
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def print_timeline(trace, spans):
+    origin = min(s["start_ns"] for s in spans.values())
+    path, _ = critical_path(spans)
+    on_path = {s["span"] for s in path}
+    print(f"\nTimeline {trace}:")
+    for s in sorted(spans.values(), key=lambda s: (s["start_ns"], s["end_ns"])):
+        mark = "*" if s["span"] in on_path else " "
+        block = f" blok {s['block']}" if "block" in s else ""
+        print(f" {mark} {(s['start_ns'] - origin) / 1e6:>10.1f} ms  +{(s['end_ns'] - s['start_ns']) / 1e6:>9.1f} ms  "
+              f"{s['span']:<24} <- {s['parent'] or '-'}{block}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timeline & critical path transaksi dari span trace per node")
+    parser.add_argument("--log-dir", default=LOG_DIR, help="folder berisi spans_<node>.jsonl")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="CSV critical path per transaksi")
+    parser.add_argument("--tx", action="append", default=[], help="tampilkan timeline transaksi ini (bisa berulang)")
+    parser.add_argument("--slowest", type=int, default=3, help="tampilkan timeline N transaksi paling lambat")
+    args = parser.parse_args()
+
+    traces = load_spans(args.log_dir)
+    if not traces:
+        print(f"[!] Tidak ada span di {args.log_dir}/spans_*.jsonl (aktifkan dengan TRACE_SAMPLE_RATE > 0)")
+        return
+
+    rows = []
+    for trace, spans in traces.items():
+        path, complete = critical_path(spans)
+        if not complete:
+            continue
+        totals = {}
+        for label, ms in segments(path):
+            totals[label] = totals.get(label, 0.0) + ms
+        rows.append({
+            "tx": trace, "entry_node": path[0]["node"], "final_node": path[-1]["node"],
+            "hops": sum(1 for s in path if s["stage"] == "gossip"),
+            "total_ms": round((path[-1]["end_ns"] - path[0]["start_ns"]) / 1e6, 3),
+            **{label: round(ms, 3) for label, ms in totals.items()},
+        })
+    print(f"[*] {len(traces)} transaksi ter-trace, {len(rows)} dengan critical path lengkap "
+          f"(sisanya belum dikonfirmasi atau span induknya hilang)")
+    if not rows:
+        return
+
+    totals = sorted(r["total_ms"] for r in rows)
+    grand_total = sum(totals)
+    print(f"Critical path: rata-rata {grand_total / len(totals):.1f} ms, p50 {percentile(totals, 0.5):.1f} ms, "
+          f"p95 {percentile(totals, 0.95):.1f} ms, max {totals[-1]:.1f} ms")
+    print(f"{'Segmen':<18} {'n':>6} {'rata-rata':>10} {'p50':>9} {'p95':>9} {'porsi':>7}")
+    for label in SEGMENTS:
+        values = sorted(r[label] for r in rows if label in r)
+        if not values:
+            continue
+        share = sum(values) / grand_total * 100 if grand_total else 0.0
+        print(f"{label:<18} {len(values):>6} {sum(values) / len(values):>10.1f} {percentile(values, 0.5):>9.1f} "
+              f"{percentile(values, 0.95):>9.1f} {share:>6.1f}%")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["tx", "entry_node", "final_node", "hops", "total_ms"] + SEGMENTS,
+                                restval=0.0)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"[*] Critical path per transaksi disimpan ke {args.output}")
+
+    slowest = [r["tx"] for r in sorted(rows, key=lambda r: r["total_ms"], reverse=True)[:args.slowest]]
+    for trace in args.tx + slowest:
+        if trace in traces:
+            print_timeline(trace, traces[trace])
+        else:
+            print(f"[!] Tidak ada span untuk transaksi {trace}")
+
+
+if __name__ == '__main__':
+    main()